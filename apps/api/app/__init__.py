@@ -4,6 +4,7 @@ from __future__ import annotations
 
 from collections.abc import AsyncIterator
 from contextlib import asynccontextmanager
+from datetime import timedelta
 from pathlib import Path
 
 from fastapi import FastAPI
@@ -12,19 +13,53 @@ from fastapi.staticfiles import StaticFiles
 
 from .api.router import api_router
 from .config import get_settings
-from .db import create_engine, create_session_factory, run_schema_migrations
-from .middleware import session_middleware
+from .db import (
+    DatabaseWriter,
+    create_engine,
+    create_read_engine,
+    create_session_factory,
+    run_schema_migrations,
+)
+from .middleware import UploadSizeLimitMiddleware, session_middleware
 from .models import ClassType
 from .services import class_store, user_store
+from .services.math_catalog import reset_math_catalog
+from .services.achievements import reconcile_achievements
+from .services.analysis_cache import reset_analysis_cache
+from .services.coaching_history import reset_summary_cache
+from .services.discussion import reconcile_unread_counters
+from .services.drawing_feedback_cache import reset_drawing_feedback_cache
 from .services.math_seed import ensure_seed_math_problems
+from .services.math_seed_data import TEST_EXERCISES
+from .services.notification_broker import reset_notification_broker
+from .services.openai_client import create_openai_client
+from .services.openai_math_helper import reset_openai_rate_limiter
+from .services.notification_retention import NotificationRetention
+from .services.problem_assists import (
+    ProblemAssistPrecomputer,
+    install_problem_assist_precomputer,
+)
+from .services.session_cache import reset_session_cache
+from .services.session_touch import SessionTouchBatcher, install_touch_batcher
 
 
 @asynccontextmanager
 async def lifespan(application: FastAPI) -> AsyncIterator[None]:
     """Manage application startup and shutdown tasks."""
     settings = get_settings()
+    reset_session_cache()
+    reset_math_catalog()
+    reset_notification_broker()
+    reset_analysis_cache(settings.analysis_cache_memory_entries)
+    reset_openai_rate_limiter()
+    reset_summary_cache()
+    reset_drawing_feedback_cache(
+        settings.drawing_feedback_cache_entries,
+        settings.drawing_feedback_max_distance,
+    )
     engine = create_engine(settings)
-    session_factory = create_session_factory(engine)
+    writer = DatabaseWriter() if settings.sqlite_serialize_writes else None
+    session_factory = create_session_factory(engine, writer=writer)
 
     await run_schema_migrations(engine)
     async with session_factory() as session:
@@ -37,13 +72,66 @@ async def lifespan(application: FastAPI) -> AsyncIterator[None]:
                 session, grade=grade, class_type=ClassType.GUEST
             )
         await ensure_seed_math_problems(session)
+        await reconcile_unread_counters(session)
+        await reconcile_achievements(session)
         await session.commit()
 
+    touch_batcher = SessionTouchBatcher(
+        engine,
+        writer=writer,
+        flush_interval=settings.session_touch_flush_seconds,
+        max_batch=settings.session_touch_batch_size,
+    )
+    touch_batcher.start()
+    install_touch_batcher(touch_batcher)
+
+    retention = NotificationRetention(
+        session_factory,
+        read_ttl=timedelta(days=settings.notification_read_ttl_days),
+        unread_ttl=timedelta(days=settings.notification_unread_ttl_days),
+        digest_after=timedelta(hours=settings.notification_digest_after_hours),
+        batch_size=settings.notification_retention_batch_size,
+        interval=settings.notification_retention_interval_seconds,
+    )
+    if retention.interval > 0:
+        retention.start()
+
+    openai_client = create_openai_client(settings)
+    precomputer = None
+    if openai_client is not None and settings.precompute_problem_assists:
+        precomputer = ProblemAssistPrecomputer(session_factory, openai_client)
+        for entry in TEST_EXERCISES:
+            precomputer.enqueue(
+                entry["problem_text"], entry.get("language", "en"), entry["analysis"]
+            )
+        precomputer.start()
+    install_problem_assist_precomputer(precomputer)
+
+    read_engine = create_read_engine(settings)
+    read_session_factory = (
+        create_session_factory(read_engine) if read_engine else session_factory
+    )
+
     application.state.settings = settings
     application.state.db_session = session_factory
+    application.state.db_writer = writer
+    application.state.db_read_session = read_session_factory
+    application.state.session_touch_batcher = touch_batcher
+    application.state.notification_retention = retention
+    application.state.openai_client = openai_client
     try:
         yield
     finally:
+        await retention.stop()
+        install_problem_assist_precomputer(None)
+        if precomputer is not None:
+            await precomputer.stop()
+        if openai_client is not None:
+            await openai_client.close()
+        install_touch_batcher(None)
+        await touch_batcher.stop()
+        if read_engine is not None:
+            await read_engine.dispose()
         await engine.dispose()
 
 
@@ -61,6 +149,16 @@ def create_app() -> FastAPI:
         allow_headers=["*"],
         allow_credentials=True,
     )
+    # Registered before the session middleware so it runs inside it and its
+    # 413 raised while a route reads the body reaches FastAPI unchanged.
+    app.add_middleware(
+        UploadSizeLimitMiddleware,
+        paths={
+            f"{settings.api_prefix}/math-helper/extract",
+            f"{settings.api_prefix}/math-helper/extract/stream",
+            f"{settings.api_prefix}/math-helper/drawing-feedback",
+        },
+    )
     app.middleware("http")(session_middleware)
     app.include_router(api_router, prefix=settings.api_prefix)
 
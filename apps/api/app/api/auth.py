@@ -13,7 +13,7 @@ from app.auth import (
     get_optional_user,
 )
 from app.config import Settings
-from app.dependencies import get_app_settings, get_db_session
+from app.dependencies import get_app_settings, get_write_db_session
 from app.models import ClassType
 from app.services import class_store, learning, security, sessions, user_store
 
@@ -111,7 +111,7 @@ async def login(
     payload: LoginRequest,
     response: Response,
     request: Request,
-    session: AsyncSession = Depends(get_db_session),
+    session: AsyncSession = Depends(get_write_db_session),
     settings: Settings = Depends(get_app_settings),
 ) -> AuthSuccess:
     """Authenticate a user and return access/refresh tokens."""
@@ -154,7 +154,7 @@ async def register(
     payload: RegisterRequest,
     response: Response,
     request: Request,
-    session: AsyncSession = Depends(get_db_session),
+    session: AsyncSession = Depends(get_write_db_session),
     settings: Settings = Depends(get_app_settings),
     actor: AuthContext | None = Depends(get_optional_user),
 ) -> AuthSuccess:
@@ -219,7 +219,7 @@ async def refresh_tokens(
     payload: RefreshRequest,
     request: Request,
     response: Response,
-    session: AsyncSession = Depends(get_db_session),
+    session: AsyncSession = Depends(get_write_db_session),
     settings: Settings = Depends(get_app_settings),
 ) -> RefreshResponse:
     """Refresh authentication tokens given a valid refresh token."""
@@ -272,15 +272,13 @@ async def refresh_tokens(
             session, settings, user, learning_session
         )
         set_session_cookie(response, validated_session, settings)
-    else:
-        learning_session = validated_session.learning_session
 
     auth_data = await issue_tokens(
         session,
         user,
         settings,
         session_id=validated_session.id,
-        learning_session_id=learning_session.id,
+        learning_session_id=validated_session.learning_session_id,
         is_guest=user.is_guest,
     )
     refresh_token = auth_data.refreshToken
@@ -304,7 +302,7 @@ async def logout(
     payload: LogoutRequest,
     request: Request,
     response: Response,
-    session: AsyncSession = Depends(get_db_session),
+    session: AsyncSession = Depends(get_write_db_session),
     settings: Settings = Depends(get_app_settings),
 ) -> None:
     """Invalidate a refresh token."""
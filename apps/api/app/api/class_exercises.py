@@ -6,7 +6,7 @@ from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.auth import AuthContext, require_roles, get_current_user
-from app.dependencies import get_db_session
+from app.dependencies import get_db_session, get_write_db_session
 from app.models import ExerciseType
 from app.services import class_exercise, class_store
 from .schemas.class_exercises import (
@@ -92,7 +92,7 @@ async def get_homework_problems(
 )
 async def create_exercise(
     payload: ClassExerciseCreateRequest,
-    session: AsyncSession = Depends(get_db_session),
+    session: AsyncSession = Depends(get_write_db_session),
     actor: AuthContext = Depends(require_roles("teacher")),
 ) -> ClassExercisePayload:
     """Create a new class exercise."""
@@ -153,7 +153,7 @@ async def get_exercise(
 async def update_exercise(
     exercise_id: str,
     payload: ClassExerciseUpdateRequest,
-    session: AsyncSession = Depends(get_db_session),
+    session: AsyncSession = Depends(get_write_db_session),
     actor: AuthContext = Depends(require_roles("teacher")),
 ) -> ClassExercisePayload:
     """Update an exercise."""
@@ -183,7 +183,7 @@ async def update_exercise(
 @router.delete("/{exercise_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_exercise(
     exercise_id: str,
-    session: AsyncSession = Depends(get_db_session),
+    session: AsyncSession = Depends(get_write_db_session),
     actor: AuthContext = Depends(require_roles("teacher")),
 ) -> None:
     """Delete an exercise."""
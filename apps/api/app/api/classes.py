@@ -7,9 +7,9 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.auth import AuthContext, require_roles
 from app.config import Settings
-from app.dependencies import get_app_settings, get_db_session
+from app.dependencies import get_app_settings, get_db_session, get_write_db_session
 from app.models import ClassType
-from app.services import class_store, user_store
+from app.services import class_store, sessions, user_store
 
 from .schemas.classes import (
     ClassCreateRequest,
@@ -30,7 +30,7 @@ router = APIRouter(prefix="/classes", tags=["classes"])
 @router.post("", response_model=ClassPayload, status_code=status.HTTP_201_CREATED)
 async def create_class(
     payload: ClassCreateRequest,
-    session: AsyncSession = Depends(get_db_session),
+    session: AsyncSession = Depends(get_write_db_session),
     actor: AuthContext = Depends(require_roles("teacher")),
 ) -> ClassPayload:
     """Create a new class for the authenticated teacher."""
@@ -93,7 +93,7 @@ async def list_class_students(
 async def add_student_to_class(
     class_id: str,
     payload: UserCreateRequest,
-    session: AsyncSession = Depends(get_db_session),
+    session: AsyncSession = Depends(get_write_db_session),
     settings: Settings = Depends(get_app_settings),
     actor: AuthContext = Depends(require_roles("teacher")),
 ) -> UserCreateResponse:
@@ -139,7 +139,7 @@ async def add_student_to_class(
 async def delete_student_from_class(
     class_id: str,
     student_id: str,
-    session: AsyncSession = Depends(get_db_session),
+    session: AsyncSession = Depends(get_write_db_session),
     actor: AuthContext = Depends(require_roles("teacher")),
 ) -> Response:
     """Remove a student from a class the teacher owns."""
@@ -159,6 +159,7 @@ async def delete_student_from_class(
 
     await session.delete(student)
     await session.commit()
+    sessions.invalidate_cached_sessions(student_id)
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 
@@ -170,7 +171,7 @@ async def update_student_in_class(
     class_id: str,
     student_id: str,
     payload: UserUpdateRequest,
-    session: AsyncSession = Depends(get_db_session),
+    session: AsyncSession = Depends(get_write_db_session),
     settings: Settings = Depends(get_app_settings),
     actor: AuthContext = Depends(require_roles("teacher")),
 ) -> UserPayload:
@@ -1,21 +1,52 @@
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Any, Optional
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    status,
+)
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.dependencies import get_db_session
+from app.config import Settings
+from app.dependencies import (
+    get_app_settings,
+    get_read_db_session,
+    get_write_db_session,
+)
 from app.auth import get_current_user, AuthContext
 from app.api.schemas import discussion as schemas
+from app.models import Discussion
 from app.services import discussion as crud
 
 router = APIRouter()
 
 
+def _discussion_fields(
+    discussion: Discussion, *, reply_count: int, is_subscribed: bool
+) -> dict[str, Any]:
+    """Return the schema fields for a discussion plus its per-viewer values."""
+    return {
+        "id": discussion.id,
+        "topic": discussion.topic,
+        "content": discussion.content,
+        "category": discussion.category,
+        "author": discussion.author,
+        "created_at": discussion.created_at,
+        "updated_at": discussion.updated_at,
+        "reply_count": reply_count,
+        "is_subscribed": is_subscribed,
+    }
+
+
 @router.post(
     "/", response_model=schemas.Discussion, status_code=status.HTTP_201_CREATED
 )
 async def create_discussion(
     discussion: schemas.DiscussionCreate,
-    db: AsyncSession = Depends(get_db_session),
+    db: AsyncSession = Depends(get_write_db_session),
     auth_context: AuthContext = Depends(get_current_user),
 ):
     """Create a new discussion thread"""
@@ -25,67 +56,59 @@ async def create_discussion(
 
     # Return with computed fields
     return schemas.Discussion.model_validate(
-        {
-            **db_discussion.__dict__,
-            "reply_count": 0,
-            "is_subscribed": True,  # Auto-subscribed on creation
-        }
+        _discussion_fields(
+            db_discussion,
+            reply_count=0,
+            is_subscribed=True,  # Auto-subscribed on creation
+        )
     )
 
 
-@router.get("/", response_model=List[schemas.Discussion])
+@router.get("/", response_model=schemas.DiscussionPage)
 async def list_discussions(
     category: Optional[str] = None,
-    skip: int = 0,
-    limit: int = 20,
-    db: AsyncSession = Depends(get_db_session),
+    cursor: Optional[str] = None,
+    limit: int = Query(default=20, ge=1, le=100),
+    db: AsyncSession = Depends(get_read_db_session),
     auth_context: AuthContext = Depends(get_current_user),
 ):
-    """Get list of discussions, optionally filtered by category and user role"""
+    """Get a page of discussions, optionally filtered by category and user role.
+
+    Pass the returned ``nextCursor`` as ``cursor`` to fetch the following page.
+    """
     try:
         # Teachers see only discussions from their students
-        if auth_context.user.role == "teacher":
-            discussions = await crud.get_discussions_for_teacher(
-                db,
-                teacher_id=auth_context.user.id,
-                category=category,
-                skip=skip,
-                limit=limit,
-            )
-        else:
-            discussions = await crud.get_discussions(
-                db, category=category, skip=skip, limit=limit
-            )
-
-        # Add computed fields
-        result = []
-        for discussion in discussions:
-            reply_count = await crud.get_reply_count(db, discussion.id)
-            is_subscribed = await crud.is_subscribed(
-                db, auth_context.user.id, discussion.id
-            )
-            result.append(
-                schemas.Discussion.model_validate(
-                    {
-                        **discussion.__dict__,
-                        "reply_count": reply_count,
-                        "is_subscribed": is_subscribed,
-                    }
+        page = await crud.get_discussion_feed(
+            db,
+            auth_context.user.id,
+            category=category,
+            teacher_id=(
+                auth_context.user.id if auth_context.user.role == "teacher" else None
+            ),
+            cursor=cursor,
+            limit=limit,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return schemas.DiscussionPage(
+        items=[
+            schemas.Discussion.model_validate(
+                _discussion_fields(
+                    item.discussion,
+                    reply_count=item.reply_count,
+                    is_subscribed=item.is_subscribed,
                 )
             )
-
-        return result
-    except Exception as e:
-        import traceback
-
-        traceback.print_exc()
-        raise HTTPException(status_code=500, detail=str(e))
+            for item in page.items
+        ],
+        next_cursor=page.next_cursor,
+    )
 
 
 @router.get("/{discussion_id}", response_model=schemas.DiscussionDetail)
 async def get_discussion(
     discussion_id: int,
-    db: AsyncSession = Depends(get_db_session),
+    db: AsyncSession = Depends(get_read_db_session),
     auth_context: AuthContext = Depends(get_current_user),
 ):
     """Get a single discussion with all replies"""
@@ -98,9 +121,12 @@ async def get_discussion(
     is_subscribed = await crud.is_subscribed(db, auth_context.user.id, discussion.id)
     return schemas.DiscussionDetail.model_validate(
         {
-            **discussion.__dict__,
-            "reply_count": len(discussion.replies),
-            "is_subscribed": is_subscribed,
+            **_discussion_fields(
+                discussion,
+                reply_count=len(discussion.replies),
+                is_subscribed=is_subscribed,
+            ),
+            "replies": discussion.replies,
         }
     )
 
@@ -113,13 +139,15 @@ async def get_discussion(
 async def create_reply(
     discussion_id: int,
     reply: schemas.DiscussionReplyCreate,
-    db: AsyncSession = Depends(get_db_session),
+    request: Request,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_write_db_session),
     auth_context: AuthContext = Depends(get_current_user),
+    settings: Settings = Depends(get_app_settings),
 ):
     """Add a reply to a discussion"""
     # Check if discussion exists
-    discussion = await crud.get_discussion_by_id(db, discussion_id)
-    if not discussion:
+    if not await crud.discussion_exists(db, discussion_id):
         raise HTTPException(status_code=404, detail="Discussion not found")
 
     # Auto-subscribe user when they reply
@@ -127,15 +155,29 @@ async def create_reply(
         db, user_id=auth_context.user.id, discussion_id=discussion_id
     )
 
-    return await crud.create_reply(
-        db, discussion_id=discussion_id, reply=reply, author_id=auth_context.user.id
+    defer_notifications = settings.notification_fanout_background
+    db_reply = await crud.create_reply(
+        db,
+        discussion_id=discussion_id,
+        reply=reply,
+        author_id=auth_context.user.id,
+        notify=not defer_notifications,
     )
+    if defer_notifications:
+        background_tasks.add_task(
+            crud.fan_out_reply_notifications,
+            request.app.state.db_session,
+            discussion_id,
+            db_reply.id,
+            auth_context.user.id,
+        )
+    return db_reply
 
 
 @router.post("/{discussion_id}/subscribe", status_code=status.HTTP_204_NO_CONTENT)
 async def subscribe(
     discussion_id: int,
-    db: AsyncSession = Depends(get_db_session),
+    db: AsyncSession = Depends(get_write_db_session),
     auth_context: AuthContext = Depends(get_current_user),
 ):
     """Subscribe to a discussion to receive notifications"""
@@ -146,12 +188,13 @@ async def subscribe(
     await crud.subscribe_to_discussion(
         db, user_id=auth_context.user.id, discussion_id=discussion_id
     )
+    await db.commit()
 
 
 @router.delete("/{discussion_id}/subscribe", status_code=status.HTTP_204_NO_CONTENT)
 async def unsubscribe(
     discussion_id: int,
-    db: AsyncSession = Depends(get_db_session),
+    db: AsyncSession = Depends(get_write_db_session),
     auth_context: AuthContext = Depends(get_current_user),
 ):
     """Unsubscribe from a discussion"""
@@ -163,7 +206,7 @@ async def unsubscribe(
 @router.delete("/{discussion_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_discussion(
     discussion_id: int,
-    db: AsyncSession = Depends(get_db_session),
+    db: AsyncSession = Depends(get_write_db_session),
     auth_context: AuthContext = Depends(get_current_user),
 ):
     """Delete a discussion (teachers can delete any, users only their own)"""
@@ -189,7 +232,7 @@ async def delete_discussion(
 async def delete_reply(
     discussion_id: int,
     reply_id: int,
-    db: AsyncSession = Depends(get_db_session),
+    db: AsyncSession = Depends(get_write_db_session),
     auth_context: AuthContext = Depends(get_current_user),
 ):
     """Delete a reply (teachers can delete any, users only their own)"""
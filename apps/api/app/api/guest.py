@@ -6,7 +6,7 @@ from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import Settings
-from app.dependencies import get_app_settings, get_db_session
+from app.dependencies import get_app_settings, get_write_db_session
 from app.models import ClassType
 from app.services import class_store, learning, sessions, user_store
 
@@ -21,7 +21,7 @@ async def create_guest(
     payload: GuestLoginRequest,
     response: Response,
     request: Request,
-    session: AsyncSession = Depends(get_db_session),
+    session: AsyncSession = Depends(get_write_db_session),
     settings: Settings = Depends(get_app_settings),
 ) -> AuthSuccess:
     """Create a guest student, start a learning session, and set a session cookie."""
@@ -10,7 +10,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from app.auth import AuthContext, require_roles
-from app.dependencies import get_db_session
+from app.dependencies import get_db_session, get_write_db_session
 from app.models import LearningTip, format_timestamp
 
 from .schemas.learning_tips import (
@@ -31,7 +31,7 @@ router = APIRouter(prefix="/learning-tips", tags=["learning-tips"])
 async def create_learning_tip(
     payload: LearningTipCreate,
     actor: AuthContext = Depends(require_roles("teacher")),
-    session: AsyncSession = Depends(get_db_session),
+    session: AsyncSession = Depends(get_write_db_session),
 ) -> LearningTipResponse:
     """Create a new learning tip."""
     tip = LearningTip(
@@ -111,7 +111,7 @@ async def update_learning_tip(
     tip_id: str,
     payload: LearningTipUpdate,
     actor: AuthContext = Depends(require_roles("teacher")),
-    session: AsyncSession = Depends(get_db_session),
+    session: AsyncSession = Depends(get_write_db_session),
 ) -> LearningTipResponse:
     """Update an existing learning tip."""
     query = select(LearningTip).where(LearningTip.id == tip_id)
@@ -160,7 +160,7 @@ async def update_learning_tip(
 async def delete_learning_tip(
     tip_id: str,
     actor: AuthContext = Depends(require_roles("teacher")),
-    session: AsyncSession = Depends(get_db_session),
+    session: AsyncSession = Depends(get_write_db_session),
 ) -> None:
     """Delete an existing learning tip."""
     query = select(LearningTip).where(LearningTip.id == tip_id)
@@ -2,10 +2,52 @@
 
 from __future__ import annotations
 
+import asyncio
+import json
+import logging
+from functools import partial
+from typing import Any, AsyncIterator
+
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
+from openai import AsyncOpenAI
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
+from app.api.schemas.math_analysis import Language, MathProblemAnalysis
 from app.auth import require_roles
+from app.config import Settings
+from app.dependencies import (
+    get_app_settings,
+    get_db_session_factory,
+    get_openai_client,
+)
 from app.services import openai_math_helper
+from app.services.analysis_cache import (
+    AnalyzeFn,
+    analyze_with_cache,
+    get_analysis_cache,
+)
+from app.services.coaching_history import CompactedHistory, compact_history
+from app.services.drawing_feedback_cache import (
+    EMPTY_CANVAS_FEEDBACK,
+    get_drawing_feedback_cache,
+    problem_key,
+)
+from app.services.drawing_fingerprint import fingerprint_drawing
+from app.services.image_preprocessing import (
+    DOCUMENT_MIME_TYPES,
+    IMAGE_MIME_TYPES,
+    ImageTooLargeError,
+    PreparedImage,
+    VisionDetail,
+    prepare_image,
+)
+from app.services.problem_assists import (
+    drawing_suggestions_key,
+    get_problem_assist_precomputer,
+    lookup_assist,
+    multiplication_target_key,
+)
 
 from .schemas.math_helper import (
     AnalyzeBatchRequest,
@@ -24,28 +66,186 @@ from .schemas.math_helper import (
     MultiplicationContextResponse,
 )
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/math-helper", tags=["math-helper"])
 
 
+async def _analyze_one(
+    problem_texts: list[str], language: Language, *, client: AsyncOpenAI
+) -> list[MathProblemAnalysis]:
+    (problem_text,) = problem_texts
+    return [
+        await openai_math_helper.analyze_math_problem(
+            problem_text, language, client=client
+        )
+    ]
+
+
+async def _cached_analyses(
+    session_factory: async_sessionmaker[AsyncSession],
+    problem_texts: list[str],
+    language: Language,
+    analyze: AnalyzeFn,
+) -> list[MathProblemAnalysis]:
+    try:
+        return await analyze_with_cache(
+            session_factory,
+            problem_texts,
+            language,
+            analyze,
+            model=openai_math_helper.ANALYSIS_MODEL,
+            prompt_version=openai_math_helper.ANALYSIS_PROMPT_VERSION,
+        )
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)
+        ) from exc
+
+
+async def _prepared_image(
+    image_base64: str,
+    mime_type: str | None,
+    settings: Settings,
+    detail: VisionDetail,
+    allowed_types: frozenset[str] = IMAGE_MIME_TYPES,
+) -> PreparedImage:
+    try:
+        return await asyncio.to_thread(
+            prepare_image,
+            image_base64,
+            mime_type,
+            max_bytes=settings.image_upload_max_bytes,
+            allowed_types=allowed_types,
+            detail=detail,
+            max_pixels=settings.image_max_pixels,
+        )
+    except ImageTooLargeError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(exc)
+        ) from exc
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)
+        ) from exc
+
+
+def _sse(event: str, data: dict[str, Any]) -> bytes:
+    payload = json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+    return f"event: {event}\ndata: {payload}\n\n".encode()
+
+
+async def _extraction_pages(
+    payload: ExtractProblemsRequest, settings: Settings
+) -> list[PreparedImage]:
+    image = await _prepared_image(
+        payload.image_base64,
+        payload.mime_type,
+        settings,
+        settings.extract_image_detail,
+        DOCUMENT_MIME_TYPES,
+    )
+    try:
+        return await openai_math_helper.split_extraction_pages(
+            image, max_pages=settings.pdf_max_pages
+        )
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)
+        ) from exc
+
+
 @router.post(
     "/extract",
     response_model=ExtractProblemsResponse,
     status_code=status.HTTP_200_OK,
     dependencies=[Depends(require_roles("student"))],
 )
-async def extract_problems(payload: ExtractProblemsRequest) -> ExtractProblemsResponse:
-    """Extract math problems from an uploaded image or PDF."""
-    try:
-        problems = await openai_math_helper.extract_problems_from_image(
-            payload.image_base64,
-            payload.mime_type,
+async def extract_problems(
+    payload: ExtractProblemsRequest,
+    openai_client: AsyncOpenAI = Depends(get_openai_client),
+    settings: Settings = Depends(get_app_settings),
+) -> ExtractProblemsResponse:
+    """Extract math problems from an uploaded image or PDF.
+
+    PDF pages are extracted concurrently; problems are returned in page order
+    and pages whose extraction failed are listed in ``failedPages``.
+    """
+    pages = await _extraction_pages(payload, settings)
+    by_page: dict[int, list[str]] = {}
+    errors: dict[int, Exception] = {}
+    async for result in openai_math_helper.extract_problems_by_page(
+        pages,
+        payload.language,
+        client=openai_client,
+        max_concurrency=settings.openai_max_concurrency,
+        detail=settings.extract_image_detail,
+    ):
+        if result.error is not None:
+            errors[result.page] = result.error
+        by_page[result.page] = result.problems
+
+    problems = [problem for page in sorted(by_page) for problem in by_page[page]]
+    if not problems and errors:
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail="Problem extraction failed.",
+        ) from errors[min(errors)]
+    if not problems:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="No problems found."
+        )
+    return ExtractProblemsResponse(problems=problems, failedPages=sorted(errors))
+
+
+@router.post(
+    "/extract/stream",
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(require_roles("student"))],
+)
+async def extract_problems_stream(
+    payload: ExtractProblemsRequest,
+    openai_client: AsyncOpenAI = Depends(get_openai_client),
+    settings: Settings = Depends(get_app_settings),
+) -> StreamingResponse:
+    """Stream extracted problems page by page as Server-Sent Events.
+
+    Emits a ``page`` event as each page finishes (in completion order) with
+    its problems, or an ``error`` detail if that page failed, and a final
+    ``done`` event with all problems in page order.
+    """
+    pages = await _extraction_pages(payload, settings)
+
+    async def events() -> AsyncIterator[bytes]:
+        by_page: dict[int, list[str]] = {}
+        results = openai_math_helper.extract_problems_by_page(
+            pages,
             payload.language,
+            client=openai_client,
+            max_concurrency=settings.openai_max_concurrency,
+            detail=settings.extract_image_detail,
         )
-    except ValueError as exc:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)
-        ) from exc
-    return ExtractProblemsResponse(problems=problems)
+        try:
+            async for result in results:
+                by_page[result.page] = result.problems
+                event: dict[str, Any] = {
+                    "page": result.page,
+                    "pageCount": result.page_count,
+                    "problems": result.problems,
+                }
+                if result.error is not None:
+                    event["error"] = "This page could not be read."
+                yield _sse("page", event)
+        finally:
+            await results.aclose()
+        problems = [problem for page in sorted(by_page) for problem in by_page[page]]
+        yield _sse("done", {"problems": problems})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @router.post(
@@ -54,16 +254,18 @@ async def extract_problems(payload: ExtractProblemsRequest) -> ExtractProblemsRe
     status_code=status.HTTP_200_OK,
     dependencies=[Depends(require_roles("student"))],
 )
-async def analyze_problem(payload: AnalyzeProblemRequest) -> AnalyzeProblemResponse:
+async def analyze_problem(
+    payload: AnalyzeProblemRequest,
+    session_factory: async_sessionmaker[AsyncSession] = Depends(get_db_session_factory),
+    openai_client: AsyncOpenAI = Depends(get_openai_client),
+) -> AnalyzeProblemResponse:
     """Analyze a single math word problem."""
-    try:
-        analysis = await openai_math_helper.analyze_math_problem(
-            payload.problem_text, payload.language
-        )
-    except ValueError as exc:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)
-        ) from exc
+    (analysis,) = await _cached_analyses(
+        session_factory,
+        [payload.problem_text],
+        payload.language,
+        partial(_analyze_one, client=openai_client),
+    )
     return AnalyzeProblemResponse(analysis=analysis)
 
 
@@ -73,16 +275,18 @@ async def analyze_problem(payload: AnalyzeProblemRequest) -> AnalyzeProblemRespo
     status_code=status.HTTP_200_OK,
     dependencies=[Depends(require_roles("student"))],
 )
-async def analyze_batch(payload: AnalyzeBatchRequest) -> AnalyzeBatchResponse:
+async def analyze_batch(
+    payload: AnalyzeBatchRequest,
+    session_factory: async_sessionmaker[AsyncSession] = Depends(get_db_session_factory),
+    openai_client: AsyncOpenAI = Depends(get_openai_client),
+) -> AnalyzeBatchResponse:
     """Analyze multiple math word problems in a single request."""
-    try:
-        analyses = await openai_math_helper.analyze_math_problems_batch(
-            payload.problem_texts, payload.language
-        )
-    except ValueError as exc:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)
-        ) from exc
+    analyses = await _cached_analyses(
+        session_factory,
+        payload.problem_texts,
+        payload.language,
+        partial(openai_math_helper.analyze_math_problems_batch, client=openai_client),
+    )
     return AnalyzeBatchResponse(analyses=analyses)
 
 
@@ -92,38 +296,107 @@ async def analyze_batch(payload: AnalyzeBatchRequest) -> AnalyzeBatchResponse:
     status_code=status.HTTP_200_OK,
     dependencies=[Depends(require_roles("student"))],
 )
-async def analyze_batched(payload: AnalyzeBatchRequest) -> AnalyzeBatchResponse:
+async def analyze_batched(
+    payload: AnalyzeBatchRequest,
+    session_factory: async_sessionmaker[AsyncSession] = Depends(get_db_session_factory),
+    openai_client: AsyncOpenAI = Depends(get_openai_client),
+) -> AnalyzeBatchResponse:
     """Analyze multiple math problems with batching and fallback."""
-    try:
-        analyses = await openai_math_helper.analyze_math_problems_with_batching(
-            payload.problem_texts, payload.language
-        )
-    except ValueError as exc:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)
-        ) from exc
+    analyses = await _cached_analyses(
+        session_factory,
+        payload.problem_texts,
+        payload.language,
+        partial(
+            openai_math_helper.analyze_math_problems_with_batching,
+            client=openai_client,
+        ),
+    )
     return AnalyzeBatchResponse(analyses=analyses)
 
 
+@router.get(
+    "/analysis-cache",
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(require_roles("admin"))],
+)
+async def analysis_cache_stats() -> dict[str, int]:
+    """Report hit/miss counters of the analysis cache."""
+    return get_analysis_cache().stats()
+
+
 @router.post(
     "/drawing-feedback",
     response_model=AnalyzeDrawingResponse,
     status_code=status.HTTP_200_OK,
     dependencies=[Depends(require_roles("student"))],
 )
-async def analyze_drawing(payload: AnalyzeDrawingRequest) -> AnalyzeDrawingResponse:
-    """Analyze a student's drawing for a math problem."""
+async def analyze_drawing(
+    payload: AnalyzeDrawingRequest,
+    openai_client: AsyncOpenAI = Depends(get_openai_client),
+    settings: Settings = Depends(get_app_settings),
+) -> AnalyzeDrawingResponse:
+    """Analyze a student's drawing for a math problem.
+
+    Blank canvases are answered locally, and resubmissions of the same or a
+    nearly identical drawing for the same problem are served from the cache.
+    """
+    image = await _prepared_image(
+        payload.image_base64, None, settings, settings.drawing_image_detail
+    )
+    fingerprint = await asyncio.to_thread(
+        fingerprint_drawing,
+        image,
+        max_pixels=settings.drawing_fingerprint_max_pixels,
+    )
+    cache = get_drawing_feedback_cache()
+    if fingerprint.empty:
+        cache.empty += 1
+        return AnalyzeDrawingResponse(feedback=EMPTY_CANVAS_FEEDBACK[payload.language])
+    problem = problem_key(payload.problem_text, payload.language)
+    cached = cache.lookup(problem, fingerprint)
+    if cached is not None:
+        return AnalyzeDrawingResponse(feedback=cached)
+
     try:
         feedback = await openai_math_helper.analyze_drawing_with_openai(
-            payload.image_base64, payload.problem_text, payload.language
+            image,
+            payload.problem_text,
+            payload.language,
+            client=openai_client,
+            detail=settings.drawing_image_detail,
         )
     except ValueError as exc:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)
         ) from exc
+    if feedback:
+        cache.store(problem, fingerprint, feedback)
     return AnalyzeDrawingResponse(feedback=feedback)
 
 
+@router.get(
+    "/drawing-feedback-cache",
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(require_roles("admin"))],
+)
+async def drawing_feedback_cache_stats() -> dict[str, int]:
+    """Report hit/miss counters of the drawing feedback cache."""
+    return get_drawing_feedback_cache().stats()
+
+
+@router.get(
+    "/problem-assists",
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(require_roles("admin"))],
+)
+async def problem_assist_stats() -> dict[str, int]:
+    """Report progress of the drawing-suggestion and multiplication precompute."""
+    precomputer = get_problem_assist_precomputer()
+    if precomputer is None:
+        return {"pending": 0, "completed": 0, "failed": 0, "openaiRequests": 0}
+    return precomputer.stats()
+
+
 @router.post(
     "/drawing-suggestions",
     response_model=DrawingSuggestionsResponse,
@@ -132,11 +405,21 @@ async def analyze_drawing(payload: AnalyzeDrawingRequest) -> AnalyzeDrawingRespo
 )
 async def drawing_suggestions(
     payload: DrawingSuggestionsRequest,
+    session_factory: async_sessionmaker[AsyncSession] = Depends(get_db_session_factory),
+    openai_client: AsyncOpenAI = Depends(get_openai_client),
 ) -> DrawingSuggestionsResponse:
-    """Return drawing suggestions for a problem."""
+    """Return drawing suggestions for a problem.
+
+    Catalog problems are served from their precomputed suggestions.
+    """
+    stored = await lookup_assist(
+        session_factory, drawing_suggestions_key(payload.problem_text, payload.language)
+    )
+    if stored is not None:
+        return DrawingSuggestionsResponse.model_validate(stored)
     try:
         suggestions = await openai_math_helper.generate_drawing_suggestions(
-            payload.problem_text, payload.language
+            payload.problem_text, payload.language, client=openai_client
         )
     except ValueError as exc:
         raise HTTPException(
@@ -145,6 +428,19 @@ async def drawing_suggestions(
     return DrawingSuggestionsResponse(suggestions=suggestions)
 
 
+async def _compacted_history(
+    payload: MetacognitiveRequest, client: AsyncOpenAI, settings: Settings
+) -> CompactedHistory:
+    return await compact_history(
+        payload.problem_text,
+        [msg.model_dump() for msg in payload.conversation_history],
+        payload.language,
+        partial(openai_math_helper.summarize_coaching_turns, client=client),
+        keep_turns=settings.coaching_history_turns,
+        token_budget=settings.coaching_history_token_budget,
+    )
+
+
 @router.post(
     "/metacognitive",
     response_model=MetacognitiveResponse,
@@ -153,14 +449,19 @@ async def drawing_suggestions(
 )
 async def metacognitive_response(
     payload: MetacognitiveRequest,
+    openai_client: AsyncOpenAI = Depends(get_openai_client),
+    settings: Settings = Depends(get_app_settings),
 ) -> MetacognitiveResponse:
     """Return a metacognitive coaching response."""
+    history = await _compacted_history(payload, openai_client, settings)
     try:
         response = await openai_math_helper.get_metacognitive_coaching_response(
             payload.problem_text,
-            [msg.model_dump() for msg in payload.conversation_history],
+            history.turns,
             payload.student_message,
             payload.language,
+            client=openai_client,
+            history_summary=history.summary,
         )
     except ValueError as exc:
         raise HTTPException(
@@ -169,6 +470,68 @@ async def metacognitive_response(
     return MetacognitiveResponse(response=response)
 
 
+@router.post(
+    "/metacognitive/stream",
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(require_roles("student"))],
+)
+async def metacognitive_stream(
+    payload: MetacognitiveRequest,
+    openai_client: AsyncOpenAI = Depends(get_openai_client),
+    settings: Settings = Depends(get_app_settings),
+) -> StreamingResponse:
+    """Stream a metacognitive coaching response as Server-Sent Events.
+
+    Emits a ``token`` event per text delta and a final ``done`` event with
+    the full response, whether it was truncated at the token cap, total
+    latency and time to first token. A failure mid-stream ends with an
+    ``error`` event.
+    """
+    history = await _compacted_history(payload, openai_client, settings)
+    try:
+        stream = await openai_math_helper.stream_metacognitive_coaching_response(
+            payload.problem_text,
+            history.turns,
+            payload.student_message,
+            payload.language,
+            client=openai_client,
+            max_tokens=settings.coaching_max_completion_tokens,
+            history_summary=history.summary,
+        )
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)
+        ) from exc
+
+    async def events() -> AsyncIterator[bytes]:
+        try:
+            async for delta in stream:
+                yield _sse("token", {"text": delta})
+        except Exception:  # noqa: BLE001
+            logger.exception("Coaching stream failed")
+            yield _sse("error", {"detail": "The coaching response was interrupted."})
+            return
+        finally:
+            await stream.aclose()
+        yield _sse("done", stream.summary())
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get(
+    "/coaching-metrics",
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(require_roles("admin"))],
+)
+async def coaching_metrics() -> dict[str, Any]:
+    """Report latency counters of streamed coaching responses."""
+    return openai_math_helper.get_coaching_metrics().as_dict()
+
+
 @router.post(
     "/multiplication-context",
     response_model=MultiplicationContextResponse,
@@ -177,12 +540,27 @@ async def metacognitive_response(
 )
 async def multiplication_context(
     payload: MultiplicationContextRequest,
+    session_factory: async_sessionmaker[AsyncSession] = Depends(get_db_session_factory),
+    openai_client: AsyncOpenAI = Depends(get_openai_client),
 ) -> MultiplicationContextResponse:
-    """Analyze multiplication context for visualization."""
+    """Analyze multiplication context for visualization.
+
+    Catalog problems are served from their precomputed target label.
+    """
+    segments = [segment.model_dump() for segment in payload.segments]
+    stored = await lookup_assist(
+        session_factory, multiplication_target_key(payload.problem_text, segments)
+    )
+    if stored is not None:
+        result = openai_math_helper.resolve_multiplication_context(
+            stored["targetLabel"], segments
+        )
+        return MultiplicationContextResponse.model_validate(result)
     try:
         result = await openai_math_helper.analyze_multiplication_context(
             payload.problem_text,
-            [segment.model_dump() for segment in payload.segments],
+            segments,
+            client=openai_client,
         )
     except ValueError as exc:
         raise HTTPException(
@@ -4,12 +4,14 @@ from __future__ import annotations
 
 from typing import Literal, cast
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.auth import AuthContext, get_optional_user, require_roles
-from app.dependencies import get_db_session
+from app.dependencies import get_read_db_session, get_write_db_session
 from app.services import math_word_problems as math_service
+from app.services.math_catalog import CatalogPage, get_math_catalog
+from app.services.problem_assists import get_problem_assist_precomputer
 
 from .schemas.math_word_problems import (
     MathWordProblemCreate,
@@ -28,7 +30,7 @@ router = APIRouter(prefix="/math-problems", tags=["math-word-problems"])
 )
 async def create_math_word_problem(
     payload: MathWordProblemCreate,
-    session: AsyncSession = Depends(get_db_session),
+    session: AsyncSession = Depends(get_write_db_session),
 ) -> MathWordProblemPayload:
     """Create a new mathematical word problem."""
     try:
@@ -46,6 +48,9 @@ async def create_math_word_problem(
             status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)
         ) from exc
     await session.commit()
+    precomputer = get_problem_assist_precomputer()
+    if precomputer is not None:
+        precomputer.enqueue(payload.problem_text, payload.language, analysis_payload)
     return MathWordProblemPayload.from_model(problem)
 
 
@@ -56,7 +61,7 @@ async def create_math_word_problem(
 )
 async def delete_math_word_problem(
     problem_id: str,
-    session: AsyncSession = Depends(get_db_session),
+    session: AsyncSession = Depends(get_write_db_session),
 ) -> None:
     """Delete an existing mathematical word problem."""
     deleted = await math_service.delete_problem_by_id(session, problem_id)
@@ -78,10 +83,15 @@ async def list_math_word_problems(
     grade: int | None = Query(
         default=None, description="Optional grade filter (3 or 4)"
     ),
-    session: AsyncSession = Depends(get_db_session),
+    if_none_match: str | None = Header(default=None),
+    session: AsyncSession = Depends(get_read_db_session),
     actor: AuthContext | None = Depends(get_optional_user),
-) -> MathWordProblemListResponse:
-    """Return all mathematical word problems with optional filters."""
+) -> Response:
+    """Return all mathematical word problems with optional filters.
+
+    Listings are served from the in-memory catalog as pre-serialized JSON with
+    a strong ETag; a matching If-None-Match yields 304.
+    """
     normalized_order: Literal["asc", "desc"] | None = None
     if difficulty_order:
         lowered = difficulty_order.lower()
@@ -96,20 +106,38 @@ async def list_math_word_problems(
     if resolved_grade is None and actor and actor.user.classroom:
         resolved_grade = actor.user.classroom.grade
 
-    try:
-        problems = await math_service.list_problems(
-            session,
-            difficulty_order=normalized_order,
-            grade=resolved_grade,
-            difficulty_level=difficulty_level,
-        )
-    except ValueError as exc:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)
-        ) from exc
-    return MathWordProblemListResponse(
-        problems=[MathWordProblemPayload.from_model(problem) for problem in problems]
+    catalog = get_math_catalog()
+    key = (
+        resolved_grade,
+        difficulty_level.strip().lower() if difficulty_level else None,
+        normalized_order,
     )
+    page = catalog.get(key)
+    if page is None:
+        version = catalog.version
+        try:
+            problems = await math_service.list_problems(
+                session,
+                difficulty_order=normalized_order,
+                grade=resolved_grade,
+                difficulty_level=difficulty_level,
+            )
+        except ValueError as exc:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)
+            ) from exc
+        listing = MathWordProblemListResponse(
+            problems=[
+                MathWordProblemPayload.from_model(problem) for problem in problems
+            ]
+        )
+        page = CatalogPage.from_body(listing.model_dump_json(by_alias=True).encode())
+        catalog.put(key, page, version=version)
+
+    headers = {"ETag": page.etag, "Cache-Control": "no-cache"}
+    if page.matches(if_none_match):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=page.body, media_type="application/json", headers=headers)
 
 
 __all__ = ["router"]
@@ -1,32 +1,119 @@
-from typing import List
-from fastapi import APIRouter, Depends
+import asyncio
+from typing import AsyncIterator, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.dependencies import get_db_session
-from app.auth import get_current_user, AuthContext
+from app.config import Settings
+from app.dependencies import get_app_settings, get_db_session, get_read_db_session
+from app.auth import get_current_user, require_roles, AuthContext
 from app.api.schemas import discussion as schemas
 from app.services import discussion as crud
+from app.services.notification_broker import (
+    NotificationEvent,
+    Subscription,
+    get_notification_broker,
+)
 
 router = APIRouter()
 
 
-@router.get("/", response_model=List[schemas.Notification])
+@router.get("/", response_model=schemas.NotificationPage)
 async def get_notifications(
     unread_only: bool = False,
-    db: AsyncSession = Depends(get_db_session),
+    cursor: Optional[str] = None,
+    limit: int = Query(default=50, ge=1, le=200),
+    db: AsyncSession = Depends(get_read_db_session),
     auth_context: AuthContext = Depends(get_current_user),
 ):
-    """Get user's notifications"""
-    return await crud.get_user_notifications(
-        db, user_id=auth_context.user.id, unread_only=unread_only
+    """Get a page of the user's notifications, newest first.
+
+    Pass the returned ``nextCursor`` as ``cursor`` to fetch the following page.
+    """
+    try:
+        page = await crud.get_user_notifications(
+            db,
+            user_id=auth_context.user.id,
+            unread_only=unread_only,
+            cursor=cursor,
+            limit=limit,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return schemas.NotificationPage(
+        items=[schemas.Notification.model_validate(item) for item in page.items],
+        next_cursor=page.next_cursor,
     )
 
 
 @router.get("/unread-count")
 async def get_unread_count(
-    db: AsyncSession = Depends(get_db_session),
+    db: AsyncSession = Depends(get_read_db_session),
     auth_context: AuthContext = Depends(get_current_user),
 ):
     """Get count of unread notifications"""
     count = await crud.get_unread_count(db, user_id=auth_context.user.id)
     return {"count": count}
+
+
+@router.get("/retention")
+async def get_retention_metrics(
+    request: Request,
+    _admin: AuthContext = Depends(require_roles("admin")),
+):
+    """Report rows pruned and collapsed by the notification retention job"""
+    return request.app.state.notification_retention.metrics.as_dict()
+
+
+@router.get("/stream")
+async def stream_notifications(
+    request: Request,
+    db: AsyncSession = Depends(get_read_db_session),
+    auth_session: AsyncSession = Depends(get_db_session),
+    auth_context: AuthContext = Depends(get_current_user),
+    settings: Settings = Depends(get_app_settings),
+):
+    """Push new notifications and unread-count changes as Server-Sent Events.
+
+    The stream opens with an ``unread`` event carrying the current count,
+    followed by a ``notification`` event for each new notification and an
+    ``unread`` event whenever notifications are marked as read.
+    """
+    user_id = auth_context.user.id
+    # Subscribe before counting so nothing committed in between is missed.
+    subscription = get_notification_broker().subscribe(user_id)
+    try:
+        unread = await crud.get_unread_count(db, user_id=user_id)
+    except BaseException:
+        subscription.close()
+        raise
+    # The stream may stay open for hours; do not hold pooled connections.
+    await db.close()
+    await auth_session.close()
+
+    return StreamingResponse(
+        _event_stream(
+            request,
+            subscription,
+            unread,
+            keepalive=settings.notification_stream_keepalive_seconds,
+        ),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _event_stream(
+    request: Request, subscription: Subscription, unread: int, *, keepalive: float
+) -> AsyncIterator[bytes]:
+    try:
+        yield NotificationEvent("unread", {"count": unread}).encode()
+        while not await request.is_disconnected():
+            try:
+                item = await asyncio.wait_for(subscription.queue.get(), keepalive)
+            except asyncio.TimeoutError:
+                yield b": keepalive\n\n"
+                continue
+            yield item.encode()
+    finally:
+        subscription.close()
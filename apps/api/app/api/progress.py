@@ -2,15 +2,19 @@
 
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import date
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.auth import AuthContext, require_roles
-from app.dependencies import get_db_session
+from app.dependencies import get_read_db_session, get_write_db_session
 from app.models import MathWordProblem
 from app.services import math_progress, streak
 
 from .schemas.progress import (
+    ProgressBatchRequest,
+    ProgressBatchResponse,
     ProgressPayload,
     ProgressSetRequest,
     ProgressSummaryResponse,
@@ -25,7 +29,7 @@ router = APIRouter(prefix="/progress", tags=["progress"])
 @router.post("", response_model=ProgressPayload, status_code=status.HTTP_200_OK)
 async def set_math_progress(
     payload: ProgressSetRequest,
-    session: AsyncSession = Depends(get_db_session),
+    session: AsyncSession = Depends(get_write_db_session),
     actor: AuthContext = Depends(require_roles("student")),
 ) -> ProgressPayload:
     """Set or update the caller's progress for a specific math word problem."""
@@ -46,13 +50,45 @@ async def set_math_progress(
     return ProgressPayload.from_model(record)
 
 
+@router.post(
+    "/batch", response_model=ProgressBatchResponse, status_code=status.HTTP_200_OK
+)
+async def set_math_progress_batch(
+    payload: ProgressBatchRequest,
+    session: AsyncSession = Depends(get_write_db_session),
+    actor: AuthContext = Depends(require_roles("student")),
+) -> ProgressBatchResponse:
+    """Apply a queue of answers in one transaction; unknown problems are reported."""
+    result = await math_progress.set_progress_batch(
+        session,
+        student_id=actor.uid,
+        entries=[
+            math_progress.ProgressEntry(
+                problem_id=entry.math_word_problem_id,
+                success=entry.success,
+                source=entry.source or "home_practice",
+            )
+            for entry in payload.entries
+        ],
+    )
+    await session.commit()
+    return ProgressBatchResponse.model_validate(
+        {
+            "records": [
+                ProgressPayload.from_model(record) for record in result.records
+            ],
+            "missingProblemIds": result.missing_problem_ids,
+        }
+    )
+
+
 @router.get(
     "/students",
     response_model=ProgressSummaryResponse,
 )
 async def get_student_progress_summary(
     actor: AuthContext = Depends(require_roles("teacher")),
-    session: AsyncSession = Depends(get_db_session),
+    session: AsyncSession = Depends(get_read_db_session),
 ) -> ProgressSummaryResponse:
     """Return aggregate progress for students scoped by teacher or all students for admin."""
     summary = await math_progress.summarize_progress(session, teacher_id=actor.uid)
@@ -71,11 +107,24 @@ async def get_student_progress_summary(
     response_model=StreakResponse,
 )
 async def get_user_streak(
+    history_from: date | None = Query(default=None, alias="from"),
+    history_to: date | None = Query(default=None, alias="to"),
     actor: AuthContext = Depends(require_roles("student")),
-    session: AsyncSession = Depends(get_db_session),
+    session: AsyncSession = Depends(get_read_db_session),
 ) -> StreakResponse:
-    """Return current streak, longest streak, weekly activity, and full activity history for the authenticated student."""
-    result = await streak.calculate_streak(session, actor.uid)
+    """Return current streak, longest streak, weekly activity, and activity history for the authenticated student.
+
+    ``from``/``to`` (inclusive ISO dates) bound the activity history; without
+    them the full history is returned.
+    """
+    if history_from and history_to and history_from > history_to:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="'from' must not be after 'to'",
+        )
+    result = await streak.calculate_streak(
+        session, actor.uid, history_from=history_from, history_to=history_to
+    )
     return StreakResponse.model_validate(
         {
             "currentStreak": result.current_streak,
@@ -94,7 +143,7 @@ async def get_user_streak(
 )
 async def get_my_solved_problems(
     actor: AuthContext = Depends(require_roles("student")),
-    session: AsyncSession = Depends(get_db_session),
+    session: AsyncSession = Depends(get_read_db_session),
 ) -> list[str]:
     """Return list of problem IDs that the student has successfully solved."""
     solved_ids = await math_progress.get_solved_problem_ids(session, actor.uid)
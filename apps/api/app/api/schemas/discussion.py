@@ -55,6 +55,11 @@ class Discussion(DiscussionBase):
         from_attributes = True
 
 
+class DiscussionPage(BaseModel):
+    items: List[Discussion]
+    next_cursor: Optional[str] = Field(default=None, serialization_alias="nextCursor")
+
+
 class DiscussionDetail(Discussion):
     replies: List[DiscussionReply] = []
 
@@ -78,5 +83,10 @@ class Notification(NotificationBase):
         from_attributes = True
 
 
+class NotificationPage(BaseModel):
+    items: List[Notification]
+    next_cursor: Optional[str] = Field(default=None, serialization_alias="nextCursor")
+
+
 class NotificationUpdate(BaseModel):
     is_read: bool
@@ -17,6 +17,7 @@ class ExtractProblemsRequest(BaseModel):
 
 class ExtractProblemsResponse(BaseModel):
     problems: list[str]
+    failed_pages: list[int] = Field(alias="failedPages", default_factory=list)
 
 
 class AnalyzeProblemRequest(BaseModel):
@@ -29,6 +29,14 @@ class ProgressSetRequest(BaseModel):
     )
 
 
+class ProgressBatchRequest(BaseModel):
+    """Queued answers replayed in submission order."""
+
+    model_config = ConfigDict(populate_by_name=True)
+
+    entries: list[ProgressSetRequest] = Field(min_length=1, max_length=200)
+
+
 class ProgressPayload(BaseModel):
     """Response payload for a single progress record."""
 
@@ -54,6 +62,15 @@ class ProgressPayload(BaseModel):
         )
 
 
+class ProgressBatchResponse(BaseModel):
+    """Result of a batch progress submission."""
+
+    model_config = ConfigDict(populate_by_name=True)
+
+    records: list[ProgressPayload]
+    missing_problem_ids: list[str] = Field(alias="missingProblemIds")
+
+
 class StudentProgressSummary(BaseModel):
     """Aggregate progress for a student."""
 
@@ -15,7 +15,7 @@ from app.api.schemas.student_own_exercises import (
     StudentOwnExerciseResponse,
     StudentOwnExerciseUpdate,
 )
-from app.dependencies import get_db_session
+from app.dependencies import get_db_session, get_write_db_session
 from app.models import OwnExerciseProgress
 from app.services import student_own_exercise as service
 from app.services.achievements import (
@@ -34,7 +34,7 @@ router = APIRouter()
 async def create_student_exercise(
     data: StudentOwnExerciseCreate,
     actor: AuthContext = Depends(require_roles("student")),
-    db: AsyncSession = Depends(get_db_session),
+    db: AsyncSession = Depends(get_write_db_session),
 ) -> StudentOwnExerciseResponse:
     """Create a new student own exercise."""
     exercise = await service.create_exercise(db, actor.uid, data)
@@ -86,7 +86,7 @@ async def update_student_exercise(
     exercise_id: str,
     data: StudentOwnExerciseUpdate,
     actor: AuthContext = Depends(require_roles("student")),
-    db: AsyncSession = Depends(get_db_session),
+    db: AsyncSession = Depends(get_write_db_session),
 ) -> StudentOwnExerciseResponse:
     """Update an existing exercise."""
     exercise = await service.update_exercise(db, exercise_id, actor.uid, data)
@@ -102,7 +102,7 @@ async def update_student_exercise(
 async def delete_student_exercise(
     exercise_id: str,
     actor: AuthContext = Depends(require_roles("student")),
-    db: AsyncSession = Depends(get_db_session),
+    db: AsyncSession = Depends(get_write_db_session),
 ) -> None:
     """Delete an exercise."""
     success = await service.delete_exercise(db, exercise_id, actor.uid)
@@ -131,7 +131,7 @@ async def solve_student_exercise(
     exercise_id: str,
     data: SolveExerciseRequest,
     actor: AuthContext = Depends(require_roles("student")),
-    db: AsyncSession = Depends(get_db_session),
+    db: AsyncSession = Depends(get_write_db_session),
 ) -> SolveExerciseResponse:
     """Track that a student solved their own exercise (only counts unique solves)."""
     # Verify the exercise exists and belongs to the user
@@ -172,7 +172,9 @@ async def solve_student_exercise(
         if not was_already_solved:
             stats = await increment_solved_count(db, actor.uid, "own_exercises")
             # Check and unlock achievements
-            unlocked = await check_and_unlock_achievements(db, actor.uid, stats)
+            unlocked = await check_and_unlock_achievements(
+                db, actor.uid, stats, solved={"own_exercises": 1}
+            )
             new_achievements = [a.id for a in unlocked]
 
         await db.commit()
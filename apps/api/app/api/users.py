@@ -7,7 +7,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.auth import AuthContext, require_roles, get_current_user
 from app.config import Settings
-from app.dependencies import get_app_settings, get_db_session
+from app.dependencies import get_app_settings, get_db_session, get_write_db_session
 from app.models import ClassType
 from app.services import class_store, user_store
 from .schemas.users import (
@@ -37,7 +37,7 @@ async def get_me(
 @router.patch("/me", response_model=UserPayload)
 async def update_me(
     payload: UserUpdateRequest,
-    session: AsyncSession = Depends(get_db_session),
+    session: AsyncSession = Depends(get_write_db_session),
     settings: Settings = Depends(get_app_settings),
     actor: AuthContext = Depends(get_current_user),
 ) -> UserPayload:
@@ -73,7 +73,7 @@ async def update_me(
 )
 async def create_user(
     payload: UserCreateRequest,
-    session: AsyncSession = Depends(get_db_session),
+    session: AsyncSession = Depends(get_write_db_session),
     settings: Settings = Depends(get_app_settings),
     actor: AuthContext = Depends(require_roles("teacher")),
 ) -> UserCreateResponse:
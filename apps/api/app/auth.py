@@ -48,6 +48,9 @@ async def _resolve_bearer_context(
         raise _unauthorized("Invalid token payload")
 
     validation = await sessions.validate_session(session, session_id, settings)
+    if validation.mutated:
+        # Release the writer before the route writes through its own session.
+        await session.commit()
     if not validation.user_session or not validation.user:
         raise _unauthorized("Invalid or expired session")
     if validation.user.id != user_id:
@@ -57,9 +60,6 @@ async def _resolve_bearer_context(
     if isinstance(guest_claim, bool) and guest_claim != bool(validation.user.is_guest):
         raise _unauthorized("Invalid token payload")
 
-    if validation.mutated:
-        await session.flush()
-
     active_learning_session_id = validation.user_session.learning_session_id
     if active_learning_session_id is None and isinstance(learning_session_id, str):
         active_learning_session_id = learning_session_id
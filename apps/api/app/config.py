@@ -3,6 +3,7 @@
 from __future__ import annotations
 
 from functools import lru_cache
+from typing import Literal
 
 from pydantic import Field, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -36,6 +37,50 @@ class Settings(BaseSettings):
         default="sqlite+aiosqlite:///./auth.db",
         description="SQLAlchemy compatible SQLite connection string.",
     )
+    sqlite_echo: bool | None = Field(
+        default=None,
+        description="Log emitted SQL (defaults to on in development only).",
+    )
+    sqlite_journal_mode: Literal["wal", "delete", "truncate", "persist"] = Field(
+        default="wal",
+        description="SQLite journal mode; WAL lets readers run alongside the writer.",
+    )
+    sqlite_synchronous: Literal["off", "normal", "full", "extra"] = Field(
+        default="normal",
+        description="SQLite fsync policy; NORMAL is durable enough under WAL.",
+    )
+    sqlite_mmap_size: int = Field(
+        default=256 * 1024 * 1024,
+        description="Bytes of the database file SQLite may memory-map (0 disables).",
+    )
+    sqlite_cache_size: int = Field(
+        default=-32_000,
+        description="SQLite page cache per connection (negative values are KiB).",
+    )
+    sqlite_busy_timeout_ms: int = Field(
+        default=5_000,
+        description="How long SQLite waits on a locked database before failing.",
+    )
+    sqlite_temp_store: Literal["default", "file", "memory"] = Field(
+        default="memory",
+        description="Where SQLite keeps temporary tables and indices.",
+    )
+    sqlite_pool_size: int = Field(
+        default=5,
+        description="Connections kept open by the read/write engine.",
+    )
+    sqlite_max_overflow: int = Field(
+        default=10,
+        description="Extra connections each engine may open under burst load.",
+    )
+    sqlite_read_pool_size: int = Field(
+        default=5,
+        description="Connections in the separate query-only pool (0 disables it).",
+    )
+    sqlite_serialize_writes: bool = Field(
+        default=True,
+        description="Queue write transactions in-process instead of busy-waiting.",
+    )
     api_host: str = Field(
         default="0.0.0.0",
         description="Host interface uvicorn should bind to.",
@@ -85,11 +130,175 @@ class Settings(BaseSettings):
     session_absolute_ttl_hours: float = Field(
         default=24.0, description="Absolute maximum session lifetime (hours)."
     )
+    session_cache_ttl_seconds: float = Field(
+        default=60.0,
+        description="How long a validated session is served from memory (0 disables).",
+    )
+    session_cache_max_entries: int = Field(
+        default=4096,
+        description="Maximum number of validated sessions kept in memory.",
+    )
+    session_touch_interval_seconds: float = Field(
+        default=60.0,
+        description="Minimum interval between persisted rolling-expiry refreshes.",
+    )
+    session_touch_flush_seconds: float = Field(
+        default=5.0,
+        description="How often queued session expiry updates are written in one batch.",
+    )
+    session_touch_batch_size: int = Field(
+        default=256,
+        description="Number of queued session expiry updates that forces an early flush.",
+    )
+
+    notification_fanout_background: bool = Field(
+        default=False,
+        description="Create reply notifications after the reply response is sent.",
+    )
+    notification_stream_keepalive_seconds: float = Field(
+        default=15.0,
+        gt=0,
+        description="Idle interval after which notification streams send a keepalive comment.",
+    )
+    notification_read_ttl_days: float = Field(
+        default=30.0,
+        gt=0,
+        description="Age after which read notifications are deleted.",
+    )
+    notification_unread_ttl_days: float = Field(
+        default=180.0,
+        gt=0,
+        description="Age after which unread notifications are deleted.",
+    )
+    notification_digest_after_hours: float = Field(
+        default=24.0,
+        gt=0,
+        description="Age after which reply notifications of one discussion are collapsed into a digest.",
+    )
+    notification_retention_batch_size: int = Field(
+        default=500,
+        ge=1,
+        description="Rows deleted or collapsed per retention transaction.",
+    )
+    notification_retention_interval_seconds: float = Field(
+        default=3600.0,
+        ge=0,
+        description="Interval between notification retention passes (0 disables the job).",
+    )
+
+    analysis_cache_memory_entries: int = Field(
+        default=1024,
+        ge=1,
+        description="Math problem analyses kept in the in-memory LRU in front of SQLite.",
+    )
+
+    image_upload_max_bytes: int = Field(
+        default=10 * 1024 * 1024,
+        ge=1,
+        description="Largest decoded image or PDF accepted by the math helper uploads.",
+    )
+    image_max_pixels: int = Field(
+        default=50_000_000,
+        ge=1,
+        description="Largest image resolution (width x height) decoded for downscaling.",
+    )
+    extract_image_detail: Literal["auto", "low", "high"] = Field(
+        default="high",
+        description="Vision detail level for worksheet extraction; uploads are downscaled to match.",
+    )
+    pdf_max_pages: int = Field(
+        default=20,
+        ge=1,
+        description="Most pages of an uploaded PDF that are split and extracted.",
+    )
+    drawing_image_detail: Literal["auto", "low", "high"] = Field(
+        default="low",
+        description="Vision detail level for drawing feedback ('low' is a flat 85 tokens).",
+    )
+    drawing_feedback_cache_entries: int = Field(
+        default=512,
+        ge=1,
+        description="Drawing feedback responses kept for near-duplicate resubmissions.",
+    )
+    drawing_feedback_max_distance: int = Field(
+        default=4,
+        ge=0,
+        le=256,
+        description="Hamming distance (of 256 bits) at which two drawings count as the same.",
+    )
+    drawing_fingerprint_max_pixels: int = Field(
+        default=4_000_000,
+        ge=1,
+        description="Larger drawings are only deduplicated when byte-identical.",
+    )
+    precompute_problem_assists: bool = Field(
+        default=True,
+        description="Precompute drawing suggestions and multiplication context for catalog problems.",
+    )
 
     openai_api_key: str = Field(
         default="",
         description="OpenAI API Key for image processing (GPT-4 Vision)",
     )
+    openai_base_url: str | None = Field(
+        default=None,
+        description="Override the OpenAI API base URL (e.g. a proxy or local fake).",
+    )
+    openai_timeout_seconds: float = Field(
+        default=60.0,
+        gt=0,
+        description="Read/write/pool timeout for OpenAI requests.",
+    )
+    openai_connect_timeout_seconds: float = Field(
+        default=5.0,
+        gt=0,
+        description="Connect timeout for OpenAI requests.",
+    )
+    openai_max_connections: int = Field(
+        default=20,
+        ge=1,
+        description="Upper bound on concurrent connections to the OpenAI API.",
+    )
+    openai_max_keepalive_connections: int = Field(
+        default=10,
+        ge=0,
+        description="Idle OpenAI connections kept open for reuse.",
+    )
+    openai_keepalive_expiry_seconds: float = Field(
+        default=30.0,
+        ge=0,
+        description="How long idle OpenAI connections are kept open.",
+    )
+    coaching_max_completion_tokens: int = Field(
+        default=1024,
+        ge=1,
+        description="Token cap for streamed metacognitive coaching responses.",
+    )
+    coaching_history_turns: int = Field(
+        default=6,
+        ge=1,
+        description="Most recent coaching turns always sent verbatim; older ones are summarized.",
+    )
+    coaching_history_token_budget: int = Field(
+        default=1200,
+        ge=0,
+        description="Estimated token budget for the summary and verbatim coaching history.",
+    )
+    openai_max_concurrency: int = Field(
+        default=4,
+        ge=1,
+        description="Maximum OpenAI analysis requests in flight per worksheet.",
+    )
+    openai_requests_per_minute: float = Field(
+        default=60.0,
+        gt=0,
+        description="Client-side pacing of OpenAI analysis requests.",
+    )
+    openai_max_retries: int = Field(
+        default=2,
+        ge=0,
+        description="Retries per problem after a failed OpenAI analysis.",
+    )
 
     @field_validator("allowed_origins", mode="before")
     @classmethod
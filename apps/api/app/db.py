@@ -2,30 +2,214 @@
 
 from __future__ import annotations
 
+import asyncio
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, make_url
 from sqlalchemy.ext.asyncio import (
     AsyncEngine,
     AsyncSession,
     async_sessionmaker,
     create_async_engine,
 )
+from sqlalchemy.orm import ORMExecuteState, Session, SessionTransaction
+from sqlalchemy.util import await_only
 
 from .config import Settings
 from .models import Base
 
+_WRITER_KEY = "db_writer"
+_WRITER_HELD_KEY = "db_writer_held"
+
+
+class WriterReentryError(RuntimeError):
+    """A task tried to claim the DatabaseWriter it already holds."""
+
+
+class DatabaseWriter:
+    """In-process single-writer slot for SQLite write transactions.
+
+    SQLite only admits one writer at a time; when several sessions race for it
+    the losers spin in ``busy_timeout``. Sessions created by a writer-aware
+    factory instead queue here (FIFO) right before their first write and give
+    the slot back when their transaction ends, which is exactly as long as
+    SQLite itself would keep the database locked.
+
+    The slot is not reentrant. A task that already holds it and writes through
+    a second session would wait for itself forever, so that raises
+    ``WriterReentryError`` instead: commit the first session before writing
+    through another one.
+    """
+
+    def __init__(self) -> None:
+        self._lock = asyncio.Lock()
+        self._owner: asyncio.Task[Any] | None = None
+
+    @property
+    def locked(self) -> bool:
+        """Return True while a write transaction holds the slot."""
+        return self._lock.locked()
+
+    async def acquire(self) -> None:
+        """Wait for the writer slot."""
+        task = asyncio.current_task()
+        if task is not None and task is self._owner:
+            raise WriterReentryError(
+                "This task already holds the database writer; commit its "
+                "session before writing through another one."
+            )
+        await self._lock.acquire()
+        self._owner = task
+
+    def release(self) -> None:
+        """Give the writer slot to the next queued writer."""
+        self._owner = None
+        self._lock.release()
+
+    async def __aenter__(self) -> "DatabaseWriter":
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *_exc_info: object) -> None:
+        self.release()
+
+
+class WriterSession(Session):
+    """Session that claims the DatabaseWriter before emitting any write."""
+
+
+def _claim_writer(session: Session) -> None:
+    """Block (inside the async greenlet) until this session owns the writer."""
+    writer = session.info.get(_WRITER_KEY)
+    if writer is None or session.info.get(_WRITER_HELD_KEY):
+        return
+    await_only(writer.acquire())
+    session.info[_WRITER_HELD_KEY] = True
+
+
+@event.listens_for(WriterSession, "before_flush")
+def _claim_writer_before_flush(
+    session: Session, _flush_context: Any, _instances: Any
+) -> None:
+    _claim_writer(session)
+
+
+@event.listens_for(WriterSession, "do_orm_execute")
+def _claim_writer_before_dml(state: ORMExecuteState) -> None:
+    if state.is_insert or state.is_update or state.is_delete:
+        _claim_writer(state.session)
+
+
+@event.listens_for(WriterSession, "after_transaction_end")
+def _release_writer(session: Session, transaction: SessionTransaction) -> None:
+    if transaction.parent is None and session.info.pop(_WRITER_HELD_KEY, False):
+        session.info[_WRITER_KEY].release()
+
+
+def _is_memory_database(url: str) -> bool:
+    """Return True for SQLite URLs that point at an in-memory database."""
+    database = make_url(url).database
+    return not database or database == ":memory:" or "mode=memory" in database
+
+
+def sqlite_pragmas(settings: Settings, *, read_only: bool = False) -> list[str]:
+    """Return the PRAGMA statements applied to every new SQLite connection."""
+    pragmas = [
+        f"PRAGMA busy_timeout = {int(settings.sqlite_busy_timeout_ms)}",
+        f"PRAGMA synchronous = {settings.sqlite_synchronous.upper()}",
+        f"PRAGMA cache_size = {int(settings.sqlite_cache_size)}",
+        f"PRAGMA mmap_size = {int(settings.sqlite_mmap_size)}",
+        f"PRAGMA temp_store = {settings.sqlite_temp_store.upper()}",
+    ]
+    if not read_only and not _is_memory_database(settings.sqlite_url):
+        # journal_mode is persistent, so only the writer engine needs to set it.
+        pragmas.insert(0, f"PRAGMA journal_mode = {settings.sqlite_journal_mode}")
+    if read_only:
+        pragmas.append("PRAGMA query_only = ON")
+    return pragmas
+
+
+def _install_pragma_hook(engine: AsyncEngine, pragmas: list[str]) -> None:
+    """Apply the PRAGMA profile whenever the pool opens a new connection."""
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _apply_pragmas(dbapi_connection: Any, _connection_record: Any) -> None:
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+
+def _engine_kwargs(settings: Settings, *, pool_size: int) -> dict[str, Any]:
+    """Return pool and logging options shared by the writer and reader engines."""
+    echo = settings.sqlite_echo
+    if echo is None:
+        echo = settings.environment == "development"
+    kwargs: dict[str, Any] = {"echo": echo}
+    if not _is_memory_database(settings.sqlite_url):
+        kwargs.update(
+            pool_size=max(1, pool_size),
+            max_overflow=settings.sqlite_max_overflow,
+        )
+    return kwargs
+
 
 def create_engine(settings: Settings) -> AsyncEngine:
     """Create the async database engine used by the application."""
-    return create_async_engine(
-        settings.sqlite_url, echo=settings.environment == "development"
+    engine = create_async_engine(
+        settings.sqlite_url,
+        **_engine_kwargs(settings, pool_size=settings.sqlite_pool_size),
+    )
+    _install_pragma_hook(engine, sqlite_pragmas(settings))
+    return engine
+
+
+def create_read_engine(settings: Settings) -> AsyncEngine | None:
+    """Create a separate query-only engine for read-mostly routes.
+
+    Returns None when the read pool is disabled or the database lives in memory
+    (a second pool would see a different, empty database).
+    """
+    if settings.sqlite_read_pool_size <= 0 or _is_memory_database(settings.sqlite_url):
+        return None
+    engine = create_async_engine(
+        settings.sqlite_url,
+        **_engine_kwargs(settings, pool_size=settings.sqlite_read_pool_size),
+    )
+    _install_pragma_hook(engine, sqlite_pragmas(settings, read_only=True))
+    return engine
+
+
+def create_session_factory(
+    engine: AsyncEngine, *, writer: DatabaseWriter | None = None
+) -> async_sessionmaker[AsyncSession]:
+    """Return a session factory bound to the provided engine.
+
+    When a writer is given, every session from the factory serializes its
+    write transactions through it.
+    """
+    if writer is None:
+        return async_sessionmaker(engine, expire_on_commit=False)
+    return async_sessionmaker(
+        engine,
+        expire_on_commit=False,
+        sync_session_class=WriterSession,
+        info={_WRITER_KEY: writer},
     )
 
 
-def create_session_factory(engine: AsyncEngine) -> async_sessionmaker[AsyncSession]:
-    """Return a session factory bound to the provided engine."""
-    return async_sessionmaker(engine, expire_on_commit=False)
+def _create_missing_indexes(connection: Connection) -> None:
+    """Add indexes declared on tables that already existed (create_all skips them)."""
+    for table in Base.metadata.tables.values():
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
 
 
 async def run_schema_migrations(engine: AsyncEngine) -> None:
-    """Create database tables if they do not already exist."""
+    """Create database tables and indexes if they do not already exist."""
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(_create_missing_indexes)
@@ -5,14 +5,35 @@ from __future__ import annotations
 from collections.abc import AsyncIterator
 from typing import cast
 
-from fastapi import Request
+from fastapi import HTTPException, Request, status
+from openai import AsyncOpenAI
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from .config import Settings, get_settings
 
 
 async def get_db_session(request: Request) -> AsyncIterator[AsyncSession]:
-    """Yield a request-scoped database session."""
+    """Yield a request-scoped database session for reads and authentication.
+
+    Code that writes through this session (such as session validation)
+    commits its own transaction, so it never holds the DatabaseWriter while
+    the route writes through ``get_write_db_session``.
+    """
+    session_factory = cast(
+        async_sessionmaker[AsyncSession], request.app.state.db_session
+    )
+    async with session_factory() as session:
+        yield session
+
+
+async def get_write_db_session(request: Request) -> AsyncIterator[AsyncSession]:
+    """Yield the request's session for routes that mutate data.
+
+    This is a separate session from ``get_db_session``. It queues on the
+    app's DatabaseWriter before its first write and holds the slot until the
+    route commits or the request ends, so concurrent mutations are
+    serialized in-process instead of spinning on SQLite's busy timeout.
+    """
     session_factory = cast(
         async_sessionmaker[AsyncSession], request.app.state.db_session
     )
@@ -20,9 +41,35 @@ async def get_db_session(request: Request) -> AsyncIterator[AsyncSession]:
         yield session
 
 
+def get_db_session_factory(request: Request) -> async_sessionmaker[AsyncSession]:
+    """Return the writer session factory for code that opens short sessions."""
+    return cast(async_sessionmaker[AsyncSession], request.app.state.db_session)
+
+
+async def get_read_db_session(request: Request) -> AsyncIterator[AsyncSession]:
+    """Yield a request-scoped session from the query-only read pool."""
+    session_factory = cast(
+        async_sessionmaker[AsyncSession],
+        getattr(request.app.state, "db_read_session", request.app.state.db_session),
+    )
+    async with session_factory() as session:
+        yield session
+
+
 def get_app_settings(request: Request) -> Settings:
     """Return the Settings instance stored on the FastAPI app."""
     settings = getattr(request.app.state, "settings", None)
     if settings is not None:
         return cast(Settings, settings)
     return get_settings()
+
+
+def get_openai_client(request: Request) -> AsyncOpenAI:
+    """Return the app-lifetime OpenAI client created in the lifespan handler."""
+    client = getattr(request.app.state, "openai_client", None)
+    if client is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="OpenAI API key is not configured.",
+        )
+    return cast(AsyncOpenAI, client)
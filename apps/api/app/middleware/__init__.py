@@ -1,5 +1,6 @@
 """Middleware package exports."""
 
+from .body_limit import UploadSizeLimitMiddleware
 from .session import session_middleware
 
-__all__ = ["session_middleware"]
+__all__ = ["UploadSizeLimitMiddleware", "session_middleware"]
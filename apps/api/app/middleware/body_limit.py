@@ -0,0 +1,74 @@
+"""Middleware that rejects oversized upload bodies while they stream in."""
+
+from __future__ import annotations
+
+from typing import Collection
+
+from fastapi import HTTPException, status
+from fastapi.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Room for the JSON envelope and other fields around the base64 payload.
+_ENVELOPE_BYTES = 64 * 1024
+_DETAIL = "Upload is too large."
+
+
+def upload_body_limit(max_image_bytes: int) -> int:
+    """Largest JSON body that can carry a base64 image of ``max_image_bytes``."""
+    return -(-max_image_bytes // 3) * 4 + _ENVELOPE_BYTES
+
+
+class UploadSizeLimitMiddleware:
+    """Answer 413 for upload requests whose body exceeds the configured size.
+
+    ``Content-Length`` is checked before anything is read; chunked bodies are
+    counted as they arrive, so an oversized upload is cut off without being
+    buffered. The limit is derived from ``settings.image_upload_max_bytes``
+    on each request.
+    """
+
+    def __init__(self, app: ASGIApp, *, paths: Collection[str]) -> None:
+        self.app = app
+        self.paths = frozenset(paths)
+
+    def _limited(self, scope: Scope) -> bool:
+        path = scope["path"]
+        root_path = scope.get("root_path", "")
+        return path in self.paths or path.removeprefix(root_path) in self.paths
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self._limited(scope):
+            await self.app(scope, receive, send)
+            return
+
+        settings = scope["app"].state.settings
+        max_bytes = upload_body_limit(settings.image_upload_max_bytes)
+        too_large = JSONResponse(
+            {"detail": _DETAIL},
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        )
+        for name, value in scope["headers"]:
+            if name == b"content-length" and value.isdigit():
+                if int(value) > max_bytes:
+                    await too_large(scope, receive, send)
+                    return
+
+        received = 0
+
+        async def limited_receive() -> Message:
+            # FastAPI re-raises HTTPExceptions from body reading unchanged.
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > max_bytes:
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail=_DETAIL,
+                    )
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+__all__ = ["UploadSizeLimitMiddleware", "upload_body_limit"]
@@ -1,5 +1,6 @@
 """Models package exports."""
 
+from .activity import UserActivityDay, UserStreakSummary
 from .base import Base, format_timestamp, utcnow
 from .class_exercise import ClassExercise, ExerciseStatus, ExerciseType
 from .classroom import Classroom, ClassType
@@ -8,11 +9,13 @@ from .discussion import (
     DiscussionReply,
     DiscussionSubscription,
     Notification,
+    NotificationCounter,
 )
 from .learning import LearningSession
 from .learning_tip import LearningTip
 from .student_own_exercise import StudentOwnExercise
 from .math import MathWordProblem
+from .math_analysis import MathAnalysisCacheEntry, MathProblemAssist
 from .progress import MathWordProblemProgress
 from .own_exercise_progress import OwnExerciseProgress
 from .session import UserSession
@@ -28,6 +31,8 @@ __all__ = [
     "LearningSession",
     "LearningTip",
     "StudentOwnExercise",
+    "MathAnalysisCacheEntry",
+    "MathProblemAssist",
     "MathWordProblem",
     "MathWordProblemProgress",
     "Classroom",
@@ -36,11 +41,14 @@ __all__ = [
     "DiscussionReply",
     "DiscussionSubscription",
     "Notification",
+    "NotificationCounter",
     "User",
     "UserAchievement",
+    "UserActivityDay",
     "UserRefreshToken",
     "UserSession",
     "UserStatistics",
+    "UserStreakSummary",
     "OwnExerciseProgress",
     "format_timestamp",
     "utcnow",
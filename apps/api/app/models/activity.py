@@ -0,0 +1,42 @@
+"""Materialized per-user activity days and streak summary."""
+
+from __future__ import annotations
+
+from datetime import date
+from typing import Optional
+
+from sqlalchemy import Date, ForeignKey, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class UserActivityDay(Base):
+    """A calendar day (UTC) on which a user started at least one learning session."""
+
+    __tablename__ = "user_activity_days"
+
+    user_id: Mapped[str] = mapped_column(
+        String(36),
+        ForeignKey("users.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    activity_date: Mapped[date] = mapped_column(Date, primary_key=True)
+
+
+class UserStreakSummary(Base):
+    """Cached streak counters, maintained whenever a new activity day is recorded."""
+
+    __tablename__ = "user_streak_summaries"
+
+    user_id: Mapped[str] = mapped_column(
+        String(36),
+        ForeignKey("users.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    current_streak: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    longest_streak: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    last_active_date: Mapped[Optional[date]] = mapped_column(Date, nullable=True)
+
+
+__all__ = ["UserActivityDay", "UserStreakSummary"]
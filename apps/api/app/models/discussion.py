@@ -5,7 +5,16 @@ from __future__ import annotations
 from datetime import datetime
 from typing import TYPE_CHECKING, ClassVar, Optional
 
-from sqlalchemy import Boolean, DateTime, ForeignKey, String, Text, UniqueConstraint
+from sqlalchemy import (
+    Boolean,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+    UniqueConstraint,
+)
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .base import Base, utcnow
@@ -18,6 +27,11 @@ class Discussion(Base):
     """Community discussion thread."""
 
     __tablename__ = "discussions"
+    __table_args__ = (
+        Index("ix_discussions_updated_at_id", "updated_at", "id"),
+        Index("ix_discussions_category_updated_at_id", "category", "updated_at", "id"),
+        Index("ix_discussions_author_updated_at", "author_id", "updated_at"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     topic: Mapped[str] = mapped_column(String(200), nullable=False)
@@ -55,7 +69,7 @@ class DiscussionReply(Base):
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     discussion_id: Mapped[int] = mapped_column(
-        ForeignKey("discussions.id", ondelete="CASCADE"), nullable=False
+        ForeignKey("discussions.id", ondelete="CASCADE"), nullable=False, index=True
     )
     author_id: Mapped[str] = mapped_column(
         ForeignKey("users.id", ondelete="CASCADE"), nullable=False
@@ -103,6 +117,10 @@ class Notification(Base):
     """User notifications for discussion activity."""
 
     __tablename__ = "notifications"
+    __table_args__ = (
+        Index("ix_notifications_user_created_at_id", "user_id", "created_at", "id"),
+        Index("ix_notifications_user_is_read", "user_id", "is_read"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     user_id: Mapped[str] = mapped_column(
@@ -122,3 +140,14 @@ class Notification(Base):
     )
 
     user: Mapped["User"] = relationship("User", back_populates="notifications")
+
+
+class NotificationCounter(Base):
+    """Denormalized count of a user's unread notifications."""
+
+    __tablename__ = "notification_counters"
+
+    user_id: Mapped[str] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    unread_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
@@ -0,0 +1,47 @@
+"""Persistent caches of OpenAI results for math word problems."""
+
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import JSON, DateTime, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base, utcnow
+
+
+class MathAnalysisCacheEntry(Base):
+    """Analysis payload keyed by a hash of its normalized inputs."""
+
+    __tablename__ = "math_analysis_cache"
+
+    key: Mapped[str] = mapped_column(String(64), primary_key=True)
+    language: Mapped[str] = mapped_column(String(5), nullable=False)
+    model: Mapped[str] = mapped_column(String(50), nullable=False)
+    prompt_version: Mapped[str] = mapped_column(String(20), nullable=False)
+    analysis: Mapped[dict[str, Any]] = mapped_column(JSON, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, default=utcnow, nullable=False
+    )
+
+
+class MathProblemAssist(Base):
+    """Precomputed drawing suggestions or multiplication context for a problem.
+
+    Keyed by a hash of the kind, model and normalized inputs, so requests for
+    a catalog problem's text find it without knowing the problem id.
+    """
+
+    __tablename__ = "math_problem_assists"
+
+    key: Mapped[str] = mapped_column(String(64), primary_key=True)
+    kind: Mapped[str] = mapped_column(String(30), nullable=False)
+    model: Mapped[str] = mapped_column(String(50), nullable=False)
+    payload: Mapped[dict[str, Any]] = mapped_column(JSON, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, default=utcnow, nullable=False
+    )
+
+
+__all__ = ["MathAnalysisCacheEntry", "MathProblemAssist"]
@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+from bisect import bisect_right
 from dataclasses import dataclass
 from enum import Enum
 
@@ -304,6 +305,46 @@ for achievement in ACHIEVEMENT_DEFINITIONS:
         ACHIEVEMENTS_BY_STAT[achievement.stat_field].append(achievement)
 
 
+@dataclass(frozen=True)
+class ThresholdIndex:
+    """Achievements for one stat field, sorted by threshold for bisect lookups."""
+
+    thresholds: tuple[int, ...]
+    achievements: tuple[AchievementDefinition, ...]
+
+    @classmethod
+    def build(cls, achievements: list[AchievementDefinition]) -> "ThresholdIndex":
+        """Return an index over the given achievements."""
+        ordered = sorted(achievements, key=lambda achievement: achievement.threshold)
+        return cls(
+            thresholds=tuple(achievement.threshold for achievement in ordered),
+            achievements=tuple(ordered),
+        )
+
+    def crossed(
+        self, old_value: int, new_value: int
+    ) -> tuple[AchievementDefinition, ...]:
+        """Return achievements whose threshold lies in ``(old_value, new_value]``."""
+        if new_value <= old_value:
+            return ()
+        start = bisect_right(self.thresholds, old_value)
+        end = bisect_right(self.thresholds, new_value)
+        return self.achievements[start:end]
+
+    def next_unlock(self, value: int) -> AchievementDefinition | None:
+        """Return the first achievement not yet reached at ``value``."""
+        position = bisect_right(self.thresholds, value)
+        if position == len(self.achievements):
+            return None
+        return self.achievements[position]
+
+
+ACHIEVEMENT_THRESHOLDS: dict[str, ThresholdIndex] = {
+    stat_field: ThresholdIndex.build(achievements)
+    for stat_field, achievements in ACHIEVEMENTS_BY_STAT.items()
+}
+
+
 __all__ = [
     "AchievementCategory",
     "AchievementRarity",
@@ -311,4 +352,6 @@ __all__ = [
     "ACHIEVEMENT_DEFINITIONS",
     "ACHIEVEMENTS_BY_ID",
     "ACHIEVEMENTS_BY_STAT",
+    "ACHIEVEMENT_THRESHOLDS",
+    "ThresholdIndex",
 ]
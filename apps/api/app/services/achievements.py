@@ -4,15 +4,16 @@ from __future__ import annotations
 
 import uuid
 from datetime import datetime, timezone
-from typing import Literal
+from typing import Any, Literal, Mapping
 
-from sqlalchemy import select
+from sqlalchemy import or_, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models import UserAchievement, UserStatistics
 from app.services.achievement_definitions import (
-    ACHIEVEMENTS_BY_STAT,
     ACHIEVEMENT_DEFINITIONS,
+    ACHIEVEMENT_THRESHOLDS,
     AchievementDefinition,
 )
 
@@ -48,25 +49,49 @@ async def get_or_create_statistics(
     return stats
 
 
-async def increment_solved_count(
-    session: AsyncSession, user_id: str, source: ExerciseSource
+_SOLVED_COLUMNS: dict[ExerciseSource, str] = {
+    "home_practice": "home_practice_solved",
+    "class_exercises": "class_exercises_solved",
+    "own_exercises": "own_exercises_solved",
+}
+
+
+async def add_solved_counts(
+    session: AsyncSession, user_id: str, deltas: Mapping[ExerciseSource, int]
 ) -> UserStatistics:
-    """Increment the solved count for a specific source category."""
-    stats = await get_or_create_statistics(session, user_id)
+    """Add per-source solved deltas (and their sum to the total) in one upsert.
 
-    # Increment the appropriate counter
-    if source == "home_practice":
-        stats.home_practice_solved += 1
-    elif source == "class_exercises":
-        stats.class_exercises_solved += 1
-    elif source == "own_exercises":
-        stats.own_exercises_solved += 1
+    Counters are incremented in SQL so concurrent solves for the same user
+    never overwrite each other.
+    """
+    counts = {
+        column: deltas.get(source, 0) for source, column in _SOLVED_COLUMNS.items()
+    }
+    total = sum(counts.values())
+    insert_stmt = sqlite_insert(UserStatistics).values(
+        id=str(uuid.uuid4()), user_id=user_id, total_solved=total, **counts
+    )
+    set_: dict[str, Any] = {
+        column: getattr(UserStatistics, column) + delta
+        for column, delta in counts.items()
+        if delta
+    }
+    set_["total_solved"] = UserStatistics.total_solved + total
+    stmt = (
+        insert_stmt.on_conflict_do_update(
+            index_elements=[UserStatistics.user_id], set_=set_
+        )
+        .returning(UserStatistics)
+        .execution_options(populate_existing=True)
+    )
+    return (await session.scalars(stmt)).one()
 
-    # Always increment total
-    stats.total_solved += 1
 
-    await session.flush()
-    return stats
+async def increment_solved_count(
+    session: AsyncSession, user_id: str, source: ExerciseSource
+) -> UserStatistics:
+    """Increment the solved count for a specific source category."""
+    return await add_solved_counts(session, user_id, {source: 1})
 
 
 async def get_unlocked_achievement_ids(session: AsyncSession, user_id: str) -> set[str]:
@@ -78,48 +103,137 @@ async def get_unlocked_achievement_ids(session: AsyncSession, user_id: str) -> s
     return set(result.scalars().all())
 
 
-async def unlock_achievement(
-    session: AsyncSession, user_id: str, achievement_id: str
-) -> UserAchievement:
-    """Create an achievement unlock record."""
-    unlock = UserAchievement(
-        id=str(uuid.uuid4()),
-        user_id=user_id,
-        achievement_id=achievement_id,
-        unlocked_at=_now(),
-    )
-    session.add(unlock)
-    await session.flush()
-    return unlock
+def _crossed_achievements(
+    stats: UserStatistics, solved: Mapping[ExerciseSource, int] | None
+) -> list[AchievementDefinition]:
+    """Return achievements whose thresholds the latest solves reached.
+
+    With ``solved`` (the per-source deltas just applied to ``stats``) only the
+    interval ``(old_value, new_value]`` of each affected stat is inspected.
+    Without it, every threshold up to the current values is returned.
+    """
+    old_values: dict[str, int]
+    if solved is None:
+        old_values = {stat_field: 0 for stat_field in ACHIEVEMENT_THRESHOLDS}
+    else:
+        deltas = {
+            _SOLVED_COLUMNS[source]: count for source, count in solved.items() if count
+        }
+        if deltas:
+            deltas["total_solved"] = sum(deltas.values())
+        old_values = {
+            stat_field: getattr(stats, stat_field, 0) - delta
+            for stat_field, delta in deltas.items()
+        }
+
+    crossed: list[AchievementDefinition] = []
+    for stat_field, old_value in old_values.items():
+        index = ACHIEVEMENT_THRESHOLDS.get(stat_field)
+        if index is not None:
+            crossed.extend(index.crossed(old_value, getattr(stats, stat_field, 0)))
+    return crossed
 
 
 async def check_and_unlock_achievements(
-    session: AsyncSession, user_id: str, stats: UserStatistics
+    session: AsyncSession,
+    user_id: str,
+    stats: UserStatistics,
+    *,
+    solved: Mapping[ExerciseSource, int] | None = None,
 ) -> list[AchievementDefinition]:
     """
-    Check all achievements against current statistics and unlock any newly earned ones.
+    Unlock achievements earned by the latest solves and return the new ones.
 
-    Returns list of newly unlocked achievements.
+    Pass ``solved`` (the deltas just added to ``stats``) to check only the
+    thresholds crossed by them; most solves cross none and cost no query.
+    Unlocks are written in one INSERT that ignores already-unlocked rows.
     """
-    unlocked_ids = await get_unlocked_achievement_ids(session, user_id)
-    newly_unlocked: list[AchievementDefinition] = []
+    candidates = _crossed_achievements(stats, solved)
+    if not candidates:
+        return []
 
-    # Check each stat field that has associated achievements
-    for stat_field, achievements in ACHIEVEMENTS_BY_STAT.items():
-        current_value = getattr(stats, stat_field, 0)
+    inserted = await _insert_unlocks(
+        session, [(user_id, achievement.id) for achievement in candidates]
+    )
+    return [
+        achievement
+        for achievement in candidates
+        if (user_id, achievement.id) in inserted
+    ]
 
-        for achievement in achievements:
-            # Skip if already unlocked
-            if achievement.id in unlocked_ids:
-                continue
 
-            # Check if threshold is met
-            if current_value >= achievement.threshold:
-                await unlock_achievement(session, user_id, achievement.id)
-                newly_unlocked.append(achievement)
-                unlocked_ids.add(achievement.id)  # Prevent duplicate unlocks
+async def _insert_unlocks(
+    session: AsyncSession, unlocks: list[tuple[str, str]]
+) -> set[tuple[str, str]]:
+    """Insert ``(user_id, achievement_id)`` unlocks, skipping existing ones.
 
-    return newly_unlocked
+    Returns the pairs that were actually inserted.
+    """
+    unlocked_at = _now()
+    stmt = (
+        sqlite_insert(UserAchievement)
+        .values(
+            [
+                {
+                    "id": str(uuid.uuid4()),
+                    "user_id": user_id,
+                    "achievement_id": achievement_id,
+                    "unlocked_at": unlocked_at,
+                }
+                for user_id, achievement_id in unlocks
+            ]
+        )
+        .on_conflict_do_nothing(
+            index_elements=[UserAchievement.user_id, UserAchievement.achievement_id]
+        )
+        .returning(UserAchievement.user_id, UserAchievement.achievement_id)
+    )
+    return {
+        (user_id, achievement_id)
+        for user_id, achievement_id in await session.execute(stmt)
+    }
+
+
+async def reconcile_achievements(
+    session: AsyncSession, *, batch_size: int = 500
+) -> int:
+    """Unlock every achievement whose threshold a user has already reached.
+
+    Solves only check the thresholds they cross, so this repairs users whose
+    statistics passed a threshold before that change or whose unlock insert
+    failed. Returns the number of unlocks written. Does not commit.
+    """
+    lowest = min(
+        (
+            achievement.threshold
+            for achievement in ACHIEVEMENT_DEFINITIONS
+            if achievement.stat_field
+        ),
+        default=None,
+    )
+    if lowest is None:
+        return 0
+    stats_rows = await session.scalars(
+        select(UserStatistics).where(
+            or_(
+                *(
+                    getattr(UserStatistics, stat_field) >= lowest
+                    for stat_field in ACHIEVEMENT_THRESHOLDS
+                )
+            )
+        )
+    )
+    earned = [
+        (stats.user_id, achievement.id)
+        for stats in stats_rows
+        for achievement in _crossed_achievements(stats, None)
+    ]
+    written = 0
+    for start in range(0, len(earned), batch_size):
+        written += len(
+            await _insert_unlocks(session, earned[start : start + batch_size])
+        )
+    return written
 
 
 async def get_user_achievements_with_progress(
@@ -188,9 +302,11 @@ async def get_user_statistics_summary(session: AsyncSession, user_id: str) -> di
 
 __all__ = [
     "ExerciseSource",
+    "add_solved_counts",
     "get_or_create_statistics",
     "increment_solved_count",
     "check_and_unlock_achievements",
+    "reconcile_achievements",
     "get_user_achievements_with_progress",
     "get_user_statistics_summary",
 ]
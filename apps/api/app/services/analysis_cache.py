@@ -0,0 +1,207 @@
+"""Content-addressed cache for OpenAI math problem analyses."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import unicodedata
+from collections import OrderedDict
+from typing import Awaitable, Callable, Mapping, Sequence
+
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.api.schemas.math_analysis import Language, MathProblemAnalysis
+from app.models import MathAnalysisCacheEntry
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ENTRIES = 1024
+
+AnalyzeFn = Callable[[list[str], Language], Awaitable[list[MathProblemAnalysis]]]
+
+
+def normalize_problem_text(problem_text: str) -> str:
+    """Normalize Unicode forms and whitespace so pasted copies hash alike."""
+    return " ".join(unicodedata.normalize("NFKC", problem_text).split())
+
+
+def analysis_cache_key(
+    problem_text: str, language: Language, *, model: str, prompt_version: str
+) -> str:
+    """Return the cache key for one analysis request."""
+    raw = json.dumps(
+        [prompt_version, model, language, normalize_problem_text(problem_text)],
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class AnalysisCache:
+    """In-memory LRU in front of the ``math_analysis_cache`` table.
+
+    Counts a hit for every requested key served from memory or SQLite and a
+    miss for every key that had to be sent to the API.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES) -> None:
+        self.max_entries = max_entries
+        self.hits = 0
+        self.memory_hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, MathProblemAnalysis] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict[str, int]:
+        """Return hit/miss counters and the current in-memory size."""
+        return {
+            "hits": self.hits,
+            "memoryHits": self.memory_hits,
+            "misses": self.misses,
+            "memoryEntries": len(self._entries),
+        }
+
+    def _remember(self, key: str, analysis: MathProblemAnalysis) -> None:
+        self._entries[key] = analysis
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def lookup(
+        self, session: AsyncSession, keys: Sequence[str]
+    ) -> dict[str, MathProblemAnalysis]:
+        """Return cached analyses for ``keys``, checking memory before SQLite."""
+        found: dict[str, MathProblemAnalysis] = {}
+        unique = list(dict.fromkeys(keys))
+        for key in unique:
+            analysis = self._entries.get(key)
+            if analysis is not None:
+                self._entries.move_to_end(key)
+                found[key] = analysis
+        self.memory_hits += len(found)
+
+        remaining = [key for key in unique if key not in found]
+        if remaining:
+            result = await session.execute(
+                select(
+                    MathAnalysisCacheEntry.key, MathAnalysisCacheEntry.analysis
+                ).where(MathAnalysisCacheEntry.key.in_(remaining))
+            )
+            for key, payload in result.all():
+                analysis = MathProblemAnalysis.model_validate(payload)
+                self._remember(key, analysis)
+                found[key] = analysis
+
+        self.hits += len(found)
+        self.misses += len(unique) - len(found)
+        return found
+
+    async def store(
+        self,
+        session: AsyncSession,
+        analyses: Mapping[str, MathProblemAnalysis],
+        *,
+        language: Language,
+        model: str,
+        prompt_version: str,
+    ) -> None:
+        """Persist fresh analyses and keep them in memory. Does not commit."""
+        if not analyses:
+            return
+        await session.execute(
+            sqlite_insert(MathAnalysisCacheEntry)
+            .values(
+                [
+                    {
+                        "key": key,
+                        "language": language,
+                        "model": model,
+                        "prompt_version": prompt_version,
+                        "analysis": analysis.model_dump(mode="json", by_alias=True),
+                    }
+                    for key, analysis in analyses.items()
+                ]
+            )
+            .on_conflict_do_nothing(index_elements=[MathAnalysisCacheEntry.key])
+        )
+        for key, analysis in analyses.items():
+            self._remember(key, analysis)
+
+
+_analysis_cache = AnalysisCache()
+
+
+def get_analysis_cache() -> AnalysisCache:
+    """Return the process-wide analysis cache."""
+    return _analysis_cache
+
+
+def reset_analysis_cache(max_entries: int = DEFAULT_MAX_ENTRIES) -> None:
+    """Replace the process-wide cache (useful for startup and tests)."""
+    global _analysis_cache
+    _analysis_cache = AnalysisCache(max_entries)
+
+
+async def analyze_with_cache(
+    session_factory: async_sessionmaker[AsyncSession],
+    problem_texts: list[str],
+    language: Language,
+    analyze: AnalyzeFn,
+    *,
+    model: str,
+    prompt_version: str,
+) -> list[MathProblemAnalysis]:
+    """Return analyses in input order, calling ``analyze`` only for misses.
+
+    Duplicate texts within one request are analyzed once. No database
+    connection is held while the API call is in flight.
+    """
+    cache = get_analysis_cache()
+    keys = [
+        analysis_cache_key(text, language, model=model, prompt_version=prompt_version)
+        for text in problem_texts
+    ]
+    async with session_factory() as db:
+        found = await cache.lookup(db, keys)
+
+    missing: dict[str, str] = {}
+    for key, text in zip(keys, problem_texts):
+        if key not in found:
+            missing.setdefault(key, text)
+    if missing:
+        fresh = await analyze(list(missing.values()), language)
+        if len(fresh) != len(missing):
+            raise ValueError(
+                f"Expected {len(missing)} analyses from OpenAI, got {len(fresh)}."
+            )
+        computed = dict(zip(missing, fresh))
+        try:
+            async with session_factory() as db:
+                await cache.store(
+                    db,
+                    computed,
+                    language=language,
+                    model=model,
+                    prompt_version=prompt_version,
+                )
+                await db.commit()
+        except Exception:  # noqa: BLE001
+            logger.exception("Failed to persist %d math analyses", len(computed))
+        found.update(computed)
+
+    return [found[key] for key in keys]
+
+
+__all__ = [
+    "AnalysisCache",
+    "analysis_cache_key",
+    "analyze_with_cache",
+    "get_analysis_cache",
+    "normalize_problem_text",
+    "reset_analysis_cache",
+]
@@ -10,6 +10,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from app.models import Classroom, ClassType, User
+from app.services.sessions import invalidate_cached_sessions
 
 SUPPORTED_GRADES: tuple[int, ...] = (3, 4)
 
@@ -163,6 +164,7 @@ async def add_student_to_class(
     """Assign a student to a class and return the updated user."""
     student.class_id = classroom.id
     await session.flush()
+    invalidate_cached_sessions(student.id, session)
     await session.refresh(student)
     return student
 
@@ -0,0 +1,217 @@
+"""Compaction of long coaching conversations before they are sent to OpenAI."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import math
+import re
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Sequence
+
+from app.api.schemas.math_analysis import Language
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ENTRIES = 512
+
+# Words and punctuation; a BPE tokenizer splits long words into ~4-char pieces.
+_TOKEN_PIECE = re.compile(r"\w+|[^\w\s]")
+# Role label and separators around each rendered turn.
+_TURN_OVERHEAD_TOKENS = 4
+
+Turn = dict[str, str]
+SummarizeFn = Callable[[str | None, list[Turn], Language], Awaitable[str]]
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of model tokens in ``text`` without a tokenizer."""
+    return sum(
+        max(1, math.ceil(len(piece) / 4)) for piece in _TOKEN_PIECE.findall(text)
+    )
+
+
+def _turn_tokens(turn: Turn) -> int:
+    return estimate_tokens(turn.get("content") or "") + _TURN_OVERHEAD_TOKENS
+
+
+def _truncate_to_tokens(text: str, max_tokens: int) -> str:
+    pieces = list(_TOKEN_PIECE.finditer(text))
+    used = 0
+    for piece in pieces:
+        used += max(1, math.ceil(len(piece.group()) / 4))
+        if used > max_tokens:
+            return text[: piece.start()].rstrip() + " ..."
+    return text
+
+
+@dataclass(frozen=True)
+class CompactedHistory:
+    """What remains of a conversation after compaction.
+
+    ``summarized`` turns are represented by ``summary``; ``dropped`` turns
+    did not fit the token budget and are omitted entirely.
+    """
+
+    summary: str | None
+    turns: list[Turn]
+    summarized: int = 0
+    dropped: int = 0
+
+
+class SummaryCache:
+    """LRU of rolling summaries keyed by the conversation prefix they cover."""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES) -> None:
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, str] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> str | None:
+        """Return the summary for ``key`` and mark it as recently used."""
+        summary = self._entries.get(key)
+        if summary is not None:
+            self._entries.move_to_end(key)
+        return summary
+
+    def put(self, key: str, summary: str) -> None:
+        """Remember a summary, evicting the least recently used ones."""
+        self._entries[key] = summary
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+_summary_cache = SummaryCache()
+
+
+def get_summary_cache() -> SummaryCache:
+    """Return the process-wide coaching summary cache."""
+    return _summary_cache
+
+
+def reset_summary_cache(max_entries: int = DEFAULT_MAX_ENTRIES) -> None:
+    """Replace the process-wide cache (useful for startup and tests)."""
+    global _summary_cache
+    _summary_cache = SummaryCache(max_entries)
+
+
+def _prefix_keys(
+    problem_text: str, language: Language, history: Sequence[Turn]
+) -> list[str]:
+    """Return a chained hash per prefix; ``keys[n]`` covers ``history[:n]``."""
+    digest = hashlib.sha256(json.dumps([language, problem_text]).encode()).hexdigest()
+    keys = [digest]
+    for turn in history:
+        raw = json.dumps([digest, turn.get("role"), turn.get("content")])
+        digest = hashlib.sha256(raw.encode()).hexdigest()
+        keys.append(digest)
+    return keys
+
+
+async def _rolling_summary(
+    problem_text: str,
+    history: Sequence[Turn],
+    language: Language,
+    summarize: SummarizeFn,
+    *,
+    folded: int,
+    step: int,
+) -> tuple[str | None, int]:
+    """Return the summary of ``history[:folded]`` and how many turns it covers.
+
+    Summaries are cached at every ``step`` boundary, so each call extends the
+    newest cached summary with at most the turns folded since then. If the
+    summarizer fails, the newest summary that could be built is returned.
+    """
+    cache = get_summary_cache()
+    keys = _prefix_keys(problem_text, language, history[:folded])
+    boundaries = range(step, folded + 1, step)
+    covered, summary = 0, None
+    for boundary in reversed(boundaries):
+        cached = cache.get(keys[boundary])
+        if cached is not None:
+            covered, summary = boundary, cached
+            break
+
+    for boundary in boundaries:
+        if boundary <= covered:
+            continue
+        try:
+            summary = await summarize(
+                summary, list(history[covered:boundary]), language
+            )
+        except Exception:  # noqa: BLE001
+            logger.exception(
+                "Failed to summarize coaching turns %d-%d", covered, boundary
+            )
+            break
+        cache.put(keys[boundary], summary)
+        covered = boundary
+    return summary, covered
+
+
+async def compact_history(
+    problem_text: str,
+    history: Sequence[Turn],
+    language: Language,
+    summarize: SummarizeFn,
+    *,
+    keep_turns: int,
+    token_budget: int,
+) -> CompactedHistory:
+    """Keep recent turns verbatim and fold older ones into a rolling summary.
+
+    Turns are folded ``keep_turns`` at a time, so between ``keep_turns`` and
+    ``2 * keep_turns - 1`` turns stay verbatim and the summary is refreshed
+    once every ``keep_turns`` turns instead of on every request. The summary
+    and verbatim turns together stay within ``token_budget`` estimated
+    tokens; the oldest verbatim turns are dropped first.
+    """
+    folded = (max(len(history) - keep_turns, 0) // keep_turns) * keep_turns
+    summary, covered = None, 0
+    if folded:
+        summary, covered = await _rolling_summary(
+            problem_text,
+            history,
+            language,
+            summarize,
+            folded=folded,
+            step=keep_turns,
+        )
+
+    remaining = token_budget
+    if summary is not None:
+        summary = _truncate_to_tokens(summary, token_budget)
+        remaining -= estimate_tokens(summary)
+
+    kept: list[Turn] = []
+    for turn in reversed(history[folded:]):
+        cost = _turn_tokens(turn)
+        if cost > remaining:
+            break
+        kept.append(turn)
+        remaining -= cost
+    kept.reverse()
+
+    return CompactedHistory(
+        summary=summary,
+        turns=kept,
+        summarized=covered,
+        dropped=len(history) - covered - len(kept),
+    )
+
+
+__all__ = [
+    "CompactedHistory",
+    "SummarizeFn",
+    "SummaryCache",
+    "compact_history",
+    "estimate_tokens",
+    "get_summary_cache",
+    "reset_summary_cache",
+]
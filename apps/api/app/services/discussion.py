@@ -1,15 +1,37 @@
+from dataclasses import dataclass
 from typing import List, Optional
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import func, desc, select, update
-from sqlalchemy.orm import selectinload
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy import (
+    DateTime,
+    and_,
+    desc,
+    func,
+    insert,
+    literal,
+    select,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import joinedload, selectinload
 from app.models import (
+    Classroom,
     Discussion,
     DiscussionReply,
     DiscussionSubscription,
     Notification,
+    NotificationCounter,
     User,
+    utcnow,
 )
 from app.api.schemas.discussion import DiscussionCreate, DiscussionReplyCreate
+from app.api.schemas.discussion import Notification as NotificationSchema
+from app.services.notification_broker import (
+    NotificationBroker,
+    call_after_commit,
+    get_notification_broker,
+)
+from app.services.pagination import decode_cursor, encode_cursor
 
 
 # Discussion CRUD
@@ -36,55 +58,108 @@ async def create_discussion(
     return db_discussion
 
 
-async def get_discussions(
-    db: AsyncSession, category: Optional[str] = None, skip: int = 0, limit: int = 20
-) -> List[Discussion]:
-    """Get list of discussions, optionally filtered by category"""
-    query = select(Discussion).options(selectinload(Discussion.author))
+@dataclass
+class DiscussionFeedItem:
+    """A discussion thread with the per-viewer fields shown in the forum list."""
 
-    if category:
-        query = query.filter(Discussion.category == category)
+    discussion: Discussion
+    reply_count: int
+    is_subscribed: bool
 
-    query = query.order_by(desc(Discussion.updated_at)).offset(skip).limit(limit)
-    result = await db.execute(query)
-    return list(result.scalars().all())
 
+@dataclass
+class DiscussionFeedPage:
+    """One page of the discussion feed plus the cursor for the next page."""
+
+    items: List[DiscussionFeedItem]
+    next_cursor: Optional[str]
+
+
+@dataclass
+class NotificationPage:
+    """One page of notifications plus the cursor for the next page."""
+
+    items: List[Notification]
+    next_cursor: Optional[str]
 
-async def get_discussions_for_teacher(
+
+async def get_discussion_feed(
     db: AsyncSession,
-    teacher_id: str,
+    viewer_id: str,
+    *,
     category: Optional[str] = None,
-    skip: int = 0,
+    teacher_id: Optional[str] = None,
+    cursor: Optional[str] = None,
     limit: int = 20,
-) -> List[Discussion]:
-    """Get discussions from students in teacher's classes"""
-    from app.models import Classroom
-
-    # Get all class IDs where teacher is the teacher
-    class_query = select(Classroom.id).filter(Classroom.teacher_id == teacher_id)
-    class_result = await db.execute(class_query)
-    class_ids = [row[0] for row in class_result.all()]
-
-    # Get students in those classes
-    student_query = select(User.id).filter(
-        User.class_id.in_(class_ids), User.role == "student"
+) -> DiscussionFeedPage:
+    """Get a page of discussions with reply counts and the viewer's subscription.
+
+    Author, reply count (correlated subquery) and subscription flag (LEFT JOIN)
+    all come back in a single statement. With ``teacher_id`` only threads by
+    students in that teacher's classes are returned. Pages are keyed on
+    ``(updated_at, id)``, so deep pages cost the same as the first and threads
+    bumped by new replies do not shift the rest of the feed. Raises ValueError
+    for a malformed cursor.
+    """
+    reply_count = (
+        select(func.count(DiscussionReply.id))
+        .where(DiscussionReply.discussion_id == Discussion.id)
+        .correlate(Discussion)
+        .scalar_subquery()
     )
-    student_result = await db.execute(student_query)
-    student_ids = [row[0] for row in student_result.all()]
-
-    # Get discussions from those students
     query = (
-        select(Discussion)
-        .options(selectinload(Discussion.author))
-        .filter(Discussion.author_id.in_(student_ids))
+        select(
+            Discussion,
+            reply_count.label("reply_count"),
+            DiscussionSubscription.id.is_not(None).label("is_subscribed"),
+        )
+        .outerjoin(
+            DiscussionSubscription,
+            and_(
+                DiscussionSubscription.discussion_id == Discussion.id,
+                DiscussionSubscription.user_id == viewer_id,
+            ),
+        )
+        .options(joinedload(Discussion.author))
     )
 
+    if teacher_id is not None:
+        # Authors must be students in one of the teacher's classes; the planner
+        # walks classrooms -> users -> ix_discussions_author_updated_at.
+        query = (
+            query.join(User, User.id == Discussion.author_id)
+            .join(Classroom, Classroom.id == User.class_id)
+            .filter(Classroom.teacher_id == teacher_id, User.role == "student")
+        )
+
     if category:
         query = query.filter(Discussion.category == category)
 
-    query = query.order_by(desc(Discussion.updated_at)).offset(skip).limit(limit)
+    if cursor is not None:
+        updated_at, discussion_id = decode_cursor(cursor)
+        query = query.filter(
+            tuple_(Discussion.updated_at, Discussion.id)
+            < tuple_(updated_at, discussion_id)
+        )
+
+    query = query.order_by(desc(Discussion.updated_at), desc(Discussion.id)).limit(
+        limit + 1
+    )
     result = await db.execute(query)
-    return list(result.scalars().all())
+    rows = result.all()
+    items = [
+        DiscussionFeedItem(
+            discussion=row.Discussion,
+            reply_count=row.reply_count,
+            is_subscribed=bool(row.is_subscribed),
+        )
+        for row in rows[:limit]
+    ]
+    next_cursor = None
+    if len(rows) > limit:
+        last = items[-1].discussion
+        next_cursor = encode_cursor(last.updated_at, last.id)
+    return DiscussionFeedPage(items=items, next_cursor=next_cursor)
 
 
 async def get_discussion_by_id(
@@ -104,39 +179,43 @@ async def get_discussion_by_id(
     return result.scalars().first()
 
 
-async def get_reply_count(db: AsyncSession, discussion_id: int) -> int:
-    """Get the number of replies for a discussion"""
-    query = (
-        select(func.count())
-        .select_from(DiscussionReply)
-        .filter(DiscussionReply.discussion_id == discussion_id)
+async def discussion_exists(db: AsyncSession, discussion_id: int) -> bool:
+    """Check that a discussion exists without loading it"""
+    result = await db.execute(
+        select(Discussion.id).where(Discussion.id == discussion_id)
     )
-    result = await db.execute(query)
-    return result.scalar() or 0
+    return result.scalar_one_or_none() is not None
 
 
 # Reply CRUD
 async def create_reply(
-    db: AsyncSession, discussion_id: int, reply: DiscussionReplyCreate, author_id: str
+    db: AsyncSession,
+    discussion_id: int,
+    reply: DiscussionReplyCreate,
+    author_id: str,
+    *,
+    notify: bool = True,
 ) -> DiscussionReply:
-    """Create a reply and notify subscribers"""
+    """Create a reply and notify subscribers (unless the caller defers it)"""
     db_reply = DiscussionReply(
         discussion_id=discussion_id, author_id=author_id, content=reply.content
     )
     db.add(db_reply)
     await db.flush()
 
-    # Update discussion's updated_at timestamp
+    # Update discussion's updated_at timestamp (same storage format as the
+    # ORM default, so feed cursors compare consistently)
     await db.execute(
         update(Discussion)
         .where(Discussion.id == discussion_id)
-        .values(updated_at=func.now())
+        .values(updated_at=utcnow())
     )
 
     # Notify all subscribers (except the author of the reply)
-    await create_reply_notifications(
-        db, discussion_id=discussion_id, reply_id=db_reply.id, author_id=author_id
-    )
+    if notify:
+        await create_reply_notifications(
+            db, discussion_id=discussion_id, reply_id=db_reply.id, author_id=author_id
+        )
 
     await db.commit()
     await db.refresh(db_reply)
@@ -198,68 +277,193 @@ async def is_subscribed(db: AsyncSession, user_id: str, discussion_id: int) -> b
 # Notification CRUD
 async def create_reply_notifications(
     db: AsyncSession, discussion_id: int, reply_id: int, author_id: str
-):
-    """Create notifications for all subscribers when a new reply is posted"""
-
-    # Get all subscribers except the reply author
-    query = select(DiscussionSubscription).filter(
-        DiscussionSubscription.discussion_id == discussion_id,
-        DiscussionSubscription.user_id != author_id,
+) -> List[str]:
+    """Notify all subscribers (except the reply author) of a new reply.
+
+    Reads only the topic and the author's name, then fans out with a single
+    ``INSERT ... SELECT`` over the discussion's subscriptions. Returns the IDs
+    of the notified users. Does not commit.
+    """
+    author = select(User.first_name, User.last_name).where(User.id == author_id)
+    header = await db.execute(
+        select(
+            select(Discussion.topic)
+            .where(Discussion.id == discussion_id)
+            .scalar_subquery()
+            .label("topic"),
+            author.with_only_columns(User.first_name)
+            .scalar_subquery()
+            .label("first_name"),
+            author.with_only_columns(User.last_name)
+            .scalar_subquery()
+            .label("last_name"),
+        )
     )
-    result = await db.execute(query)
-    subscriptions = result.scalars().all()
+    row = header.one()
+    if row.topic is None:
+        return []
+
+    author_name = f"{row.first_name} {row.last_name}" if row.first_name else "Someone"
+    subscribers = (
+        select(
+            DiscussionSubscription.user_id,
+            literal("new_reply"),
+            literal(discussion_id),
+            literal(reply_id),
+            literal(f"{author_name} replied to '{row.topic}'"),
+            literal(False),
+            literal(utcnow(), type_=DateTime),
+        )
+        .where(
+            DiscussionSubscription.discussion_id == discussion_id,
+            DiscussionSubscription.user_id != author_id,
+        )
+        .order_by(DiscussionSubscription.id)
+    )
+    result = await db.execute(
+        insert(Notification)
+        .from_select(
+            [
+                "user_id",
+                "type",
+                "discussion_id",
+                "reply_id",
+                "message",
+                "is_read",
+                "created_at",
+            ],
+            subscribers,
+        )
+        .returning(Notification)
+    )
+    notifications = list(result.scalars().all())
+    recipients = [notification.user_id for notification in notifications]
+    await _count_new_unread(db, recipients)
+    _publish_new_notifications(db, notifications)
+    return recipients
 
-    # Get discussion and author info
-    discussion = await get_discussion_by_id(db, discussion_id)
 
-    author_query = select(User).filter(User.id == author_id)
-    author_result = await db.execute(author_query)
-    author = author_result.scalars().first()
+async def _count_new_unread(db: AsyncSession, user_ids: List[str]) -> None:
+    """Add one just-inserted unread notification to each user's counter.
 
-    if not discussion or not author:
+    Users without a counter row yet are seeded from a full count, which
+    already includes the new rows.
+    """
+    if not user_ids:
         return
-
-    author_name = (
-        f"{author.first_name} {author.last_name}" if author.first_name else "Someone"
+    seed = (
+        select(Notification.user_id, func.count())
+        .where(Notification.user_id.in_(user_ids), ~Notification.is_read)
+        .group_by(Notification.user_id)
     )
-
-    # Create notification for each subscriber
-    for subscription in subscriptions:
-        notification = Notification(
-            user_id=subscription.user_id,
-            type="new_reply",
-            discussion_id=discussion_id,
-            reply_id=reply_id,
-            message=f"{author_name} replied to '{discussion.topic}'",
+    stmt = sqlite_insert(NotificationCounter).from_select(
+        ["user_id", "unread_count"], seed
+    )
+    await db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[NotificationCounter.user_id],
+            set_={"unread_count": NotificationCounter.unread_count + 1},
         )
-        db.add(notification)
+    )
 
-    # No commit here, let the caller commit (create_reply commits)
+
+def _publish_new_notifications(
+    db: AsyncSession, notifications: List[Notification]
+) -> None:
+    """Push new notifications to open streams once they are committed."""
+    payloads = [
+        (
+            notification.user_id,
+            NotificationSchema.model_validate(notification).model_dump(mode="json"),
+        )
+        for notification in notifications
+    ]
+
+    def _publish(broker: NotificationBroker) -> None:
+        for user_id, payload in payloads:
+            broker.notify(user_id, payload)
+
+    if payloads:
+        call_after_commit(db, _publish)
+
+
+async def fan_out_reply_notifications(
+    session_factory: async_sessionmaker[AsyncSession],
+    discussion_id: int,
+    reply_id: int,
+    author_id: str,
+) -> List[str]:
+    """Create reply notifications in their own transaction (for background tasks)."""
+    async with session_factory() as db:
+        recipients = await create_reply_notifications(
+            db, discussion_id=discussion_id, reply_id=reply_id, author_id=author_id
+        )
+        await db.commit()
+    return recipients
 
 
 async def get_user_notifications(
-    db: AsyncSession, user_id: str, unread_only: bool = False
-) -> List[Notification]:
-    """Get notifications for a user"""
+    db: AsyncSession,
+    user_id: str,
+    unread_only: bool = False,
+    *,
+    cursor: Optional[str] = None,
+    limit: int = 50,
+) -> NotificationPage:
+    """Get a page of notifications for a user, newest first.
+
+    Pages are keyed on ``(created_at, id)``. Raises ValueError for a malformed
+    cursor.
+    """
     query = select(Notification).filter(Notification.user_id == user_id)
 
     if unread_only:
         query = query.filter(~Notification.is_read)
 
-    query = query.order_by(desc(Notification.created_at))
+    if cursor is not None:
+        created_at, notification_id = decode_cursor(cursor)
+        query = query.filter(
+            tuple_(Notification.created_at, Notification.id)
+            < tuple_(created_at, notification_id)
+        )
+
+    query = query.order_by(desc(Notification.created_at), desc(Notification.id)).limit(
+        limit + 1
+    )
     result = await db.execute(query)
-    return list(result.scalars().all())
+    rows = list(result.scalars().all())
+    items = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit:
+        next_cursor = encode_cursor(items[-1].created_at, items[-1].id)
+    return NotificationPage(items=items, next_cursor=next_cursor)
 
 
 async def get_unread_count(db: AsyncSession, user_id: str) -> int:
-    """Get count of unread notifications"""
-    query = (
-        select(func.count())
-        .select_from(Notification)
-        .filter(Notification.user_id == user_id, ~Notification.is_read)
+    """Get count of unread notifications, served from the broker when cached"""
+    broker = get_notification_broker()
+    cached = broker.unread_count(user_id)
+    if cached is not None:
+        return cached
+
+    generation = broker.generation
+    result = await db.execute(
+        select(NotificationCounter.unread_count).where(
+            NotificationCounter.user_id == user_id
+        )
     )
-    result = await db.execute(query)
-    return result.scalar() or 0
+    count = result.scalar()
+    if count is None:
+        # Not reconciled yet; count the rows instead.
+        query = (
+            select(func.count())
+            .select_from(Notification)
+            .filter(Notification.user_id == user_id, ~Notification.is_read)
+        )
+        result = await db.execute(query)
+        count = result.scalar() or 0
+    broker.store_unread_count(user_id, count, generation=generation)
+    return count
 
 
 async def mark_notification_read(
@@ -273,6 +477,18 @@ async def mark_notification_read(
     notification = result.scalars().first()
 
     if notification:
+        if not notification.is_read:
+            await db.execute(
+                update(NotificationCounter)
+                .where(NotificationCounter.user_id == user_id)
+                .values(unread_count=func.max(NotificationCounter.unread_count - 1, 0))
+            )
+            call_after_commit(
+                db,
+                lambda broker: broker.notify_unread_count(
+                    user_id, broker.adjust_unread_count(user_id, -1)
+                ),
+            )
         notification.is_read = True
         await db.commit()
         await db.refresh(notification)
@@ -288,9 +504,66 @@ async def mark_all_notifications_read(db: AsyncSession, user_id: str):
         .values(is_read=True)
     )
     await db.execute(stmt)
+    await db.execute(
+        sqlite_insert(NotificationCounter)
+        .values(user_id=user_id, unread_count=0)
+        .on_conflict_do_update(
+            index_elements=[NotificationCounter.user_id], set_={"unread_count": 0}
+        )
+    )
+
+    def _clear(broker: NotificationBroker) -> None:
+        broker.set_unread_count(user_id, 0)
+        broker.notify_unread_count(user_id, 0)
+
+    call_after_commit(db, _clear)
     await db.commit()
 
 
+async def reconcile_unread_counters(db: AsyncSession) -> int:
+    """Recompute every unread counter from ``notifications``.
+
+    Seeds missing counters and repairs drifted ones. Returns how many counters
+    were written. Does not commit.
+    """
+    actual = (
+        select(Notification.user_id, func.count())
+        .where(~Notification.is_read)
+        .group_by(Notification.user_id)
+    )
+    upsert = sqlite_insert(NotificationCounter).from_select(
+        ["user_id", "unread_count"], actual
+    )
+    upserted = await db.execute(
+        upsert.on_conflict_do_update(
+            index_elements=[NotificationCounter.user_id],
+            set_={"unread_count": upsert.excluded.unread_count},
+            where=NotificationCounter.unread_count != upsert.excluded.unread_count,
+        ).returning(NotificationCounter.user_id)
+    )
+    changed = list(upserted.scalars().all())
+
+    has_unread = select(Notification.user_id).where(~Notification.is_read)
+    zeroed = await db.execute(
+        update(NotificationCounter)
+        .where(
+            NotificationCounter.unread_count != 0,
+            NotificationCounter.user_id.not_in(has_unread),
+        )
+        .values(unread_count=0)
+        .returning(NotificationCounter.user_id)
+    )
+    changed.extend(zeroed.scalars().all())
+
+    def _forget(broker: NotificationBroker) -> None:
+        for user_id in changed:
+            broker.forget_unread_count(user_id)
+
+    if changed:
+        call_after_commit(db, _forget)
+    return len(changed)
+
+
 async def delete_discussion(db: AsyncSession, discussion_id: int):
     """Delete a discussion and all related data"""
     query = select(Discussion).filter(Discussion.id == discussion_id)
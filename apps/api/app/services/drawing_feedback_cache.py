@@ -0,0 +1,108 @@
+"""Near-duplicate cache for drawing feedback."""
+
+from __future__ import annotations
+
+import hashlib
+from collections import OrderedDict
+
+from app.api.schemas.math_analysis import Language
+from app.services.analysis_cache import normalize_problem_text
+from app.services.drawing_fingerprint import DrawingFingerprint
+
+DEFAULT_MAX_ENTRIES = 512
+DEFAULT_MAX_DISTANCE = 4
+
+EMPTY_CANVAS_FEEDBACK: dict[Language, str] = {
+    "en": "Your page is still empty! ✏️ Draw what happens in the problem, "
+    "then I can take a look.",
+    "de": "Dein Blatt ist noch leer! ✏️ Zeichne, was in der Aufgabe passiert, "
+    "dann schaue ich es mir an.",
+}
+
+
+def problem_key(problem_text: str, language: Language) -> str:
+    """Return the part of the cache key that identifies the problem."""
+    raw = f"{language}\n{normalize_problem_text(problem_text)}"
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class DrawingFeedbackCache:
+    """LRU of feedback keyed by problem and drawing fingerprint.
+
+    A lookup returns the feedback of the most recently used drawing for the
+    same problem whose fingerprint lies within ``max_distance`` bits.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        max_distance: int = DEFAULT_MAX_DISTANCE,
+    ) -> None:
+        self.max_entries = max_entries
+        self.max_distance = max_distance
+        self.hits = 0
+        self.misses = 0
+        self.empty = 0
+        self._entries: OrderedDict[tuple[str, DrawingFingerprint], str] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict[str, int]:
+        """Return hit/miss counters and the current size."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "emptyCanvases": self.empty,
+            "entries": len(self._entries),
+        }
+
+    def lookup(self, problem: str, fingerprint: DrawingFingerprint) -> str | None:
+        """Return cached feedback for a (nearly) identical drawing."""
+        for key in reversed(self._entries):
+            cached_problem, cached = key
+            if cached_problem != problem:
+                continue
+            distance = fingerprint.distance(cached)
+            if distance is not None and distance <= self.max_distance:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+        self.misses += 1
+        return None
+
+    def store(
+        self, problem: str, fingerprint: DrawingFingerprint, feedback: str
+    ) -> None:
+        """Remember feedback, evicting the least recently used entries."""
+        key = (problem, fingerprint)
+        self._entries[key] = feedback
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+_drawing_feedback_cache = DrawingFeedbackCache()
+
+
+def get_drawing_feedback_cache() -> DrawingFeedbackCache:
+    """Return the process-wide drawing feedback cache."""
+    return _drawing_feedback_cache
+
+
+def reset_drawing_feedback_cache(
+    max_entries: int = DEFAULT_MAX_ENTRIES,
+    max_distance: int = DEFAULT_MAX_DISTANCE,
+) -> None:
+    """Replace the process-wide cache (useful for startup and tests)."""
+    global _drawing_feedback_cache
+    _drawing_feedback_cache = DrawingFeedbackCache(max_entries, max_distance)
+
+
+__all__ = [
+    "EMPTY_CANVAS_FEEDBACK",
+    "DrawingFeedbackCache",
+    "get_drawing_feedback_cache",
+    "problem_key",
+    "reset_drawing_feedback_cache",
+]
@@ -0,0 +1,78 @@
+"""Perceptual fingerprints of scratch-pad drawings."""
+
+from __future__ import annotations
+
+import hashlib
+import io
+from dataclasses import dataclass
+
+from PIL import Image
+
+from app.services.image_preprocessing import PreparedImage
+
+GRID = 16
+# Cells whose mean ink (0-255) stays below this count as blank paper.
+BLANK_CELL_INK = 0.5
+
+
+@dataclass(frozen=True)
+class DrawingFingerprint:
+    """A 256-bit ink-occupancy hash, or an exact digest for undecodable images.
+
+    Perceptual hashes are compared by Hamming distance; exact digests only
+    match themselves.
+    """
+
+    value: int
+    exact: bool = False
+    empty: bool = False
+
+    def distance(self, other: DrawingFingerprint) -> int | None:
+        """Return the Hamming distance, or None if the two are not comparable."""
+        if self.exact or other.exact:
+            return 0 if self == other else None
+        return (self.value ^ other.value).bit_count()
+
+
+def _ink_grid(data: bytes, max_pixels: int) -> list[float] | None:
+    """Return mean ink per grid cell (row-major), or None if not decodable.
+
+    Ink is how much darker than white paper a pixel renders: transparent
+    pixels carry none, so strokes on a cleared canvas and on a white fill
+    look the same.
+    """
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            if image.width * image.height > max_pixels:
+                return None
+            rgba = image.convert("RGBA")
+    except (Image.DecompressionBombError, OSError, SyntaxError, ValueError):
+        return None
+    paper = Image.new("RGBA", rgba.size, "white")
+    paper.alpha_composite(rgba)
+    cells = paper.convert("L").resize((GRID, GRID), Image.Resampling.BOX)
+    return [255.0 - level for level in cells.tobytes()]
+
+
+def fingerprint_drawing(image: PreparedImage, *, max_pixels: int) -> DrawingFingerprint:
+    """Fingerprint a drawing for near-duplicate lookup and blank detection.
+
+    The drawing is reduced to a 16x16 grid of ink levels; a bit is set for
+    every cell inkier than the drawing's average. Images that cannot be
+    decoded, or exceed ``max_pixels``, get an exact digest.
+    """
+    grid = _ink_grid(image.data, max_pixels)
+    if grid is None:
+        digest = hashlib.sha256(image.data).digest()
+        return DrawingFingerprint(int.from_bytes(digest, "big"), exact=True)
+
+    if max(grid) < BLANK_CELL_INK:
+        return DrawingFingerprint(0, empty=True)
+    mean = sum(grid) / len(grid)
+    value = 0
+    for level in grid:
+        value = (value << 1) | (level > mean and level >= BLANK_CELL_INK)
+    return DrawingFingerprint(value)
+
+
+__all__ = ["DrawingFingerprint", "fingerprint_drawing"]
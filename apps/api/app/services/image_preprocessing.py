@@ -0,0 +1,158 @@
+"""Decoding, downscaling and re-encoding of uploaded images before OpenAI calls."""
+
+from __future__ import annotations
+
+import base64
+import binascii
+import io
+from dataclasses import dataclass
+from typing import Collection, Literal
+
+from PIL import Image, ImageOps
+
+IMAGE_MIME_TYPES = frozenset({"image/jpeg", "image/png", "image/webp", "image/gif"})
+DOCUMENT_MIME_TYPES = IMAGE_MIME_TYPES | {"application/pdf"}
+
+DEFAULT_MAX_PIXELS = 50_000_000
+JPEG_QUALITY = 85
+WEBP_QUALITY = 85
+
+VisionDetail = Literal["auto", "low", "high"]
+
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+class ImageTooLargeError(ValueError):
+    """The decoded upload exceeds the configured size limit."""
+
+
+@dataclass(frozen=True)
+class PreparedImage:
+    """A decoded upload, re-encoded for the model, with its MIME type."""
+
+    data: bytes
+    mime_type: str
+
+    def data_url(self) -> str:
+        """Return the image as a ``data:`` URL for the OpenAI API."""
+        encoded = base64.b64encode(self.data).decode("ascii")
+        return f"data:{self.mime_type};base64,{encoded}"
+
+
+def sniff_mime_type(data: bytes) -> str | None:
+    """Detect the file type from its leading bytes."""
+    if data.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if data.startswith(_PNG_SIGNATURE):
+        return "image/png"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    if data[:6] in (b"GIF87a", b"GIF89a"):
+        return "image/gif"
+    if data.startswith(b"%PDF-"):
+        return "application/pdf"
+    return None
+
+
+def vision_size(width: int, height: int, detail: VisionDetail) -> tuple[int, int]:
+    """Return the largest size the model actually looks at for ``detail``.
+
+    Low detail sees a 512px thumbnail. High (and auto) detail fits the image
+    into 2048x2048 and then scales its short side down to 768px; anything
+    larger is discarded upstream, so it is not worth uploading.
+    """
+    if detail == "low":
+        scale = min(1.0, 512 / max(width, height))
+    else:
+        scale = min(1.0, 2048 / max(width, height))
+        scale *= min(1.0, 768 / (min(width, height) * scale))
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def _has_alpha(image: Image.Image) -> bool:
+    return image.mode in ("RGBA", "LA", "PA") or (
+        image.mode == "P" and "transparency" in image.info
+    )
+
+
+def _reencode(data: bytes, detail: VisionDetail, max_pixels: int) -> PreparedImage:
+    """Apply EXIF orientation, downscale and re-encode without metadata.
+
+    Opaque images become JPEG; images with transparency (scratch-pad
+    drawings) become WebP so the page stays distinguishable from the ink.
+    """
+    try:
+        with Image.open(io.BytesIO(data)) as source:
+            if source.width * source.height > max_pixels:
+                raise ImageTooLargeError("Image has too many pixels.")
+            size = vision_size(source.width, source.height, detail)
+            # JPEGs can decode straight to a reduced scale.
+            source.draft("RGB", size)
+            image = ImageOps.exif_transpose(source)
+            size = vision_size(image.width, image.height, detail)
+            if image.size != size:
+                image = image.resize(size, Image.Resampling.LANCZOS)
+            out = io.BytesIO()
+            if _has_alpha(image):
+                image.convert("RGBA").save(out, "WEBP", quality=WEBP_QUALITY)
+                mime_type = "image/webp"
+            else:
+                image.convert("RGB").save(
+                    out, "JPEG", quality=JPEG_QUALITY, optimize=True
+                )
+                mime_type = "image/jpeg"
+    except Image.DecompressionBombError as exc:
+        raise ImageTooLargeError("Image has too many pixels.") from exc
+    except (OSError, SyntaxError) as exc:
+        raise ValueError("Image could not be decoded.") from exc
+    return PreparedImage(data=out.getvalue(), mime_type=mime_type)
+
+
+def prepare_image(
+    payload: str,
+    mime_type: str | None = None,
+    *,
+    max_bytes: int,
+    allowed_types: Collection[str] = IMAGE_MIME_TYPES,
+    detail: VisionDetail = "auto",
+    max_pixels: int = DEFAULT_MAX_PIXELS,
+) -> PreparedImage:
+    """Decode a base64 upload (optionally a ``data:`` URL) exactly once.
+
+    The size limit is checked against the encoded length before decoding and
+    the type is taken from the file's magic bytes rather than the client's
+    claim. Images are then downscaled to what the model uses at ``detail``
+    and re-encoded, which also drops EXIF and other metadata; PDFs are
+    passed through unchanged. Decoding is CPU-bound, so async callers should
+    run this in a worker thread.
+    """
+    if payload.startswith("data:"):
+        header, _, payload = payload.partition(",")
+        mime_type = header[5:].split(";", 1)[0] or mime_type
+    if len(payload) // 4 * 3 > max_bytes:
+        raise ImageTooLargeError("Image is too large.")
+    try:
+        data = base64.b64decode(payload, validate=True)
+    except (binascii.Error, ValueError) as exc:
+        raise ValueError("Image is not valid base64.") from exc
+    if len(data) > max_bytes:
+        raise ImageTooLargeError("Image is too large.")
+
+    sniffed = sniff_mime_type(data)
+    if sniffed is None or sniffed not in allowed_types:
+        raise ValueError(f"Unsupported file type: {sniffed or mime_type or 'unknown'}.")
+    if sniffed not in IMAGE_MIME_TYPES:
+        return PreparedImage(data=data, mime_type=sniffed)
+    return _reencode(data, detail, max_pixels)
+
+
+__all__ = [
+    "DOCUMENT_MIME_TYPES",
+    "IMAGE_MIME_TYPES",
+    "ImageTooLargeError",
+    "PreparedImage",
+    "VisionDetail",
+    "prepare_image",
+    "sniff_mime_type",
+    "vision_size",
+]
@@ -10,6 +10,7 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models import LearningSession, User
+from app.services import streak
 
 
 def _now() -> datetime:
@@ -44,6 +45,7 @@ async def start_learning_session(
     record = LearningSession(id=str(uuid4()), user_id=user.id, started_at=now)
     session.add(record)
     await session.flush()
+    await streak.record_activity(session, user.id, now)
     return record
 
 
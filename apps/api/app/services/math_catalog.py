@@ -0,0 +1,122 @@
+"""Versioned in-memory cache of serialized math problem listings."""
+
+from __future__ import annotations
+
+import hashlib
+from dataclasses import dataclass
+from typing import Literal
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, SessionTransaction
+
+CatalogKey = tuple[int | None, str | None, Literal["asc", "desc"] | None]
+
+_PENDING_KEY = "math_catalog_invalidation"
+
+
+@dataclass(frozen=True)
+class CatalogPage:
+    """Pre-serialized JSON body of one listing plus its strong ETag."""
+
+    body: bytes
+    etag: str
+
+    @classmethod
+    def from_body(cls, body: bytes) -> "CatalogPage":
+        """Build a page whose ETag is derived from the body bytes."""
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        return cls(body=body, etag=f'"{digest}"')
+
+    def matches(self, if_none_match: str | None) -> bool:
+        """Return True when an If-None-Match header names this page's ETag."""
+        if not if_none_match:
+            return False
+        for candidate in if_none_match.split(","):
+            tag = candidate.strip()
+            if tag == "*":
+                return True
+            # If-None-Match uses weak comparison, so W/"x" matches "x".
+            if tag.removeprefix("W/") == self.etag:
+                return True
+        return False
+
+
+class MathCatalog:
+    """Listing cache keyed by ``(grade, difficulty_level, order)``.
+
+    Every change to the problem set bumps ``version`` and drops all pages. A
+    page built from a query that started before the bump is discarded instead
+    of stored, so a slow reader can never repopulate stale data.
+    """
+
+    def __init__(self) -> None:
+        self.version = 0
+        self._pages: dict[CatalogKey, CatalogPage] = {}
+
+    def __len__(self) -> int:
+        return len(self._pages)
+
+    def get(self, key: CatalogKey) -> CatalogPage | None:
+        """Return the cached page for a listing, if any."""
+        return self._pages.get(key)
+
+    def put(self, key: CatalogKey, page: CatalogPage, *, version: int) -> None:
+        """Store a page built while the catalog was at ``version``."""
+        if version == self.version:
+            self._pages[key] = page
+
+    def invalidate(self) -> None:
+        """Forget every page and advance the version."""
+        self.version += 1
+        self._pages.clear()
+
+
+_math_catalog = MathCatalog()
+
+
+def get_math_catalog() -> MathCatalog:
+    """Return the process-wide math problem catalog."""
+    return _math_catalog
+
+
+def reset_math_catalog() -> None:
+    """Replace the process-wide catalog (useful for startup and tests)."""
+    global _math_catalog
+    _math_catalog = MathCatalog()
+
+
+def invalidate_math_catalog(session: AsyncSession) -> None:
+    """Invalidate the catalog now and again once ``session`` commits.
+
+    The second bump covers readers that queried between the change and the
+    commit and would otherwise cache the pre-change listing. It is dropped if
+    the transaction rolls back, and repeated calls in one transaction bump
+    the catalog only once at commit.
+    """
+    get_math_catalog().invalidate()
+    sync_session = session.sync_session
+    if _PENDING_KEY not in sync_session.info:
+        event.listen(sync_session, "after_commit", _invalidate_pending)
+        event.listen(sync_session, "after_transaction_end", _drop_pending)
+    sync_session.info[_PENDING_KEY] = True
+
+
+def _invalidate_pending(sync_session: Session) -> None:
+    if sync_session.info[_PENDING_KEY]:
+        get_math_catalog().invalidate()
+
+
+def _drop_pending(sync_session: Session, transaction: SessionTransaction) -> None:
+    if transaction.parent is None:
+        sync_session.info[_PENDING_KEY] = False
+
+
+__all__ = [
+    "CatalogKey",
+    "CatalogPage",
+    "MathCatalog",
+    "get_math_catalog",
+    "invalidate_math_catalog",
+    "reset_math_catalog",
+]
@@ -3,10 +3,11 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import cast, Literal, Optional
+from typing import cast, Literal, Optional, Sequence
 from uuid import uuid4
 
-from sqlalchemy import case, func, select
+from sqlalchemy import ScalarSelect, Table, case, func, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models import (
@@ -15,6 +16,7 @@ from app.models import (
     MathWordProblem,
     MathWordProblemProgress,
     User,
+    utcnow,
 )
 from app.services import achievements
 
@@ -52,6 +54,61 @@ class ProgressSummary:
     students: list[StudentProgressStats]
 
 
+XP_BY_DIFFICULTY: dict[str, int] = {"easy": 10, "medium": 20, "hard": 30}
+DEFAULT_XP_GAIN = 10
+
+
+def _xp_gain_for(problem_id: str) -> ScalarSelect[int]:
+    """Return a scalar subquery with the XP a problem is worth."""
+    return (
+        select(
+            case(
+                *(
+                    (MathWordProblem.difficulty_level == level, xp)
+                    for level, xp in XP_BY_DIFFICULTY.items()
+                ),
+                else_=DEFAULT_XP_GAIN,
+            )
+        )
+        .where(MathWordProblem.id == problem_id)
+        .scalar_subquery()
+    )
+
+
+async def _award_first_solve(
+    session: AsyncSession, *, student_id: str, problem_id: str
+) -> bool:
+    """Atomically grant XP for a first solve; return True if it was granted.
+
+    The UPDATE only matches while the stored progress is not yet successful,
+    so it must run before the progress upsert. Because it is a write, SQLite
+    holds the write lock from here until commit, which makes the check and the
+    upsert atomic against a second tab submitting the same problem.
+    """
+    already_solved = (
+        select(MathWordProblemProgress.id)
+        .where(
+            MathWordProblemProgress.student_id == student_id,
+            MathWordProblemProgress.math_word_problem_id == problem_id,
+            MathWordProblemProgress.success.is_(True),
+        )
+        .exists()
+    )
+    problem_exists = select(MathWordProblem.id).where(MathWordProblem.id == problem_id)
+    stmt = (
+        update(User)
+        .where(User.id == student_id, ~already_solved, problem_exists.exists())
+        .values(
+            xp=User.xp + _xp_gain_for(problem_id),
+            solved_tasks=User.solved_tasks + 1,
+        )
+        .returning(User.id)
+        .execution_options(synchronize_session="fetch")
+    )
+    result = await session.execute(stmt)
+    return result.first() is not None
+
+
 async def set_progress(
     session: AsyncSession,
     *,
@@ -60,71 +117,183 @@ async def set_progress(
     success: bool,
     source: ExerciseSource = "home_practice",
 ) -> MathWordProblemProgress:
-    """Create or update a student's progress record for a problem."""
-    stmt = select(MathWordProblemProgress).where(
-        MathWordProblemProgress.student_id == student_id,
-        MathWordProblemProgress.math_word_problem_id == problem_id,
+    """Create or update a student's progress record for a problem.
+
+    A first successful solve awards XP, bumps the per-source statistics and
+    checks achievements. Every counter is incremented in SQL, so concurrent
+    submissions cannot lose updates.
+    """
+    newly_solved = success and await _award_first_solve(
+        session, student_id=student_id, problem_id=problem_id
     )
-    result = await session.execute(stmt)
-    record = result.scalar_one_or_none()
-
-    # Check if it was already solved to avoid double counting XP
-    was_already_solved = record is not None and record.success
-
-    if record:
-        record.success = success
-        record.attempt_count += 1
-    else:
-        record = MathWordProblemProgress(
-            id=str(uuid4()),
-            math_word_problem_id=problem_id,
-            student_id=student_id,
-            success=success,
-            attempt_count=1,
-        )
-        session.add(record)
-
-    # If newly solved (success=True and wasn't already solved), award XP and update stats
-    if success and not was_already_solved:
-        # Fetch problem to get difficulty
-        problem_stmt = select(MathWordProblem).where(MathWordProblem.id == problem_id)
-        problem_result = await session.execute(problem_stmt)
-        problem = problem_result.scalar_one_or_none()
-
-        if problem:
-            # Fetch user to update stats
-            user_stmt = select(User).where(User.id == student_id)
-            user_result = await session.execute(user_stmt)
-            user = user_result.scalar_one_or_none()
-
-            if user:
-                user.solved_tasks += 1
-
-                # Calculate XP based on difficulty
-                xp_gain = 10
-                if problem.difficulty_level == "medium":
-                    xp_gain = 20
-                elif problem.difficulty_level == "hard":
-                    xp_gain = 30
-
-                user.xp += xp_gain
-                session.add(user)
-
-                # Update statistics by source category
-                stats = await achievements.increment_solved_count(
-                    session, student_id, source
-                )
-
-                # Check and unlock any new achievements
-                await achievements.check_and_unlock_achievements(
-                    session, student_id, stats
-                )
-
-    await session.flush()
-    await session.refresh(record)
+
+    now = utcnow()
+    insert_stmt = sqlite_insert(MathWordProblemProgress).values(
+        id=str(uuid4()),
+        math_word_problem_id=problem_id,
+        student_id=student_id,
+        success=success,
+        attempt_count=1,
+        created_at=now,
+        updated_at=now,
+    )
+    upsert_stmt = (
+        insert_stmt.on_conflict_do_update(
+            index_elements=[
+                MathWordProblemProgress.student_id,
+                MathWordProblemProgress.math_word_problem_id,
+            ],
+            set_={
+                "success": insert_stmt.excluded.success,
+                "attempt_count": MathWordProblemProgress.attempt_count + 1,
+                "updated_at": insert_stmt.excluded.updated_at,
+            },
+        )
+        .returning(MathWordProblemProgress)
+        .execution_options(populate_existing=True)
+    )
+    record = (await session.scalars(upsert_stmt)).one()
+
+    if newly_solved:
+        stats = await achievements.increment_solved_count(session, student_id, source)
+        await achievements.check_and_unlock_achievements(
+            session, student_id, stats, solved={source: 1}
+        )
+
     return record
 
 
+@dataclass(frozen=True)
+class ProgressEntry:
+    """One queued answer submitted through the batch endpoint."""
+
+    problem_id: str
+    success: bool
+    source: ExerciseSource = "home_practice"
+
+
+@dataclass
+class ProgressBatchResult:
+    """Outcome of a batch submission."""
+
+    records: list[MathWordProblemProgress]
+    missing_problem_ids: list[str]
+
+
+async def set_progress_batch(
+    session: AsyncSession,
+    *,
+    student_id: str,
+    entries: Sequence[ProgressEntry],
+) -> ProgressBatchResult:
+    """Apply queued answers in order as if each had been sent to set_progress.
+
+    Entries for unknown problems are skipped and reported instead of failing
+    the batch, so a replay queue cannot get stuck on a deleted problem. All
+    remaining writes are bulk statements: one attempt-count UPDATE (which also
+    returns the stored success flags), one multi-row progress upsert, and at
+    most one XP update, one statistics upsert and one achievement check.
+    """
+    requested_ids = list(dict.fromkeys(entry.problem_id for entry in entries))
+    if not requested_ids:
+        return ProgressBatchResult(records=[], missing_problem_ids=[])
+    difficulty_rows = await session.execute(
+        select(MathWordProblem.id, MathWordProblem.difficulty_level).where(
+            MathWordProblem.id.in_(requested_ids)
+        )
+    )
+    difficulties = {row.id: row.difficulty_level for row in difficulty_rows}
+    missing = [
+        problem_id for problem_id in requested_ids if problem_id not in difficulties
+    ]
+    known = [entry for entry in entries if entry.problem_id in difficulties]
+    if not known:
+        return ProgressBatchResult(records=[], missing_problem_ids=missing)
+
+    attempts: dict[str, int] = {}
+    for entry in known:
+        attempts[entry.problem_id] = attempts.get(entry.problem_id, 0) + 1
+
+    # Bump attempts on existing rows first: the RETURNING clause yields the
+    # success flags as they were before this batch, and the write takes the
+    # SQLite write lock so no other submission can interleave.
+    progress_table = cast(Table, MathWordProblemProgress.__table__)
+    previous = await session.execute(
+        update(progress_table)
+        .where(
+            progress_table.c.student_id == student_id,
+            progress_table.c.math_word_problem_id.in_(attempts),
+        )
+        .values(
+            attempt_count=progress_table.c.attempt_count
+            + case(attempts, value=progress_table.c.math_word_problem_id, else_=0)
+        )
+        .returning(progress_table.c.math_word_problem_id, progress_table.c.success)
+    )
+    state = {row.math_word_problem_id: bool(row.success) for row in previous}
+
+    xp_gain = 0
+    solved_by_source: dict[ExerciseSource, int] = {}
+    for entry in known:
+        if entry.success and not state.get(entry.problem_id, False):
+            difficulty = difficulties[entry.problem_id] or ""
+            xp_gain += XP_BY_DIFFICULTY.get(difficulty, DEFAULT_XP_GAIN)
+            solved_by_source[entry.source] = solved_by_source.get(entry.source, 0) + 1
+        state[entry.problem_id] = entry.success
+
+    now = utcnow()
+    insert_stmt = sqlite_insert(MathWordProblemProgress).values(
+        [
+            {
+                "id": str(uuid4()),
+                "math_word_problem_id": problem_id,
+                "student_id": student_id,
+                "success": state[problem_id],
+                "attempt_count": count,
+                "created_at": now,
+                "updated_at": now,
+            }
+            for problem_id, count in attempts.items()
+        ]
+    )
+    upsert_stmt = (
+        insert_stmt.on_conflict_do_update(
+            index_elements=[
+                MathWordProblemProgress.student_id,
+                MathWordProblemProgress.math_word_problem_id,
+            ],
+            set_={
+                "success": insert_stmt.excluded.success,
+                "updated_at": insert_stmt.excluded.updated_at,
+            },
+        )
+        .returning(MathWordProblemProgress)
+        .execution_options(populate_existing=True)
+    )
+    # Existing rows keep the attempt count bumped above; new rows start at
+    # the number of attempts in this batch.
+    records = list((await session.scalars(upsert_stmt)).all())
+
+    solved = sum(solved_by_source.values())
+    if solved:
+        await session.execute(
+            update(User)
+            .where(User.id == student_id)
+            .values(xp=User.xp + xp_gain, solved_tasks=User.solved_tasks + solved)
+            .execution_options(synchronize_session="fetch")
+        )
+        stats = await achievements.add_solved_counts(
+            session, student_id, solved_by_source
+        )
+        await achievements.check_and_unlock_achievements(
+            session, student_id, stats, solved=solved_by_source
+        )
+
+    order = {problem_id: index for index, problem_id in enumerate(attempts)}
+    records.sort(key=lambda record: order[record.math_word_problem_id])
+    return ProgressBatchResult(records=records, missing_problem_ids=missing)
+
+
 async def get_solved_problem_ids(
     session: AsyncSession,
     student_id: str,
@@ -228,8 +397,11 @@ async def summarize_progress(
 
 
 __all__ = [
+    "ProgressBatchResult",
+    "ProgressEntry",
     "ProgressSummary",
     "StudentProgressStats",
     "set_progress",
+    "set_progress_batch",
     "summarize_progress",
 ]
@@ -9,6 +9,7 @@ from sqlalchemy import case, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.models import MathWordProblem
 from app.services.class_store import SUPPORTED_GRADES
+from app.services.math_catalog import invalidate_math_catalog
 
 
 def _normalize_grade(grade: int) -> int:
@@ -49,6 +50,7 @@ async def create_problem(
     session.add(problem)
     await session.flush()
     await session.refresh(problem)
+    invalidate_math_catalog(session)
     return problem
 
 
@@ -58,6 +60,7 @@ async def delete_problem_by_id(session: AsyncSession, problem_id: str) -> bool:
     if problem is None:
         return False
     await session.delete(problem)
+    invalidate_math_catalog(session)
     return True
 
 
@@ -0,0 +1,186 @@
+"""In-process pub/sub for pushing notification events to open SSE streams."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+DEFAULT_QUEUE_SIZE = 100
+_PENDING_KEY = "notification_broker.after_commit"
+
+
+@dataclass(frozen=True)
+class NotificationEvent:
+    """One server-sent event."""
+
+    event: str
+    data: dict[str, Any]
+
+    def encode(self) -> bytes:
+        """Serialize the event in ``text/event-stream`` framing."""
+        payload = json.dumps(self.data, separators=(",", ":"))
+        return f"event: {self.event}\ndata: {payload}\n\n".encode()
+
+
+@dataclass(eq=False)
+class Subscription:
+    """A user's open stream; events are queued until the stream reads them."""
+
+    broker: "NotificationBroker"
+    user_id: str
+    queue: asyncio.Queue[NotificationEvent] = field(
+        default_factory=lambda: asyncio.Queue(maxsize=DEFAULT_QUEUE_SIZE)
+    )
+
+    def deliver(self, item: NotificationEvent) -> None:
+        """Queue an event, dropping the oldest one if the reader fell behind."""
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(item)
+
+    def close(self) -> None:
+        """Stop receiving events."""
+        self.broker._unsubscribe(self)
+
+
+class NotificationBroker:
+    """Fan out notification events to subscribers within this process.
+
+    Also caches per-user unread counts so polling and new streams do not have
+    to count rows. A count is only cached after it was read from the
+    database, and a read that raced with any count change since ``generation``
+    was taken is discarded instead of stored. With several worker processes
+    each broker only sees changes committed by its own process.
+    """
+
+    def __init__(self) -> None:
+        self.generation = 0
+        self._subscribers: dict[str, set[Subscription]] = {}
+        self._unread: dict[str, int] = {}
+
+    @property
+    def subscriber_count(self) -> int:
+        """Number of open subscriptions across all users."""
+        return sum(len(subs) for subs in self._subscribers.values())
+
+    def subscribe(self, user_id: str) -> Subscription:
+        """Open a subscription for a user's events."""
+        subscription = Subscription(broker=self, user_id=user_id)
+        self._subscribers.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def _unsubscribe(self, subscription: Subscription) -> None:
+        subs = self._subscribers.get(subscription.user_id)
+        if subs is None:
+            return
+        subs.discard(subscription)
+        if not subs:
+            del self._subscribers[subscription.user_id]
+
+    def publish(self, user_id: str, item: NotificationEvent) -> None:
+        """Deliver an event to every open subscription of a user."""
+        for subscription in self._subscribers.get(user_id, ()):
+            subscription.deliver(item)
+
+    def unread_count(self, user_id: str) -> int | None:
+        """Return the cached unread count, or None if it is not known."""
+        return self._unread.get(user_id)
+
+    def store_unread_count(self, user_id: str, count: int, *, generation: int) -> None:
+        """Cache a count read from the database while at ``generation``."""
+        if generation == self.generation:
+            self._unread[user_id] = count
+
+    def adjust_unread_count(self, user_id: str, delta: int) -> int | None:
+        """Apply a committed change to a cached count and return the new value."""
+        self.generation += 1
+        if user_id not in self._unread:
+            return None
+        count = max(self._unread[user_id] + delta, 0)
+        self._unread[user_id] = count
+        return count
+
+    def set_unread_count(self, user_id: str, count: int) -> None:
+        """Record a count known to be exact after a commit."""
+        self.generation += 1
+        self._unread[user_id] = count
+
+    def forget_unread_count(self, user_id: str) -> None:
+        """Drop a cached count that may no longer match the database."""
+        self.generation += 1
+        self._unread.pop(user_id, None)
+
+    def notify(self, user_id: str, notification: dict[str, Any]) -> None:
+        """Count a new unread notification and push it to the user's streams."""
+        count = self.adjust_unread_count(user_id, 1)
+        self.publish(
+            user_id,
+            NotificationEvent(
+                "notification", {"notification": notification, "unreadCount": count}
+            ),
+        )
+
+    def notify_unread_count(self, user_id: str, count: int | None) -> None:
+        """Push a changed unread count (e.g. after marking as read)."""
+        if count is not None:
+            self.publish(user_id, NotificationEvent("unread", {"count": count}))
+
+
+_notification_broker = NotificationBroker()
+
+
+def get_notification_broker() -> NotificationBroker:
+    """Return the process-wide notification broker."""
+    return _notification_broker
+
+
+def reset_notification_broker() -> None:
+    """Replace the process-wide broker (useful for startup and tests)."""
+    global _notification_broker
+    _notification_broker = NotificationBroker()
+
+
+def call_after_commit(
+    session: AsyncSession, callback: Callable[[NotificationBroker], None]
+) -> None:
+    """Run ``callback`` with the broker once ``session`` commits.
+
+    Callbacks registered in a transaction that rolls back are dropped, so
+    streams never see rows that were not persisted.
+    """
+    sync_session = session.sync_session
+    pending = sync_session.info.get(_PENDING_KEY)
+    if pending is None:
+        pending = sync_session.info[_PENDING_KEY] = []
+        event.listen(sync_session, "after_commit", _run_pending)
+        event.listen(sync_session, "after_rollback", _drop_pending)
+    pending.append(callback)
+
+
+def _run_pending(sync_session: Session) -> None:
+    pending = sync_session.info.get(_PENDING_KEY, [])
+    callbacks = list(pending)
+    pending.clear()
+    broker = get_notification_broker()
+    for callback in callbacks:
+        callback(broker)
+
+
+def _drop_pending(sync_session: Session) -> None:
+    sync_session.info.get(_PENDING_KEY, []).clear()
+
+
+__all__ = [
+    "NotificationBroker",
+    "NotificationEvent",
+    "Subscription",
+    "call_after_commit",
+    "get_notification_broker",
+    "reset_notification_broker",
+]
@@ -0,0 +1,314 @@
+"""Background pruning and digest compaction of old notifications."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from typing import Any, Iterable
+
+from sqlalchemy import delete, func, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.models import Discussion, Notification, NotificationCounter, utcnow
+from app.services.notification_broker import NotificationBroker, call_after_commit
+
+logger = logging.getLogger(__name__)
+
+REPLY_TYPE = "new_reply"
+DIGEST_TYPE = "reply_digest"
+
+
+@dataclass
+class RetentionMetrics:
+    """Cumulative counters for the retention job in this process."""
+
+    runs: int = 0
+    read_deleted: int = 0
+    unread_deleted: int = 0
+    replies_collapsed: int = 0
+    digests_created: int = 0
+    last_run_at: datetime | None = None
+    last_run_ms: float | None = None
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the metrics as a JSON-friendly dict."""
+        data = asdict(self)
+        if self.last_run_at is not None:
+            data["last_run_at"] = self.last_run_at.isoformat()
+        return data
+
+
+@dataclass(frozen=True)
+class RetentionRun:
+    """Rows affected by a single retention pass."""
+
+    read_deleted: int = 0
+    unread_deleted: int = 0
+    replies_collapsed: int = 0
+    digests_created: int = 0
+
+
+@dataclass
+class _Digest:
+    """Aggregate of the reply notifications collapsed into one digest row."""
+
+    created_at: datetime
+    count: int = 0
+    reply_id: int | None = None
+    is_read: bool = True
+
+    def add(
+        self,
+        reply_id: int | None,
+        created_at: datetime,
+        is_read: bool,
+        count: int = 1,
+    ) -> None:
+        self.count += count
+        if reply_id is not None and (self.reply_id is None or reply_id > self.reply_id):
+            self.reply_id = reply_id
+        self.created_at = max(self.created_at, created_at)
+        self.is_read = self.is_read and is_read
+
+
+class NotificationRetention:
+    """Delete expired notifications and collapse old reply notifications.
+
+    Work is done in chunks of ``batch_size`` rows, each in its own short
+    transaction, so the SQLite write lock is released between chunks and
+    request writers can interleave. Per discussion, reply notifications older
+    than ``digest_after`` are replaced by one digest row; an existing digest
+    is folded into the new one, so each discussion keeps a single digest per
+    user. Unread counters of affected users are recomputed in the same
+    transaction as each chunk.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        *,
+        read_ttl: timedelta,
+        unread_ttl: timedelta,
+        digest_after: timedelta,
+        batch_size: int,
+        interval: float,
+    ) -> None:
+        self._session_factory = session_factory
+        self.read_ttl = read_ttl
+        self.unread_ttl = unread_ttl
+        self.digest_after = digest_after
+        self.batch_size = batch_size
+        self.interval = interval
+        self.metrics = RetentionMetrics()
+        self._task: asyncio.Task[None] | None = None
+
+    async def run_once(self, *, now: datetime | None = None) -> RetentionRun:
+        """Run one full retention pass and record its metrics."""
+        started = time.perf_counter()
+        now = now or utcnow()
+        read_deleted = await self._delete_expired(
+            Notification.is_read, now - self.read_ttl
+        )
+        unread_deleted = await self._delete_expired(
+            ~Notification.is_read, now - self.unread_ttl
+        )
+        collapsed, digests = await self._collapse_replies(now - self.digest_after)
+        run = RetentionRun(read_deleted, unread_deleted, collapsed, digests)
+
+        metrics = self.metrics
+        metrics.runs += 1
+        metrics.read_deleted += run.read_deleted
+        metrics.unread_deleted += run.unread_deleted
+        metrics.replies_collapsed += run.replies_collapsed
+        metrics.digests_created += run.digests_created
+        metrics.last_run_at = now
+        metrics.last_run_ms = (time.perf_counter() - started) * 1000
+        if run != RetentionRun():
+            logger.info(
+                "Notification retention: %d read and %d unread deleted, "
+                "%d replies collapsed into %d digests",
+                run.read_deleted,
+                run.unread_deleted,
+                run.replies_collapsed,
+                run.digests_created,
+            )
+        return run
+
+    async def _delete_expired(self, condition: Any, cutoff: datetime) -> int:
+        total = 0
+        while True:
+            async with self._session_factory() as db:
+                chunk = (
+                    select(Notification.id)
+                    .where(condition, Notification.created_at < cutoff)
+                    .order_by(Notification.id)
+                    .limit(self.batch_size)
+                )
+                result = await db.execute(
+                    delete(Notification)
+                    .where(Notification.id.in_(chunk))
+                    .returning(Notification.user_id, Notification.is_read)
+                )
+                rows = result.all()
+                await _recount_unread(
+                    db, {user_id for user_id, is_read in rows if not is_read}
+                )
+                await db.commit()
+            total += len(rows)
+            if len(rows) < self.batch_size:
+                return total
+            await asyncio.sleep(0)
+
+    async def _collapse_replies(self, cutoff: datetime) -> tuple[int, int]:
+        collapsed = digests = 0
+        old_replies = (
+            Notification.type.in_((REPLY_TYPE, DIGEST_TYPE)),
+            Notification.discussion_id.is_not(None),
+            Notification.created_at < cutoff,
+        )
+        while True:
+            async with self._session_factory() as db:
+                groups = (
+                    await db.execute(
+                        select(Notification.user_id, Notification.discussion_id)
+                        .where(*old_replies)
+                        .group_by(Notification.user_id, Notification.discussion_id)
+                        .having(func.count() > 1)
+                        .limit(self.batch_size)
+                    )
+                ).all()
+                if not groups:
+                    return collapsed, digests
+
+                # Aggregate what was actually deleted, so digests reflect
+                # read flags changed after the groups were selected.
+                deleted = await db.execute(
+                    delete(Notification)
+                    .where(
+                        *old_replies,
+                        tuple_(Notification.user_id, Notification.discussion_id).in_(
+                            [tuple(group) for group in groups]
+                        ),
+                    )
+                    .returning(
+                        Notification.user_id,
+                        Notification.discussion_id,
+                        Notification.type,
+                        Notification.message,
+                        Notification.reply_id,
+                        Notification.created_at,
+                        Notification.is_read,
+                    )
+                )
+                merged: dict[tuple[str, int | None], _Digest] = {}
+                for (
+                    user_id,
+                    discussion_id,
+                    type_,
+                    message,
+                    reply_id,
+                    created_at,
+                    is_read,
+                ) in deleted:
+                    count = 1
+                    if type_ == DIGEST_TYPE:
+                        count = _digest_count(message)
+                    else:
+                        collapsed += 1
+                    digest = merged.setdefault(
+                        (user_id, discussion_id), _Digest(created_at=created_at)
+                    )
+                    digest.add(reply_id, created_at, is_read, count)
+
+                topics: dict[int | None, str] = dict(
+                    (
+                        await db.execute(
+                            select(Discussion.id, Discussion.topic).where(
+                                Discussion.id.in_({key[1] for key in merged})
+                            )
+                        )
+                    ).all()
+                )
+                db.add_all(
+                    Notification(
+                        user_id=user_id,
+                        type=DIGEST_TYPE,
+                        discussion_id=discussion_id,
+                        reply_id=digest.reply_id,
+                        message=(
+                            f"{digest.count} new replies to "
+                            f"'{topics.get(discussion_id, 'a discussion')}'"
+                        ),
+                        is_read=digest.is_read,
+                        created_at=digest.created_at,
+                    )
+                    for (user_id, discussion_id), digest in merged.items()
+                )
+                await db.flush()
+                await _recount_unread(db, {user_id for user_id, _ in merged})
+                await db.commit()
+            digests += len(merged)
+            await asyncio.sleep(0)
+
+    async def _run(self) -> None:
+        """Prune periodically until cancelled."""
+        while True:
+            try:
+                await self.run_once()
+            except Exception:  # noqa: BLE001
+                logger.exception("Notification retention pass failed")
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        """Start the background retention loop on the running event loop."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the retention loop."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+def _digest_count(message: str) -> int:
+    """Return the reply count of a digest written by ``_collapse_replies``."""
+    count, _, _ = message.partition(" ")
+    return int(count) if count.isdigit() else 1
+
+
+async def _recount_unread(db: AsyncSession, user_ids: Iterable[str]) -> None:
+    """Recompute the unread counters of ``user_ids`` from their notifications."""
+    affected = sorted(user_ids)
+    if not affected:
+        return
+    unread = (
+        select(func.count())
+        .select_from(Notification)
+        .where(
+            Notification.user_id == NotificationCounter.user_id,
+            ~Notification.is_read,
+        )
+        .scalar_subquery()
+    )
+    await db.execute(
+        update(NotificationCounter)
+        .where(NotificationCounter.user_id.in_(affected))
+        .values(unread_count=unread)
+    )
+
+    def _forget(broker: NotificationBroker) -> None:
+        for user_id in affected:
+            broker.forget_unread_count(user_id)
+
+    call_after_commit(db, _forget)
+
+
+__all__ = ["NotificationRetention", "RetentionMetrics", "RetentionRun"]
@@ -0,0 +1,37 @@
+"""Construction of the app-lifetime OpenAI client."""
+
+from __future__ import annotations
+
+import httpx
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient, Timeout
+
+from app.config import Settings
+
+
+def create_openai_client(settings: Settings) -> AsyncOpenAI | None:
+    """Build a pooled client from settings, or None when no API key is set.
+
+    The client owns one keep-alive connection pool for all helper calls and
+    must be closed with ``await client.close()`` on shutdown.
+    """
+    if not settings.openai_api_key:
+        return None
+    http_client = DefaultAsyncHttpxClient(
+        limits=httpx.Limits(
+            max_connections=settings.openai_max_connections,
+            max_keepalive_connections=settings.openai_max_keepalive_connections,
+            keepalive_expiry=settings.openai_keepalive_expiry_seconds,
+        ),
+        timeout=Timeout(
+            settings.openai_timeout_seconds,
+            connect=settings.openai_connect_timeout_seconds,
+        ),
+    )
+    return AsyncOpenAI(
+        api_key=settings.openai_api_key,
+        base_url=settings.openai_base_url,
+        http_client=http_client,
+    )
+
+
+__all__ = ["create_openai_client"]
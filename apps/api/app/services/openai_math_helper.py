@@ -4,19 +4,78 @@ from __future__ import annotations
 
 import asyncio
 import json
-from typing import Any
-
-from openai import AsyncOpenAI
+import logging
+import random
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncGenerator, AsyncIterator, Awaitable, Sequence
+
+from openai import APIStatusError, AsyncOpenAI, AsyncStream
+from openai.types.chat import (
+    ChatCompletion,
+    ChatCompletionChunk,
+    ChatCompletionContentPartParam,
+    ChatCompletionMessageParam,
+)
 
 from app.api.schemas.math_analysis import Language, MathProblemAnalysis
 from app.config import get_settings
+from app.services.image_preprocessing import PreparedImage, VisionDetail
+from app.services.pdf_pages import PdfSplitError, TooManyPagesError, split_pdf_pages
+from app.services.rate_limit import TokenBucket
 
+logger = logging.getLogger(__name__)
+
+
+# Bump whenever the analysis prompts or schema change, so cached analyses
+# produced by the old prompt are no longer served.
+ANALYSIS_PROMPT_VERSION = "1"
+ANALYSIS_MODEL = "gpt-5"
+COACHING_MODEL = "gpt-5"
+COACHING_SUMMARY_MODEL = "gpt-4o-mini"
+COACHING_SUMMARY_MAX_TOKENS = 200
+DRAWING_SUGGESTIONS_MODEL = "gpt-4o-mini"
+MULTIPLICATION_CONTEXT_MODEL = "gpt-5"
+
+
+_rate_limiter: TokenBucket | None = None
+
+
+def get_openai_rate_limiter() -> TokenBucket:
+    """Return the process-wide limiter shared by analysis requests."""
+    global _rate_limiter
+    if _rate_limiter is None:
+        settings = get_settings()
+        _rate_limiter = TokenBucket(
+            rate=settings.openai_requests_per_minute / 60,
+            capacity=settings.openai_max_concurrency,
+        )
+    return _rate_limiter
 
-def _get_openai_client() -> AsyncOpenAI:
-    settings = get_settings()
-    if not settings.openai_api_key:
-        raise ValueError("OpenAI API key is not configured.")
-    return AsyncOpenAI(api_key=settings.openai_api_key)
+
+def reset_openai_rate_limiter() -> None:
+    """Forget the limiter so the next request rebuilds it from settings."""
+    global _rate_limiter
+    _rate_limiter = None
+
+
+async def _create_rate_limited_completion(
+    client: AsyncOpenAI, **kwargs: Any
+) -> ChatCompletion:
+    """Create a chat completion through the shared limiter.
+
+    Rate-limit headers of every response (including 429s) feed back into the
+    limiter, so all concurrent callers back off together.
+    """
+    limiter = get_openai_rate_limiter()
+    await limiter.acquire()
+    try:
+        raw = await client.chat.completions.with_raw_response.create(**kwargs)
+    except APIStatusError as exc:
+        limiter.observe_headers(exc.response.headers)
+        raise
+    limiter.observe_headers(raw.headers)
+    return raw.parse()
 
 
 LANGUAGE_INSTRUCTIONS: dict[Language, dict[str, str]] = {
@@ -197,16 +256,32 @@ ANALYSIS_SCHEMA: dict[str, Any] = {
 }
 
 
+def _file_content_part(
+    image: PreparedImage, detail: VisionDetail
+) -> ChatCompletionContentPartParam:
+    if image.mime_type == "application/pdf":
+        return {
+            "type": "file",
+            "file": {"filename": "worksheet.pdf", "file_data": image.data_url()},
+        }
+    return {
+        "type": "image_url",
+        "image_url": {"url": image.data_url(), "detail": detail},
+    }
+
+
 async def extract_problems_from_image(
-    image_base64: str,
-    mime_type: str,
+    image: PreparedImage,
     language: Language = "en",
+    *,
+    client: AsyncOpenAI,
+    detail: VisionDetail = "auto",
 ) -> list[str]:
     """Extract distinct math word problems from an image or PDF."""
-    client = _get_openai_client()
     lang_instr = LANGUAGE_INSTRUCTIONS[language]
 
-    response = await client.chat.completions.create(
+    response = await _create_rate_limited_completion(
+        client,
         model="gpt-5",
         messages=[
             {
@@ -224,10 +299,7 @@ async def extract_problems_from_image(
                             "the problems and the delimiter."
                         ),
                     },
-                    {
-                        "type": "image_url",
-                        "image_url": {"url": f"data:{mime_type};base64,{image_base64}"},
-                    },
+                    _file_content_part(image, detail),
                 ],
             }
         ],
@@ -243,16 +315,94 @@ async def extract_problems_from_image(
     return problems
 
 
+@dataclass(frozen=True)
+class PageExtraction:
+    """Problems extracted from one page (1-based) of an upload."""
+
+    page: int
+    page_count: int
+    problems: list[str]
+    error: Exception | None = None
+
+
+async def split_extraction_pages(
+    image: PreparedImage, *, max_pages: int
+) -> list[PreparedImage]:
+    """Split a PDF upload into one-page documents for per-page extraction.
+
+    Images, and PDFs the local splitter cannot handle, stay a single page.
+    Raises ``TooManyPagesError`` (a ``ValueError``) for PDFs longer than
+    ``max_pages``.
+    """
+    if image.mime_type != "application/pdf":
+        return [image]
+    try:
+        pages = await asyncio.to_thread(
+            split_pdf_pages, image.data, max_pages=max_pages
+        )
+    except TooManyPagesError:
+        raise
+    except PdfSplitError as exc:
+        logger.warning("Sending PDF unsplit: %s", exc)
+        return [image]
+    return [PreparedImage(data=page, mime_type=image.mime_type) for page in pages]
+
+
+async def extract_problems_by_page(
+    pages: Sequence[PreparedImage],
+    language: Language = "en",
+    *,
+    client: AsyncOpenAI,
+    max_concurrency: int | None = None,
+    detail: VisionDetail = "auto",
+) -> AsyncGenerator[PageExtraction, None]:
+    """Extract problems from each page concurrently, yielding as pages finish.
+
+    At most ``max_concurrency`` pages are in flight at once. A page without
+    problems yields an empty list; a failed page carries its error instead
+    of failing the others.
+    """
+    semaphore = asyncio.Semaphore(
+        max_concurrency or get_settings().openai_max_concurrency
+    )
+
+    async def run(page: int, page_image: PreparedImage) -> PageExtraction:
+        async with semaphore:
+            try:
+                problems = await extract_problems_from_image(
+                    page_image, language, client=client, detail=detail
+                )
+            except ValueError:
+                problems = []
+            except Exception as exc:  # noqa: BLE001
+                logger.warning("Extraction of page %d failed: %s", page, exc)
+                return PageExtraction(page, len(pages), [], exc)
+        return PageExtraction(page, len(pages), problems)
+
+    tasks = [
+        asyncio.create_task(run(page, page_image))
+        for page, page_image in enumerate(pages, start=1)
+    ]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
 async def analyze_math_problem(
     problem_text: str,
     language: Language = "en",
+    *,
+    client: AsyncOpenAI,
 ) -> MathProblemAnalysis:
     """Analyze a single math word problem."""
-    client = _get_openai_client()
     lang_instr = LANGUAGE_INSTRUCTIONS[language]
 
-    response = await client.chat.completions.create(
-        model="gpt-5",
+    response = await _create_rate_limited_completion(
+        client,
+        model=ANALYSIS_MODEL,
         response_format={"type": "json_object"},
         messages=[
             {
@@ -305,9 +455,10 @@ async def analyze_math_problem(
 async def analyze_math_problems_batch(
     problem_texts: list[str],
     language: Language = "en",
+    *,
+    client: AsyncOpenAI,
 ) -> list[MathProblemAnalysis]:
     """Analyze multiple problems in a single request."""
-    client = _get_openai_client()
     lang_instr = LANGUAGE_INSTRUCTIONS[language]
 
     batch_schema = {
@@ -329,8 +480,9 @@ async def analyze_math_problems_batch(
         f"PROBLEM {idx + 1}:\n{text}" for idx, text in enumerate(problem_texts)
     )
 
-    response = await client.chat.completions.create(
-        model="gpt-5",
+    response = await _create_rate_limited_completion(
+        client,
+        model=ANALYSIS_MODEL,
         response_format={"type": "json_object"},
         messages=[
             {
@@ -375,40 +527,113 @@ def chunk_array(items: list[Any], chunk_size: int) -> list[list[Any]]:
     return [items[i : i + chunk_size] for i in range(0, len(items), chunk_size)]
 
 
+async def _analyze_with_retries(
+    problem_text: str,
+    language: Language,
+    *,
+    client: AsyncOpenAI,
+    max_attempts: int,
+    base_delay: float,
+) -> MathProblemAnalysis:
+    """Analyze one problem, retrying failures with full-jitter backoff."""
+    for attempt in range(max_attempts):
+        try:
+            return await analyze_math_problem(problem_text, language, client=client)
+        except Exception:
+            if attempt == max_attempts - 1:
+                raise
+            delay = random.uniform(0, base_delay * 2**attempt)
+            logger.warning(
+                "Analysis attempt %d failed; retrying in %.2fs", attempt + 1, delay
+            )
+            await asyncio.sleep(delay)
+    raise AssertionError("unreachable")
+
+
+async def _gather_or_cancel(*coros: Awaitable[None]) -> None:
+    """Await all of ``coros``; the first failure cancels the rest."""
+    tasks = [asyncio.ensure_future(coro) for coro in coros]
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
 async def analyze_math_problems_with_batching(
     problem_texts: list[str],
     language: Language = "en",
+    *,
+    client: AsyncOpenAI,
+    batch_size: int = 5,
+    max_concurrency: int | None = None,
+    max_attempts: int | None = None,
+    base_delay: float = 0.5,
 ) -> list[MathProblemAnalysis]:
-    """Analyze problems in batches with fallback to individual analysis."""
-    batch_size = 5
-    delay_between_batches = 0.5
-
-    batches = chunk_array(problem_texts, batch_size)
-    all_analyses: list[MathProblemAnalysis] = []
-
-    for index, batch in enumerate(batches):
+    """Analyze problems in concurrent batches, retrying only failed problems.
+
+    At most ``max_concurrency`` requests are in flight, and the shared
+    limiter paces them. When a batch request fails or returns the wrong number
+    of analyses, only its problems are re-analyzed one by one. If a problem
+    still fails, the requests still in flight are cancelled and the error is
+    raised.
+    """
+    settings = get_settings()
+    concurrency = max_concurrency or settings.openai_max_concurrency
+    attempts = max_attempts or settings.openai_max_retries + 1
+    semaphore = asyncio.Semaphore(concurrency)
+    results: list[MathProblemAnalysis | None] = [None] * len(problem_texts)
+
+    async def run_single(index: int) -> None:
+        async with semaphore:
+            results[index] = await _analyze_with_retries(
+                problem_texts[index],
+                language,
+                client=client,
+                max_attempts=attempts,
+                base_delay=base_delay,
+            )
+
+    async def run_batch(indices: list[int]) -> None:
         try:
-            batch_analyses = await analyze_math_problems_batch(batch, language)
-            all_analyses.extend(batch_analyses)
+            async with semaphore:
+                analyses = await analyze_math_problems_batch(
+                    [problem_texts[i] for i in indices], language, client=client
+                )
+            if len(analyses) != len(indices):
+                raise ValueError(
+                    f"Expected {len(indices)} analyses, got {len(analyses)}."
+                )
         except Exception:
-            for problem_text in batch:
-                analysis = await analyze_math_problem(problem_text, language)
-                all_analyses.append(analysis)
-                await asyncio.sleep(1.0)
-
-        if index < len(batches) - 1:
-            await asyncio.sleep(delay_between_batches)
-
-    return all_analyses
+            logger.warning(
+                "Batch of %d problems failed; analyzing individually", len(indices)
+            )
+            await _gather_or_cancel(*(run_single(i) for i in indices))
+            return
+        for index, analysis in zip(indices, analyses):
+            results[index] = analysis
+
+    batches = chunk_array(list(range(len(problem_texts))), batch_size)
+    await _gather_or_cancel(*(run_batch(batch) for batch in batches))
+    analyses = [analysis for analysis in results if analysis is not None]
+    if len(analyses) != len(problem_texts):
+        raise ValueError(
+            f"Expected {len(problem_texts)} analyses, got {len(analyses)}."
+        )
+    return analyses
 
 
 async def analyze_drawing_with_openai(
-    image_base64: str,
+    image: PreparedImage,
     problem_text: str,
     language: Language = "en",
+    *,
+    client: AsyncOpenAI,
+    detail: VisionDetail = "auto",
 ) -> str:
     """Analyze a drawing associated with a math problem."""
-    client = _get_openai_client()
     is_german = language == "de"
 
     system_prompt = (
@@ -435,12 +660,6 @@ async def analyze_drawing_with_openai(
         "7. Do not reveal the solution."
     )
 
-    image_url = (
-        image_base64
-        if image_base64.startswith("data:")
-        else f"data:image/png;base64,{image_base64}"
-    )
-
     response = await client.chat.completions.create(
         model="gpt-4o",
         messages=[
@@ -455,7 +674,10 @@ async def analyze_drawing_with_openai(
                             "And here is the drawing:"
                         ),
                     },
-                    {"type": "image_url", "image_url": {"url": image_url}},
+                    {
+                        "type": "image_url",
+                        "image_url": {"url": image.data_url(), "detail": detail},
+                    },
                 ],
             },
         ],
@@ -468,9 +690,10 @@ async def analyze_drawing_with_openai(
 async def generate_drawing_suggestions(
     problem_text: str,
     language: Language = "en",
+    *,
+    client: AsyncOpenAI,
 ) -> list[str]:
     """Generate drawing suggestions for visualizing a math problem."""
-    client = _get_openai_client()
     is_german = language == "de"
 
     system_prompt = (
@@ -484,7 +707,7 @@ async def generate_drawing_suggestions(
     )
 
     response = await client.chat.completions.create(
-        model="gpt-4o-mini",
+        model=DRAWING_SUGGESTIONS_MODEL,
         messages=[
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": f'Math problem: "{problem_text}"'},
@@ -503,14 +726,14 @@ async def generate_drawing_suggestions(
     ]
 
 
-async def get_metacognitive_coaching_response(
+def _coaching_messages(
     problem_text: str,
     conversation_history: list[dict[str, str]],
     student_message: str,
-    language: Language = "en",
-) -> str:
-    """Return a metacognitive coaching response for the student."""
-    client = _get_openai_client()
+    language: Language,
+    history_summary: str | None = None,
+) -> list[ChatCompletionMessageParam]:
+    """Build the chat messages for a metacognitive coaching turn."""
     is_german = language == "de"
 
     history_text = "\n".join(
@@ -526,37 +749,259 @@ async def get_metacognitive_coaching_response(
         "You ask questions and do not give solutions."
     )
 
+    summary_text = ""
+    if history_summary:
+        summary_text = (
+            f"ZUSAMMENFASSUNG DES FRUEHEREN GESPRAECHS:\n{history_summary}\n\n"
+            if is_german
+            else f"SUMMARY OF OUR EARLIER CONVERSATION:\n{history_summary}\n\n"
+        )
+
     prompt = (
         f"{system_prompt}\n\n"
         f"DIE MATHE-AUFGABE:\n{problem_text}\n\n"
+        f"{summary_text}"
         f"UNSER GESPRAECH BISHER:\n{history_text}\n\n"
         f"NEUE NACHRICHT VOM KIND:\nStudent: {student_message}\n\n"
         "Antworte als Clippy! Stelle eine Frage oder gib Ermutigung."
         if is_german
         else f"{system_prompt}\n\n"
         f"THE MATH PROBLEM:\n{problem_text}\n\n"
+        f"{summary_text}"
         f"OUR CONVERSATION SO FAR:\n{history_text}\n\n"
         f"NEW MESSAGE FROM KID:\nStudent: {student_message}\n\n"
         "Respond as Clippy! Ask a question or encourage the student."
     )
 
-    response = await client.chat.completions.create(
-        model="gpt-5",
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": prompt},
+    ]
+
+
+async def summarize_coaching_turns(
+    previous_summary: str | None,
+    turns: list[dict[str, str]],
+    language: Language = "en",
+    *,
+    client: AsyncOpenAI,
+) -> str:
+    """Fold coaching turns into a short rolling summary of the conversation."""
+    is_german = language == "de"
+    turns_text = "\n".join(
+        f"{'Clippy' if msg.get('role') == 'tutor' else 'Student'}: {msg.get('content')}"
+        for msg in turns
+    )
+    system_prompt = (
+        "Fasse ein Nachhilfegespraech fuer den Tutor zusammen. Halte fest, was das "
+        "Kind schon verstanden hat, wo es feststeckt und welche Hinweise es schon "
+        "bekommen hat. Hoechstens fuenf kurze Saetze auf Deutsch."
+        if is_german
+        else "Summarize a tutoring conversation for the tutor. Keep what the "
+        "student already understood, where they are stuck and which hints they "
+        "were given. At most five short sentences."
+    )
+    previous = previous_summary or ("(keine)" if is_german else "(none)")
+
+    response = await _create_rate_limited_completion(
+        client,
+        model=COACHING_SUMMARY_MODEL,
         messages=[
             {"role": "system", "content": system_prompt},
-            {"role": "user", "content": prompt},
+            {
+                "role": "user",
+                "content": f"Previous summary:\n{previous}\n\nNew turns:\n{turns_text}",
+            },
         ],
+        max_tokens=COACHING_SUMMARY_MAX_TOKENS,
+        temperature=0.2,
+    )
+
+    summary = (response.choices[0].message.content or "").strip()
+    if not summary:
+        raise ValueError("Empty response from OpenAI.")
+    return summary
+
+
+async def get_metacognitive_coaching_response(
+    problem_text: str,
+    conversation_history: list[dict[str, str]],
+    student_message: str,
+    language: Language = "en",
+    *,
+    client: AsyncOpenAI,
+    history_summary: str | None = None,
+) -> str:
+    """Return a metacognitive coaching response for the student."""
+    response = await client.chat.completions.create(
+        model=COACHING_MODEL,
+        messages=_coaching_messages(
+            problem_text,
+            conversation_history,
+            student_message,
+            language,
+            history_summary,
+        ),
     )
 
     return response.choices[0].message.content or ""
 
 
-async def analyze_multiplication_context(
+@dataclass
+class CoachingMetrics:
+    """Latency counters for streamed coaching responses in this process."""
+
+    streams: int = 0
+    truncated: int = 0
+    total_latency_ms: float = 0.0
+    total_time_to_first_token_ms: float = 0.0
+    max_latency_ms: float = 0.0
+
+    def record(self, stream: "CoachingStream") -> None:
+        """Add a finished stream to the counters."""
+        self.streams += 1
+        self.truncated += int(stream.truncated)
+        latency = stream.latency_ms or 0.0
+        self.total_latency_ms += latency
+        self.total_time_to_first_token_ms += stream.time_to_first_token_ms or latency
+        self.max_latency_ms = max(self.max_latency_ms, latency)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return counters and averages as a JSON-friendly dict."""
+        count = self.streams or 1
+        return {
+            "streams": self.streams,
+            "truncated": self.truncated,
+            "avgLatencyMs": round(self.total_latency_ms / count, 1),
+            "avgTimeToFirstTokenMs": round(
+                self.total_time_to_first_token_ms / count, 1
+            ),
+            "maxLatencyMs": round(self.max_latency_ms, 1),
+        }
+
+
+_coaching_metrics = CoachingMetrics()
+
+
+def get_coaching_metrics() -> CoachingMetrics:
+    """Return the process-wide coaching latency counters."""
+    return _coaching_metrics
+
+
+class CoachingStream:
+    """Text deltas of a streamed coaching response.
+
+    Iteration stops once ``max_tokens`` content chunks were relayed (each
+    chunk carries about one token), in addition to the cap sent to the API.
+    Latency and time to first token are measured from when the request was
+    sent and recorded when the stream ends.
+    """
+
+    def __init__(
+        self,
+        stream: AsyncStream[ChatCompletionChunk],
+        *,
+        started: float,
+        max_tokens: int,
+    ) -> None:
+        self._stream = stream
+        self._started = started
+        self.max_tokens = max_tokens
+        self.text = ""
+        self.tokens = 0
+        self.truncated = False
+        self.time_to_first_token_ms: float | None = None
+        self.latency_ms: float | None = None
+
+    async def __aiter__(self) -> AsyncIterator[str]:
+        try:
+            async for chunk in self._stream:
+                if not chunk.choices:
+                    continue
+                choice = chunk.choices[0]
+                if choice.finish_reason == "length":
+                    self.truncated = True
+                delta = choice.delta.content
+                if not delta:
+                    continue
+                if self.time_to_first_token_ms is None:
+                    self.time_to_first_token_ms = _elapsed_ms(self._started)
+                self.text += delta
+                self.tokens += 1
+                yield delta
+                if self.tokens >= self.max_tokens:
+                    self.truncated = True
+                    break
+        finally:
+            await self.aclose()
+
+    async def aclose(self) -> None:
+        """Close the upstream response and record metrics (idempotent)."""
+        if self.latency_ms is not None:
+            return
+        self.latency_ms = _elapsed_ms(self._started)
+        await self._stream.close()
+        get_coaching_metrics().record(self)
+        logger.info(
+            "Coaching stream: %d chunks, first token %.0f ms, total %.0f ms%s",
+            self.tokens,
+            self.time_to_first_token_ms or -1,
+            self.latency_ms,
+            " (truncated)" if self.truncated else "",
+        )
+
+    def summary(self) -> dict[str, Any]:
+        """Describe the finished stream for the final event."""
+        return {
+            "response": self.text,
+            "truncated": self.truncated,
+            "latencyMs": self.latency_ms,
+            "timeToFirstTokenMs": self.time_to_first_token_ms,
+        }
+
+
+def _elapsed_ms(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000, 1)
+
+
+async def stream_metacognitive_coaching_response(
+    problem_text: str,
+    conversation_history: list[dict[str, str]],
+    student_message: str,
+    language: Language = "en",
+    *,
+    client: AsyncOpenAI,
+    max_tokens: int,
+    history_summary: str | None = None,
+) -> CoachingStream:
+    """Start a streamed coaching response capped at ``max_tokens``.
+
+    The request is sent before returning, so API errors surface here rather
+    than in the middle of the stream.
+    """
+    started = time.perf_counter()
+    stream = await client.chat.completions.create(
+        model=COACHING_MODEL,
+        messages=_coaching_messages(
+            problem_text,
+            conversation_history,
+            student_message,
+            language,
+            history_summary,
+        ),
+        max_completion_tokens=max_tokens,
+        stream=True,
+    )
+    return CoachingStream(stream, started=started, max_tokens=max_tokens)
+
+
+async def identify_multiplication_target(
     problem_text: str,
     segments: list[dict[str, Any]],
-) -> dict[str, Any]:
-    """Identify which segment is the base quantity and which is the multiplier."""
-    client = _get_openai_client()
+    *,
+    client: AsyncOpenAI,
+) -> str:
+    """Ask which object the problem asks about; returns the model's label."""
     segments_description = "\n".join(
         f"Segment {idx + 1}: {segment['count']} {segment['label']} "
         f"(emoji: {segment['emoji']})"
@@ -573,7 +1018,7 @@ async def analyze_multiplication_context(
     )
 
     response = await client.chat.completions.create(
-        model="gpt-5",
+        model=MULTIPLICATION_CONTEXT_MODEL,
         response_format={"type": "json_object"},
         messages=[{"role": "user", "content": prompt}],
     )
@@ -583,8 +1028,14 @@ async def analyze_multiplication_context(
         raise ValueError("Empty response from OpenAI.")
 
     result = json.loads(json_string)
-    target_label = str(result.get("targetLabel", "")).lower()
+    return str(result.get("targetLabel", ""))
 
+
+def resolve_multiplication_context(
+    target_label: str, segments: list[dict[str, Any]]
+) -> dict[str, Any]:
+    """Map a target label onto the segments: base quantity and multiplier."""
+    target_label = target_label.lower()
     target_segment = next(
         (
             segment
@@ -611,15 +1062,43 @@ async def analyze_multiplication_context(
     }
 
 
+async def analyze_multiplication_context(
+    problem_text: str,
+    segments: list[dict[str, Any]],
+    *,
+    client: AsyncOpenAI,
+) -> dict[str, Any]:
+    """Identify which segment is the base quantity and which is the multiplier."""
+    target_label = await identify_multiplication_target(
+        problem_text, segments, client=client
+    )
+    return resolve_multiplication_context(target_label, segments)
+
+
 __all__ = [
+    "ANALYSIS_MODEL",
+    "COACHING_MODEL",
+    "DRAWING_SUGGESTIONS_MODEL",
+    "MULTIPLICATION_CONTEXT_MODEL",
+    "ANALYSIS_PROMPT_VERSION",
     "ANALYSIS_SCHEMA",
     "LANGUAGE_INSTRUCTIONS",
     "analyze_drawing_with_openai",
     "analyze_math_problem",
     "analyze_math_problems_batch",
     "analyze_math_problems_with_batching",
+    "CoachingMetrics",
+    "CoachingStream",
+    "PageExtraction",
     "analyze_multiplication_context",
+    "extract_problems_by_page",
     "extract_problems_from_image",
+    "split_extraction_pages",
     "generate_drawing_suggestions",
+    "identify_multiplication_target",
+    "get_coaching_metrics",
     "get_metacognitive_coaching_response",
+    "resolve_multiplication_context",
+    "stream_metacognitive_coaching_response",
+    "summarize_coaching_turns",
 ]
@@ -0,0 +1,31 @@
+"""Opaque keyset cursors for ``(timestamp, id)``-ordered feeds."""
+
+from __future__ import annotations
+
+import base64
+import json
+from datetime import datetime
+
+
+def encode_cursor(sort_value: datetime, row_id: int) -> str:
+    """Return an opaque cursor pointing just past the given row."""
+    raw = json.dumps([sort_value.isoformat(), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """Decode a cursor produced by ``encode_cursor``.
+
+    Raises ValueError for anything that is not a well-formed cursor.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        if not isinstance(row_id, int):
+            raise TypeError("cursor id must be an integer")
+        return datetime.fromisoformat(sort_value), row_id
+    except (TypeError, ValueError) as exc:
+        raise ValueError("Invalid cursor") from exc
+
+
+__all__ = ["decode_cursor", "encode_cursor"]
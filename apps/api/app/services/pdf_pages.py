@@ -0,0 +1,56 @@
+"""Split PDF worksheets into single-page documents."""
+
+from __future__ import annotations
+
+import io
+
+from pypdf import PdfReader, PdfWriter
+
+
+class PdfSplitError(ValueError):
+    """The document could not be split into pages."""
+
+
+class TooManyPagesError(PdfSplitError):
+    """The document has more pages than may be processed."""
+
+
+def split_pdf_pages(data: bytes, *, max_pages: int) -> list[bytes]:
+    """Return one standalone PDF per page, in page order.
+
+    Raises ``PdfSplitError`` when the document cannot be read (including
+    encrypted documents), or its subclass ``TooManyPagesError`` when it has
+    more than ``max_pages`` pages. pypdf bounds decompressed stream sizes
+    and nesting depth; whatever it raises on hostile input, including
+    ``RecursionError`` and ``MemoryError``, becomes a ``PdfSplitError``.
+    """
+    try:
+        reader = PdfReader(io.BytesIO(data))
+        if reader.is_encrypted:
+            raise PdfSplitError("Encrypted PDFs are not supported.")
+        page_count = len(reader.pages)
+    except PdfSplitError:
+        raise
+    except Exception as exc:  # noqa: BLE001
+        raise PdfSplitError("Could not read the PDF.") from exc
+    if not page_count:
+        raise PdfSplitError("PDF has no pages.")
+    if page_count > max_pages:
+        raise TooManyPagesError(
+            f"PDF has {page_count} pages; at most {max_pages} are supported."
+        )
+
+    pages = []
+    try:
+        for page in reader.pages:
+            writer = PdfWriter()
+            writer.add_page(page)
+            out = io.BytesIO()
+            writer.write(out)
+            pages.append(out.getvalue())
+    except Exception as exc:  # noqa: BLE001
+        raise PdfSplitError("Could not split the PDF.") from exc
+    return pages
+
+
+__all__ = ["PdfSplitError", "TooManyPagesError", "split_pdf_pages"]
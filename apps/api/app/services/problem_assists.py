@@ -0,0 +1,291 @@
+"""Precomputed drawing suggestions and multiplication context for catalog problems.
+
+Catalog problems have fixed text, so their drawing suggestions and the
+multiplication target are computed once in the background when a problem is
+created or seeded and served from ``math_problem_assists`` afterwards.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+from dataclasses import dataclass
+from typing import Any, Mapping, Sequence
+
+from openai import AsyncOpenAI
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.api.schemas.math_analysis import Language
+from app.models import MathProblemAssist
+from app.services import openai_math_helper
+from app.services.analysis_cache import normalize_problem_text
+
+logger = logging.getLogger(__name__)
+
+DRAWING_SUGGESTIONS = "drawing_suggestions"
+MULTIPLICATION_TARGET = "multiplication_target"
+
+
+def drawing_suggestions_key(problem_text: str, language: Language) -> str:
+    """Return the key of a problem's drawing suggestions."""
+    return _key(
+        DRAWING_SUGGESTIONS,
+        openai_math_helper.DRAWING_SUGGESTIONS_MODEL,
+        language,
+        normalize_problem_text(problem_text),
+    )
+
+
+def multiplication_target_key(
+    problem_text: str, segments: Sequence[Mapping[str, Any]]
+) -> str:
+    """Return the key of a problem's multiplication target for ``segments``.
+
+    Only labels and counts reach the key; the emoji merely decorates the
+    prompt and differs between clients.
+    """
+    return _key(
+        MULTIPLICATION_TARGET,
+        openai_math_helper.MULTIPLICATION_CONTEXT_MODEL,
+        normalize_problem_text(problem_text),
+        [
+            [normalize_problem_text(str(segment["label"])).lower(), segment["count"]]
+            for segment in segments
+        ],
+    )
+
+
+def _key(*parts: Any) -> str:
+    raw = json.dumps(parts, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def multiplication_segments(analysis: Mapping[str, Any]) -> list[dict[str, Any]]:
+    """Derive "<count> <object>" segments from a multiplication analysis.
+
+    Returns an empty list unless the analysis multiplies and names at least
+    two quantities.
+    """
+    if "×" not in analysis.get("operations", []):
+        return []
+    emoji_map: Mapping[str, str] = analysis.get("emojiMap") or {}
+    segments: list[dict[str, Any]] = []
+    words = analysis.get("words", [])
+    for word, following in zip(words, words[1:]):
+        if word.get("type") != "number" or following.get("type") != "object":
+            continue
+        value = word.get("value")
+        if value is None or value != int(value):
+            continue
+        label = following["text"]
+        segment = {
+            "label": label,
+            "count": int(value),
+            "emoji": emoji_map.get(label) or emoji_map.get(label.lower(), ""),
+        }
+        if not any(
+            (s["label"], s["count"]) == (label, segment["count"]) for s in segments
+        ):
+            segments.append(segment)
+    return segments if len(segments) >= 2 else []
+
+
+async def lookup_assist(
+    session_factory: async_sessionmaker[AsyncSession], key: str
+) -> dict[str, Any] | None:
+    """Return the stored payload for ``key``, if it was precomputed."""
+    async with session_factory() as db:
+        result = await db.execute(
+            select(MathProblemAssist.payload).where(MathProblemAssist.key == key)
+        )
+        return result.scalar_one_or_none()
+
+
+async def _stored_keys(db: AsyncSession, keys: Sequence[str]) -> set[str]:
+    result = await db.execute(
+        select(MathProblemAssist.key).where(MathProblemAssist.key.in_(keys))
+    )
+    return set(result.scalars())
+
+
+async def _store(
+    db: AsyncSession, key: str, kind: str, model: str, payload: dict[str, Any]
+) -> None:
+    await db.execute(
+        sqlite_insert(MathProblemAssist)
+        .values(key=key, kind=kind, model=model, payload=payload)
+        .on_conflict_do_nothing(index_elements=[MathProblemAssist.key])
+    )
+
+
+async def precompute_problem_assists(
+    session_factory: async_sessionmaker[AsyncSession],
+    problem_text: str,
+    language: Language,
+    analysis: Mapping[str, Any],
+    *,
+    client: AsyncOpenAI,
+) -> int:
+    """Compute and store whatever is missing for one problem.
+
+    Returns the number of OpenAI calls made. No database connection is held
+    while a call is in flight.
+    """
+    suggestions_key = drawing_suggestions_key(problem_text, language)
+    segments = multiplication_segments(analysis)
+    target_key = multiplication_target_key(problem_text, segments) if segments else None
+    async with session_factory() as db:
+        stored = await _stored_keys(
+            db, [key for key in (suggestions_key, target_key) if key]
+        )
+
+    fresh: list[tuple[str, str, str, dict[str, Any]]] = []
+    if suggestions_key not in stored:
+        suggestions = await openai_math_helper.generate_drawing_suggestions(
+            problem_text, language, client=client
+        )
+        fresh.append(
+            (
+                suggestions_key,
+                DRAWING_SUGGESTIONS,
+                openai_math_helper.DRAWING_SUGGESTIONS_MODEL,
+                {"suggestions": suggestions},
+            )
+        )
+    if target_key is not None and target_key not in stored:
+        target_label = await openai_math_helper.identify_multiplication_target(
+            problem_text, segments, client=client
+        )
+        fresh.append(
+            (
+                target_key,
+                MULTIPLICATION_TARGET,
+                openai_math_helper.MULTIPLICATION_CONTEXT_MODEL,
+                {"targetLabel": target_label},
+            )
+        )
+    if fresh:
+        async with session_factory() as db:
+            for entry in fresh:
+                await _store(db, *entry)
+            await db.commit()
+    return len(fresh)
+
+
+@dataclass(frozen=True)
+class _Job:
+    problem_text: str
+    language: Language
+    analysis: Mapping[str, Any]
+
+
+class ProblemAssistPrecomputer:
+    """Background queue that precomputes assists one problem at a time.
+
+    Problems are processed in the order they were enqueued; a failed problem
+    is logged and skipped, and is retried the next time it is enqueued (for
+    seeded problems, on the next startup).
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        client: AsyncOpenAI,
+    ) -> None:
+        self._session_factory = session_factory
+        self._client = client
+        self._queue: asyncio.Queue[_Job] = asyncio.Queue()
+        self._task: asyncio.Task[None] | None = None
+        self.completed = 0
+        self.failed = 0
+        self.requests = 0
+
+    def __len__(self) -> int:
+        return self._queue.qsize()
+
+    def stats(self) -> dict[str, int]:
+        """Return queue length and processing counters."""
+        return {
+            "pending": len(self),
+            "completed": self.completed,
+            "failed": self.failed,
+            "openaiRequests": self.requests,
+        }
+
+    def enqueue(
+        self, problem_text: str, language: Language, analysis: Mapping[str, Any]
+    ) -> None:
+        """Schedule a problem; returns immediately."""
+        self._queue.put_nowait(_Job(problem_text, language, analysis))
+
+    async def join(self) -> None:
+        """Wait until every enqueued problem has been processed."""
+        await self._queue.join()
+
+    async def _run(self) -> None:
+        """Process queued problems until cancelled."""
+        while True:
+            job = await self._queue.get()
+            try:
+                self.requests += await precompute_problem_assists(
+                    self._session_factory,
+                    job.problem_text,
+                    job.language,
+                    job.analysis,
+                    client=self._client,
+                )
+                self.completed += 1
+            except Exception:  # noqa: BLE001
+                self.failed += 1
+                logger.exception("Failed to precompute assists for a math problem")
+            finally:
+                self._queue.task_done()
+
+    def start(self) -> None:
+        """Start the background worker on the running event loop."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the worker; problems still queued are dropped."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+_precomputer: ProblemAssistPrecomputer | None = None
+
+
+def install_problem_assist_precomputer(
+    precomputer: ProblemAssistPrecomputer | None,
+) -> None:
+    """Register the process-wide precomputer used when problems are created."""
+    global _precomputer
+    _precomputer = precomputer
+
+
+def get_problem_assist_precomputer() -> ProblemAssistPrecomputer | None:
+    """Return the active precomputer, or None when OpenAI is not configured."""
+    return _precomputer
+
+
+__all__ = [
+    "DRAWING_SUGGESTIONS",
+    "MULTIPLICATION_TARGET",
+    "ProblemAssistPrecomputer",
+    "drawing_suggestions_key",
+    "get_problem_assist_precomputer",
+    "install_problem_assist_precomputer",
+    "lookup_assist",
+    "multiplication_segments",
+    "multiplication_target_key",
+    "precompute_problem_assists",
+]
@@ -0,0 +1,96 @@
+"""Client-side rate limiting for outbound API calls."""
+
+from __future__ import annotations
+
+import asyncio
+import re
+import time
+from typing import Callable, Mapping
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_UNIT_SECONDS = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+
+
+def parse_reset_duration(value: str) -> float | None:
+    """Parse OpenAI reset durations such as ``"1s"``, ``"6m0s"`` or ``"20ms"``."""
+    value = value.strip()
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if not parts or "".join(num + unit for num, unit in parts) != value:
+        return None
+    return sum(float(num) * _UNIT_SECONDS[unit] for num, unit in parts)
+
+
+class TokenBucket:
+    """Token bucket that also honors rate-limit headers from responses.
+
+    ``acquire`` waits for a token; callers queue in FIFO order. After a
+    response says no requests remain, or a 429 carries ``Retry-After``,
+    every caller waits until the server-side window resets.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: float,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._tokens = capacity
+        self._updated = clock()
+        self._blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    async def acquire(self) -> None:
+        """Wait until a request may be sent and consume one token."""
+        async with self._lock:
+            while True:
+                now = self._clock()
+                self._refill(now)
+                wait = self._blocked_until - now
+                if wait <= 0:
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait = (1 - self._tokens) / self.rate
+                await asyncio.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        """Hold back all requests for ``seconds``."""
+        self._blocked_until = max(self._blocked_until, self._clock() + seconds)
+
+    def observe_headers(self, headers: Mapping[str, str]) -> None:
+        """Pause according to ``Retry-After`` or exhausted request quotas."""
+        retry_after_ms = headers.get("retry-after-ms")
+        retry_after = headers.get("retry-after")
+        if retry_after_ms is not None:
+            delay = parse_reset_duration(retry_after_ms)
+            if delay is not None:
+                self.pause(delay / 1000)
+                return
+        if retry_after is not None:
+            delay = parse_reset_duration(retry_after)
+            if delay is not None:
+                self.pause(delay)
+                return
+        if headers.get("x-ratelimit-remaining-requests", "").strip() == "0":
+            delay = parse_reset_duration(headers.get("x-ratelimit-reset-requests", ""))
+            if delay is not None:
+                self.pause(delay)
+
+
+__all__ = ["TokenBucket", "parse_reset_duration"]
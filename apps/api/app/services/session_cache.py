@@ -0,0 +1,153 @@
+"""In-process cache of validated user sessions."""
+
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import TypeVar, cast
+
+from sqlalchemy import inspect
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.config import Settings
+from app.models import Base, User, UserSession
+
+ModelT = TypeVar("ModelT", bound=Base)
+
+
+def _detached_copy(instance: ModelT) -> ModelT:
+    """Return a session-less copy of the column values of an ORM instance.
+
+    Cached entries are shared between requests, so they must never be attached
+    to (or expired by) a request-scoped session.
+    """
+    mapper = inspect(instance).mapper
+    copy = mapper.class_manager.new_instance()
+    for column_attr in mapper.column_attrs:
+        set_committed_value(copy, column_attr.key, getattr(instance, column_attr.key))
+    return cast(ModelT, copy)
+
+
+@dataclass
+class CachedSession:
+    """Snapshot of a validated session and its user."""
+
+    user_session: UserSession
+    user: User
+    cached_at: float
+
+    @classmethod
+    def from_records(cls, user_session: UserSession, user: User) -> "CachedSession":
+        """Build a cache entry from freshly validated ORM records."""
+        user_copy = _detached_copy(user)
+        classroom = user.classroom
+        set_committed_value(
+            user_copy,
+            "classroom",
+            _detached_copy(classroom) if classroom is not None else None,
+        )
+        return cls(
+            user_session=_detached_copy(user_session),
+            user=user_copy,
+            cached_at=time.monotonic(),
+        )
+
+
+class SessionCache:
+    """TTL-bounded LRU cache of validated sessions keyed by session id."""
+
+    def __init__(self, *, ttl_seconds: float, max_entries: int) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, CachedSession] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def enabled(self) -> bool:
+        """Return True when the cache is allowed to hold entries."""
+        return self.ttl_seconds > 0 and self.max_entries > 0
+
+    def get(self, session_id: str) -> CachedSession | None:
+        """Return a fresh entry for the session id, evicting stale ones."""
+        entry = self._entries.get(session_id)
+        if entry is None:
+            return None
+        if time.monotonic() - entry.cached_at >= self.ttl_seconds:
+            del self._entries[session_id]
+            return None
+        self._entries.move_to_end(session_id)
+        return entry
+
+    def put(self, user_session: UserSession, user: User) -> None:
+        """Cache a validated session, evicting the least recently used entry."""
+        if not self.enabled:
+            return
+        self._entries[user_session.id] = CachedSession.from_records(user_session, user)
+        self._entries.move_to_end(user_session.id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, session_id: str) -> None:
+        """Drop a single session from the cache."""
+        self._entries.pop(session_id, None)
+
+    def invalidate_user(self, user_id: str) -> None:
+        """Drop every cached session belonging to a user."""
+        stale = [
+            session_id
+            for session_id, entry in self._entries.items()
+            if entry.user.id == user_id
+        ]
+        for session_id in stale:
+            del self._entries[session_id]
+
+    def invalidate_class(self, class_id: str) -> None:
+        """Drop every cached session whose user belongs to a classroom."""
+        stale = [
+            session_id
+            for session_id, entry in self._entries.items()
+            if entry.user.class_id == class_id
+        ]
+        for session_id in stale:
+            del self._entries[session_id]
+
+    def clear(self) -> None:
+        """Drop every cached session."""
+        self._entries.clear()
+
+
+_session_cache: SessionCache | None = None
+
+
+def get_session_cache(settings: Settings) -> SessionCache:
+    """Return the process-wide session cache, creating it on first use."""
+    global _session_cache
+    if _session_cache is None:
+        _session_cache = SessionCache(
+            ttl_seconds=settings.session_cache_ttl_seconds,
+            max_entries=settings.session_cache_max_entries,
+        )
+    return _session_cache
+
+
+def peek_session_cache() -> SessionCache | None:
+    """Return the session cache if it has been created."""
+    return _session_cache
+
+
+def reset_session_cache() -> None:
+    """Drop the process-wide session cache (useful for startup and tests)."""
+    global _session_cache
+    _session_cache = None
+
+
+__all__ = [
+    "CachedSession",
+    "SessionCache",
+    "get_session_cache",
+    "peek_session_cache",
+    "reset_session_cache",
+]
@@ -0,0 +1,169 @@
+"""Write-coalescing queue for rolling session expiry updates."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import cast
+
+from sqlalchemy import Table, bindparam, update
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.db import DatabaseWriter
+from app.models import UserSession
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class SessionTouch:
+    """Pending rolling-expiry update for a single session."""
+
+    session_id: str
+    last_seen_at: datetime
+    expires_at: datetime
+
+
+_user_sessions = cast(Table, UserSession.__table__)
+_TOUCH_STATEMENT = (
+    update(_user_sessions)
+    .where(
+        _user_sessions.c.id == bindparam("touch_id"),
+        _user_sessions.c.revoked_at.is_(None),
+    )
+    .values(
+        last_seen_at=bindparam("touch_last_seen_at"),
+        expires_at=bindparam("touch_expires_at"),
+    )
+)
+
+
+class SessionTouchBatcher:
+    """Collect session touches in memory and persist them in one executemany.
+
+    Only the newest touch per session is kept. The queue is flushed every
+    ``flush_interval`` seconds or as soon as ``max_batch`` sessions are pending.
+    The flush never clears ``revoked_at`` and never extends a session past the
+    ``expires_at`` computed by the caller, which is already capped by the
+    absolute expiry.
+    """
+
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        *,
+        flush_interval: float,
+        max_batch: int,
+        writer: DatabaseWriter | None = None,
+    ) -> None:
+        self._engine = engine
+        self._writer = writer
+        self.flush_interval = flush_interval
+        self.max_batch = max(1, max_batch)
+        self._pending: dict[str, SessionTouch] = {}
+        self._wake = asyncio.Event()
+        self._task: asyncio.Task[None] | None = None
+        self.flushed_total = 0
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def enqueue(self, touch: SessionTouch) -> None:
+        """Queue a touch, replacing any older pending touch for the session."""
+        self._pending[touch.session_id] = touch
+        if len(self._pending) >= self.max_batch:
+            self._wake.set()
+
+    def pending(self, session_id: str) -> SessionTouch | None:
+        """Return the not-yet-persisted touch for a session, if any."""
+        return self._pending.get(session_id)
+
+    def discard(self, session_id: str) -> None:
+        """Forget a pending touch (e.g. because the session was revoked)."""
+        self._pending.pop(session_id, None)
+
+    async def flush(self) -> int:
+        """Persist all pending touches and return how many were written."""
+        if not self._pending:
+            return 0
+        batch = list(self._pending.values())
+        self._pending = {}
+        params = [
+            {
+                "touch_id": touch.session_id,
+                "touch_last_seen_at": touch.last_seen_at,
+                "touch_expires_at": touch.expires_at,
+            }
+            for touch in batch
+        ]
+        try:
+            if self._writer is not None:
+                async with self._writer:
+                    await self._execute(params)
+            else:
+                await self._execute(params)
+        except Exception:
+            # Re-queue unless a newer touch arrived while we were writing.
+            for touch in batch:
+                self._pending.setdefault(touch.session_id, touch)
+            raise
+        self.flushed_total += len(batch)
+        return len(batch)
+
+    async def _execute(self, params: list[dict[str, object]]) -> None:
+        """Run the batched UPDATE in its own transaction."""
+        async with self._engine.begin() as conn:
+            await conn.execute(_TOUCH_STATEMENT, params)
+
+    async def _run(self) -> None:
+        """Flush periodically until cancelled."""
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.flush()
+            except Exception:  # noqa: BLE001
+                logger.exception("Failed to flush %d session touches", len(self))
+
+    def start(self) -> None:
+        """Start the background flush loop on the running event loop."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the flush loop and persist anything still pending."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+
+_touch_batcher: SessionTouchBatcher | None = None
+
+
+def install_touch_batcher(batcher: SessionTouchBatcher | None) -> None:
+    """Register the process-wide batcher used by session validation."""
+    global _touch_batcher
+    _touch_batcher = batcher
+
+
+def get_touch_batcher() -> SessionTouchBatcher | None:
+    """Return the active batcher, or None when touches are written inline."""
+    return _touch_batcher
+
+
+__all__ = [
+    "SessionTouch",
+    "SessionTouchBatcher",
+    "get_touch_batcher",
+    "install_touch_batcher",
+]
@@ -4,14 +4,25 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import Callable, Optional
 
-from sqlalchemy import select
+from sqlalchemy import event, select
+from sqlalchemy.engine import Connection
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Mapper, Session, SessionTransaction, object_session
+from sqlalchemy.orm.attributes import set_committed_value
 
 from app.config import Settings
-from app.models import LearningSession, User, UserSession
+from app.models import Classroom, LearningSession, User, UserSession
 from app.services import learning, security
+from app.services.session_cache import (
+    SessionCache,
+    get_session_cache,
+    peek_session_cache,
+)
+from app.services.session_touch import SessionTouch, get_touch_batcher
+
+_PENDING_KEY = "session_cache_invalidations"
 
 
 def _now() -> datetime:
@@ -30,11 +41,71 @@ async def revoke_active_sessions(
         )
     )
     records = list(result.scalars().all())
+    batcher = get_touch_batcher()
     for record in records:
         record.revoked_at = when
+        if batcher is not None:
+            batcher.discard(record.id)
+    invalidate_cached_sessions(user_id, session)
     return records
 
 
+def invalidate_cached_sessions(
+    user_id: str, db_session: AsyncSession | None = None
+) -> None:
+    """Drop cached validations for a user whose sessions or profile changed.
+
+    Pass the session that made the change so the entries are dropped again
+    once it commits; otherwise a validation running before the commit could
+    re-cache the old rows.
+    """
+    _invalidate(db_session, lambda cache: cache.invalidate_user(user_id))
+
+
+def _invalidate(
+    db_session: AsyncSession | Session | None, drop: Callable[[SessionCache], None]
+) -> None:
+    """Apply ``drop`` to the cache now and again after ``db_session`` commits."""
+    cache = peek_session_cache()
+    if cache is not None:
+        drop(cache)
+    if db_session is None:
+        return
+    sync_session = (
+        db_session.sync_session if isinstance(db_session, AsyncSession) else db_session
+    )
+    pending = sync_session.info.get(_PENDING_KEY)
+    if pending is None:
+        pending = sync_session.info[_PENDING_KEY] = []
+        event.listen(sync_session, "after_commit", _run_pending)
+        event.listen(sync_session, "after_transaction_end", _drop_pending)
+    pending.append(drop)
+
+
+def _run_pending(sync_session: Session) -> None:
+    cache = peek_session_cache()
+    if cache is not None:
+        for drop in sync_session.info[_PENDING_KEY]:
+            drop(cache)
+
+
+def _drop_pending(sync_session: Session, transaction: SessionTransaction) -> None:
+    if transaction.parent is None:
+        sync_session.info[_PENDING_KEY].clear()
+
+
+@event.listens_for(Classroom, "after_update")
+@event.listens_for(Classroom, "after_delete")
+def _invalidate_class_members(
+    _mapper: Mapper[Classroom], _connection: Connection, classroom: Classroom
+) -> None:
+    """Cached users carry their classroom, so a changed class drops its members."""
+    class_id = classroom.id
+    _invalidate(
+        object_session(classroom), lambda cache: cache.invalidate_class(class_id)
+    )
+
+
 def _rolling_expiry(settings: Settings, absolute_expires_at: datetime) -> datetime:
     """Compute next rolling expiry capped by the absolute expiry."""
     next_expiry = _now() + timedelta(hours=settings.session_ttl_hours)
@@ -79,18 +150,77 @@ def _normalize_ts(timestamp: datetime) -> datetime:
     return timestamp.astimezone(timezone.utc)
 
 
+def _is_live(record: UserSession, now: datetime) -> bool:
+    """Return True when the session is neither revoked nor expired."""
+    return (
+        record.revoked_at is None
+        and _normalize_ts(record.expires_at) > now
+        and _normalize_ts(record.absolute_expires_at) > now
+    )
+
+
+def _build_touch(
+    record: UserSession, settings: Settings, now: datetime
+) -> SessionTouch:
+    """Return the rolling-expiry update for a session seen at ``now``."""
+    return SessionTouch(
+        session_id=record.id,
+        last_seen_at=now,
+        expires_at=_rolling_expiry(settings, _normalize_ts(record.absolute_expires_at)),
+    )
+
+
+def _touch_due(record: UserSession, settings: Settings, now: datetime) -> bool:
+    """Return True when the rolling expiry should be persisted again."""
+    interval = timedelta(seconds=settings.session_touch_interval_seconds)
+    return now - _normalize_ts(record.last_seen_at) >= interval
+
+
+def _apply_touch(record: UserSession, touch: SessionTouch) -> None:
+    """Reflect a queued touch on a record without marking it dirty."""
+    set_committed_value(record, "last_seen_at", touch.last_seen_at)
+    set_committed_value(record, "expires_at", touch.expires_at)
+
+
 async def validate_session(
     db_session: AsyncSession, session_id: str, settings: Settings
 ) -> "SessionValidation":
-    """Return session validation result with mutation flag."""
+    """Return session validation result with mutation flag.
+
+    Live sessions are served from the in-process cache. When the rolling
+    expiry is due for a refresh, the update is handed to the touch batcher so
+    validation itself stays read-only; without a batcher it is flushed inline.
+    """
+    cache = get_session_cache(settings)
+    batcher = get_touch_batcher()
+    now = _now()
+    cached = cache.get(session_id)
+    if cached is not None:
+        if _is_live(cached.user_session, now):
+            if not _touch_due(cached.user_session, settings, now):
+                return SessionValidation(
+                    user_session=cached.user_session, user=cached.user, mutated=False
+                )
+            if batcher is not None:
+                touch = _build_touch(cached.user_session, settings, now)
+                batcher.enqueue(touch)
+                _apply_touch(cached.user_session, touch)
+                return SessionValidation(
+                    user_session=cached.user_session, user=cached.user, mutated=False
+                )
+        cache.invalidate(session_id)
+
     record = await db_session.get(UserSession, session_id)
     if record is None:
         return SessionValidation.empty(mutated=False)
 
-    now = _now()
-    expires_at = _normalize_ts(record.expires_at)
-    absolute_expires_at = _normalize_ts(record.absolute_expires_at)
-    if record.revoked_at is not None or expires_at <= now or absolute_expires_at <= now:
+    pending = batcher.pending(session_id) if batcher is not None else None
+    if pending is not None:
+        _apply_touch(record, pending)
+
+    if not _is_live(record, now):
+        if batcher is not None:
+            batcher.discard(session_id)
         record.revoked_at = record.revoked_at or now
         await learning.end_learning_session(
             db_session, record.learning_session_id, ended_at=now
@@ -98,10 +228,19 @@ async def validate_session(
         await db_session.flush()
         return SessionValidation.empty(mutated=True)
 
-    record.last_seen_at = now
-    record.expires_at = _rolling_expiry(settings, absolute_expires_at)
-    await db_session.flush()
-    return SessionValidation(user_session=record, user=record.user, mutated=True)
+    mutated = False
+    if _touch_due(record, settings, now):
+        touch = _build_touch(record, settings, now)
+        if batcher is not None:
+            batcher.enqueue(touch)
+            _apply_touch(record, touch)
+        else:
+            record.last_seen_at = touch.last_seen_at
+            record.expires_at = touch.expires_at
+            await db_session.flush()
+            mutated = True
+    cache.put(record, record.user)
+    return SessionValidation(user_session=record, user=record.user, mutated=mutated)
 
 
 async def revoke_session_by_id(
@@ -113,6 +252,10 @@ async def revoke_session_by_id(
         return None
     if record.revoked_at is None:
         record.revoked_at = revoked_at or _now()
+    _invalidate(db_session, lambda cache: cache.invalidate(session_id))
+    batcher = get_touch_batcher()
+    if batcher is not None:
+        batcher.discard(session_id)
     return record
 
 
@@ -133,6 +276,7 @@ class SessionValidation:
 __all__ = [
     "SessionValidation",
     "create_user_session",
+    "invalidate_cached_sessions",
     "revoke_active_sessions",
     "revoke_session_by_id",
     "validate_session",
@@ -2,13 +2,15 @@
 
 from __future__ import annotations
 
+from collections.abc import AsyncIterator
 from dataclasses import dataclass
 from datetime import date, datetime, timedelta, timezone
 
-from sqlalchemy import select
+from sqlalchemy import func, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models import LearningSession
+from app.models import LearningSession, UserActivityDay, UserStreakSummary
 
 
 @dataclass
@@ -31,46 +33,64 @@ class StreakResult:
     activity_history: list[str]
 
 
-def _get_active_dates(sessions: list[LearningSession]) -> set[date]:
-    """Extract unique dates (UTC) from learning sessions."""
-    return {session.started_at.date() for session in sessions}
+async def _stream_session_dates(
+    session: AsyncSession, user_id: str
+) -> AsyncIterator[date]:
+    """Yield the user's distinct learning days in order, computed in SQL.
 
-
-def _calculate_current_streak(active_dates: set[date], today: date) -> int:
-    """
-    Calculate current streak: consecutive days backward from today.
-
-    Returns 0 if today has no activity, otherwise counts back until a gap.
+    Only ``date(started_at)`` strings are fetched, never full session rows.
     """
-    if today not in active_dates:
-        return 0
+    day = func.date(LearningSession.started_at)
+    result = await session.stream_scalars(
+        select(day).where(LearningSession.user_id == user_id).distinct().order_by(day)
+    )
+    async for value in result:
+        yield date.fromisoformat(value)
+
+
+async def _load_activity_dates(
+    session: AsyncSession,
+    user_id: str,
+    start: date | None = None,
+    end: date | None = None,
+) -> list[date]:
+    """Return materialized activity days for a user, optionally bounded, in order."""
+    stmt = select(UserActivityDay.activity_date).where(
+        UserActivityDay.user_id == user_id
+    )
+    if start is not None:
+        stmt = stmt.where(UserActivityDay.activity_date >= start)
+    if end is not None:
+        stmt = stmt.where(UserActivityDay.activity_date <= end)
+    result = await session.execute(stmt.order_by(UserActivityDay.activity_date))
+    return list(result.scalars())
 
-    streak = 0
-    current = today
-    while current in active_dates:
-        streak += 1
-        current -= timedelta(days=1)
 
-    return streak
+@dataclass
+class _RunScan:
+    """Single pass over ascending dates tracking the latest and longest runs."""
 
+    last_run: int = 0
+    longest: int = 0
+    last_date: date | None = None
 
-def _calculate_longest_streak(active_dates: set[date]) -> int:
-    """Calculate the longest consecutive streak in the entire history."""
-    if not active_dates:
-        return 0
+    def add(self, day: date) -> None:
+        """Advance the scan by the next (strictly later) active day."""
+        if self.last_date is not None and day == self.last_date + timedelta(days=1):
+            self.last_run += 1
+        else:
+            self.last_run = 1
+        self.longest = max(self.longest, self.last_run)
+        self.last_date = day
 
-    sorted_dates = sorted(active_dates)
-    longest = 1
-    current = 1
+    def current_streak(self, today: date) -> int:
+        """Return the run ending today, or 0 when today has no activity."""
+        return self.last_run if self.last_date == today else 0
 
-    for i in range(1, len(sorted_dates)):
-        if sorted_dates[i] == sorted_dates[i - 1] + timedelta(days=1):
-            current += 1
-            longest = max(longest, current)
-        else:
-            current = 1
 
-    return longest
+def _in_range(day: date, start: date | None, end: date | None) -> bool:
+    """Return True when ``day`` lies within the optional inclusive bounds."""
+    return (start is None or day >= start) and (end is None or day <= end)
 
 
 def _get_current_week_range(today: date) -> tuple[date, date]:
@@ -110,8 +130,82 @@ def _build_weekly_activity(
     return result
 
 
+async def rebuild_streak_summary(
+    session: AsyncSession, user_id: str
+) -> UserStreakSummary:
+    """Backfill activity days from learning sessions and recompute the summary."""
+    await session.execute(
+        sqlite_insert(UserActivityDay)
+        .from_select(
+            ["user_id", "activity_date"],
+            select(LearningSession.user_id, func.date(LearningSession.started_at))
+            .where(LearningSession.user_id == user_id)
+            .distinct(),
+        )
+        .on_conflict_do_nothing()
+    )
+    scan = _RunScan()
+    days = await session.stream_scalars(
+        select(UserActivityDay.activity_date)
+        .where(UserActivityDay.user_id == user_id)
+        .order_by(UserActivityDay.activity_date)
+    )
+    async for day in days:
+        scan.add(day)
+
+    summary = await session.get(UserStreakSummary, user_id)
+    if summary is None:
+        summary = UserStreakSummary(user_id=user_id)
+        session.add(summary)
+    summary.current_streak = scan.last_run
+    summary.longest_streak = scan.longest
+    summary.last_active_date = scan.last_date
+    await session.flush()
+    return summary
+
+
+async def record_activity(
+    session: AsyncSession, user_id: str, started_at: datetime
+) -> UserStreakSummary:
+    """Record a learning day and advance the cached streak counters.
+
+    Only the first session of a day touches the summary. Users without a
+    summary yet (or backdated sessions) fall back to a full rebuild.
+    """
+    day = started_at.date()
+    summary = await session.get(UserStreakSummary, user_id)
+    if summary is None:
+        return await rebuild_streak_summary(session, user_id)
+
+    inserted = await session.execute(
+        sqlite_insert(UserActivityDay)
+        .values(user_id=user_id, activity_date=day)
+        .on_conflict_do_nothing()
+        .returning(UserActivityDay.activity_date)
+    )
+    if inserted.first() is None:
+        return summary
+
+    last_active = summary.last_active_date
+    if last_active is not None and day < last_active:
+        return await rebuild_streak_summary(session, user_id)
+    if last_active is not None and day == last_active + timedelta(days=1):
+        summary.current_streak += 1
+    else:
+        summary.current_streak = 1
+    summary.longest_streak = max(summary.longest_streak, summary.current_streak)
+    summary.last_active_date = day
+    await session.flush()
+    return summary
+
+
 async def calculate_streak(
-    session: AsyncSession, user_id: str, *, now: datetime | None = None
+    session: AsyncSession,
+    user_id: str,
+    *,
+    now: datetime | None = None,
+    history_from: date | None = None,
+    history_to: date | None = None,
 ) -> StreakResult:
     """
     Calculate current streak, longest streak, and weekly activity for a user.
@@ -120,6 +214,8 @@ async def calculate_streak(
         session: Database session
         user_id: User ID to calculate streak for
         now: Optional override for current time (defaults to UTC now, for testing)
+        history_from: Optional first day (inclusive) of the returned activity history
+        history_to: Optional last day (inclusive) of the returned activity history
 
     Returns:
         StreakResult with current/longest streaks and weekly calendar
@@ -128,24 +224,35 @@ async def calculate_streak(
         now = datetime.now(timezone.utc)
 
     today = now.date()
+    monday, sunday = _get_current_week_range(today)
+
+    summary = await session.get(UserStreakSummary, user_id)
+    if summary is None:
+        # Not materialized yet (the next login backfills it): one ordered pass
+        # over the distinct session dates computed in SQL.
+        scan = _RunScan()
+        week_dates: set[date] = set()
+        history_dates: list[date] = []
+        async for day in _stream_session_dates(session, user_id):
+            scan.add(day)
+            if monday <= day <= sunday:
+                week_dates.add(day)
+            if _in_range(day, history_from, history_to):
+                history_dates.append(day)
+        current_streak = scan.current_streak(today)
+        longest_streak = scan.longest
+    else:
+        current_streak = (
+            summary.current_streak if summary.last_active_date == today else 0
+        )
+        longest_streak = summary.longest_streak
+        week_dates = set(await _load_activity_dates(session, user_id, monday, sunday))
+        history_dates = await _load_activity_dates(
+            session, user_id, history_from, history_to
+        )
 
-    # Fetch all learning sessions for this user
-    stmt = select(LearningSession).where(LearningSession.user_id == user_id)
-    result = await session.execute(stmt)
-    sessions = list(result.scalars().all())
-
-    # Extract unique active dates
-    active_dates = _get_active_dates(sessions)
-
-    # Calculate streaks
-    current_streak = _calculate_current_streak(active_dates, today)
-    longest_streak = _calculate_longest_streak(active_dates)
-
-    # Build weekly activity
-    weekly_activity = _build_weekly_activity(active_dates, today)
-
-    # Build full activity history (sorted ISO date strings)
-    activity_history = sorted(d.isoformat() for d in active_dates)
+    weekly_activity = _build_weekly_activity(week_dates, today)
+    activity_history = [day.isoformat() for day in history_dates]
 
     return StreakResult(
         current_streak=current_streak,
@@ -159,4 +266,6 @@ __all__ = [
     "StreakResult",
     "WeeklyActivityDay",
     "calculate_streak",
+    "rebuild_streak_summary",
+    "record_activity",
 ]
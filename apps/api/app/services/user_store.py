@@ -11,7 +11,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import Settings
 from app.models import User, UserRefreshToken
-from app.services import security
+from app.services import security, sessions
 
 
 def _normalize_email(value: str) -> str:
@@ -105,6 +105,7 @@ async def update_user(
         user.gender = gender
     user.updated_at = datetime.now(timezone.utc)
     await session.flush()
+    sessions.invalidate_cached_sessions(user.id, session)
     return user
 
 
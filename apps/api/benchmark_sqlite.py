@@ -0,0 +1,168 @@
+"""Compare concurrent SQLite throughput of the default and tuned engine profiles.
+
+Run it against the same volume layout the docker-compose deployment uses, e.g.
+inside the api container:
+
+    uv run benchmark_sqlite.py --db-dir /data --seconds 10
+
+The script creates (and removes) its own ``bench-*.db`` files in ``--db-dir`` so
+it never touches ``auth.db``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any
+from uuid import uuid4
+
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import OperationalError
+
+from app.config import Settings
+from app.db import (
+    DatabaseWriter,
+    create_engine,
+    create_read_engine,
+    create_session_factory,
+    run_schema_migrations,
+)
+from app.models import LearningSession, MathWordProblem, User, UserSession
+
+BASELINE_OVERRIDES: dict[str, Any] = {
+    "sqlite_journal_mode": "delete",
+    "sqlite_synchronous": "full",
+    "sqlite_mmap_size": 0,
+    "sqlite_cache_size": -2000,
+    "sqlite_busy_timeout_ms": 5_000,
+    "sqlite_temp_store": "default",
+    "sqlite_read_pool_size": 0,
+}
+
+
+async def _seed(settings: Settings, sessions_count: int) -> list[str]:
+    """Create schema plus users/sessions/problems and return the session ids."""
+    engine = create_engine(settings)
+    await run_schema_migrations(engine)
+    factory = create_session_factory(engine)
+    now = datetime.now(timezone.utc)
+    session_ids: list[str] = []
+    async with factory() as db:
+        for index in range(sessions_count):
+            user = User(id=str(uuid4()), role="student", first_name=f"Kid {index}")
+            learning = LearningSession(id=str(uuid4()), user_id=user.id, started_at=now)
+            record = UserSession(
+                id=str(uuid4()),
+                user_id=user.id,
+                learning_session_id=learning.id,
+                issued_at=now,
+                expires_at=now + timedelta(hours=3),
+                absolute_expires_at=now + timedelta(hours=24),
+                last_seen_at=now,
+            )
+            db.add_all([user, learning, record])
+            session_ids.append(record.id)
+        for index in range(200):
+            db.add(
+                MathWordProblem(
+                    id=str(uuid4()),
+                    problem_text=f"Problem {index}",
+                    analysis={"steps": ["count"] * 10},
+                    grade=3 + index % 2,
+                    language="en",
+                    difficulty_level="easy",
+                )
+            )
+        await db.commit()
+    await engine.dispose()
+    return session_ids
+
+
+async def _run_profile(
+    label: str, settings: Settings, *, readers: int, writers: int, seconds: float
+) -> None:
+    """Hammer one database with concurrent readers and writers and print ops/s."""
+    session_ids = await _seed(settings, sessions_count=max(writers, 1) * 10)
+    engine = create_engine(settings)
+    read_engine = create_read_engine(settings)
+    # Mirror the app: the tuned profile queues writers instead of busy-waiting.
+    write_queue = DatabaseWriter() if label == "tuned" else None
+    write_factory = create_session_factory(engine, writer=write_queue)
+    read_factory = create_session_factory(read_engine or engine)
+    deadline = time.perf_counter() + seconds
+    counts = {"reads": 0, "writes": 0, "locked": 0}
+
+    async def reader(worker: int) -> None:
+        while time.perf_counter() < deadline:
+            async with read_factory() as db:
+                await db.execute(
+                    select(MathWordProblem).where(
+                        MathWordProblem.grade == 3 + worker % 2
+                    )
+                )
+                await db.execute(select(func.count()).select_from(UserSession))
+            counts["reads"] += 1
+
+    async def writer(worker: int) -> None:
+        index = worker
+        while time.perf_counter() < deadline:
+            session_id = session_ids[index % len(session_ids)]
+            index += writers
+            try:
+                async with write_factory() as db:
+                    await db.execute(
+                        update(UserSession)
+                        .where(UserSession.id == session_id)
+                        .values(last_seen_at=datetime.now(timezone.utc))
+                    )
+                    await db.commit()
+                counts["writes"] += 1
+            except OperationalError:
+                counts["locked"] += 1
+
+    await asyncio.gather(
+        *(reader(i) for i in range(readers)), *(writer(i) for i in range(writers))
+    )
+    if read_engine is not None:
+        await read_engine.dispose()
+    await engine.dispose()
+    print(
+        f"{label:>8}: {counts['reads'] / seconds:8.1f} reads/s  "
+        f"{counts['writes'] / seconds:8.1f} writes/s  "
+        f"{counts['locked']} locked errors"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=(__doc__ or "").splitlines()[0])
+    parser.add_argument("--db-dir", default=None, help="Directory for bench DBs.")
+    parser.add_argument("--readers", type=int, default=30)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.db_dir) as directory:
+        profiles: list[tuple[str, dict[str, Any]]] = [
+            ("baseline", BASELINE_OVERRIDES),
+            ("tuned", {}),
+        ]
+        for label, overrides in profiles:
+            db_path = Path(directory) / f"bench-{label}.db"
+            settings = Settings(
+                sqlite_url=f"sqlite+aiosqlite:///{db_path}", sqlite_echo=False
+            ).model_copy(update=overrides)
+            await _run_profile(
+                label,
+                settings,
+                readers=args.readers,
+                writers=args.writers,
+                seconds=args.seconds,
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
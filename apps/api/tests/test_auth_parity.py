@@ -1,15 +1,21 @@
 from __future__ import annotations
 
 import asyncio
-from typing import cast
+from collections.abc import Awaitable, Callable
+from typing import TypeVar, cast
 
 import jwt
 from fastapi import FastAPI
 from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models import UserSession
+from app.models import Classroom, UserSession
+from app.services.session_cache import peek_session_cache
+from app.services.sessions import revoke_active_sessions
 from tests.test_auth_flow import _login, unique_email
 
+T = TypeVar("T")
+
 
 async def _fetch_session(app: FastAPI, session_id: str) -> UserSession | None:
     """Return a user session by id."""
@@ -17,6 +23,13 @@ async def _fetch_session(app: FastAPI, session_id: str) -> UserSession | None:
         return await db.get(UserSession, session_id)
 
 
+def _call_in_app_loop(client: TestClient, func: Callable[[], Awaitable[T]]) -> T:
+    """Run a coroutine function on the TestClient's event loop."""
+    portal = client.portal
+    assert portal is not None
+    return portal.call(func)
+
+
 def test_cookie_and_bearer_mismatch_returns_401(client: TestClient) -> None:
     """A stale cookie paired with another user's bearer token is rejected."""
     app = cast(FastAPI, client.app)
@@ -71,6 +84,8 @@ def test_cookie_and_bearer_mismatch_returns_401(client: TestClient) -> None:
 def test_bearer_only_updates_session_activity(client: TestClient) -> None:
     """Bearer-only calls still roll session activity via sid claim validation."""
     app = cast(FastAPI, client.app)
+    # Persist the rolling expiry on every hit instead of once per interval.
+    app.state.settings.session_touch_interval_seconds = 0
     admin_tokens = _login(client, "admin@example.com", "adminpw")
     session_id = admin_tokens["sessionId"]
 
@@ -89,6 +104,8 @@ def test_bearer_only_updates_session_activity(client: TestClient) -> None:
         },
     )
     assert register_resp.status_code == 201
+    # Touches are coalesced in memory; force the pending batch to disk.
+    _call_in_app_loop(client, app.state.session_touch_batcher.flush)
 
     after = asyncio.run(_fetch_session(app, session_id))
     assert after is not None
@@ -126,3 +143,146 @@ def test_tokens_carry_session_and_guest_claims(client: TestClient) -> None:
     assert guest_claims["sid"] == guest_tokens["sessionId"]
     assert guest_claims["lsid"] == guest_tokens["learningSessionId"]
     assert guest_tokens["refreshToken"] is None
+
+
+def test_session_activity_writes_are_throttled(client: TestClient) -> None:
+    """Repeated calls inside the touch interval do not rewrite the session row."""
+    app = cast(FastAPI, client.app)
+    admin_tokens = _login(client, "admin@example.com", "adminpw")
+    session_id = admin_tokens["sessionId"]
+
+    before = asyncio.run(_fetch_session(app, session_id))
+    assert before is not None
+
+    for _ in range(3):
+        response = client.get(
+            "/v1/me", headers={"Authorization": f"Bearer {admin_tokens['accessToken']}"}
+        )
+        assert response.status_code == 200
+
+    after = asyncio.run(_fetch_session(app, session_id))
+    assert after is not None
+    assert after.last_seen_at == before.last_seen_at
+    assert after.expires_at == before.expires_at
+
+
+def test_logout_invalidates_cached_session(client: TestClient) -> None:
+    """A revoked session is not served from the validation cache."""
+    app = cast(FastAPI, client.app)
+    login_body = _login(client, "admin@example.com", "adminpw")
+    cookie_name = app.state.settings.session_cookie_name
+    session_id = client.cookies.get(cookie_name)
+    assert session_id
+
+    assert client.get("/v1/me").status_code == 200
+
+    logout_resp = client.post(
+        "/v1/auth/logout", json={"refreshToken": login_body["refreshToken"]}
+    )
+    assert logout_resp.status_code == 204
+
+    client.cookies.set(cookie_name, session_id)
+    assert client.get("/v1/me").status_code == 401
+    bearer_resp = client.get(
+        "/v1/me", headers={"Authorization": f"Bearer {login_body['accessToken']}"}
+    )
+    assert bearer_resp.status_code == 401
+
+
+def test_session_touches_are_coalesced_until_flush(client: TestClient) -> None:
+    """Read-only requests queue expiry updates instead of writing them inline."""
+    app = cast(FastAPI, client.app)
+    app.state.settings.session_touch_interval_seconds = 0
+    admin_tokens = _login(client, "admin@example.com", "adminpw")
+    session_id = admin_tokens["sessionId"]
+    batcher = app.state.session_touch_batcher
+    # Stop the periodic loop (flushing what is queued) so only we flush below.
+    _call_in_app_loop(client, batcher.stop)
+
+    before = asyncio.run(_fetch_session(app, session_id))
+    assert before is not None
+
+    for _ in range(3):
+        response = client.get(
+            "/v1/me", headers={"Authorization": f"Bearer {admin_tokens['accessToken']}"}
+        )
+        assert response.status_code == 200
+
+    unchanged = asyncio.run(_fetch_session(app, session_id))
+    assert unchanged is not None
+    assert unchanged.last_seen_at == before.last_seen_at
+
+    assert _call_in_app_loop(client, batcher.flush) == 1
+    after = asyncio.run(_fetch_session(app, session_id))
+    assert after is not None
+    assert after.last_seen_at > before.last_seen_at
+    assert after.expires_at <= after.absolute_expires_at
+
+
+async def _start_revoke(app: FastAPI, user_id: str) -> AsyncSession:
+    """Revoke a user's sessions in a transaction that is not yet committed."""
+    db = app.state.db_session()
+    await revoke_active_sessions(db, user_id)
+    await db.flush()
+    return db
+
+
+async def _commit_and_close(db: AsyncSession) -> None:
+    await db.commit()
+    await db.close()
+
+
+def test_cached_sessions_are_dropped_after_commit(client: TestClient) -> None:
+    """Revocations and classroom edits reach the cache once they commit."""
+    app = cast(FastAPI, client.app)
+    teacher = client.post(
+        "/v1/auth/register",
+        json={
+            "email": unique_email("cache-teacher"),
+            "password": "pw",
+            "role": "teacher",
+        },
+    )
+    assert teacher.status_code == 201
+    teacher_auth = {"Authorization": f"Bearer {teacher.json()['accessToken']}"}
+    classroom = client.post(
+        "/v1/classes", headers=teacher_auth, json={"grade": 3, "suffix": "c"}
+    ).json()
+    student_email = unique_email("cache-student")
+    created = client.post(
+        f"/v1/classes/{classroom['id']}/students",
+        headers=teacher_auth,
+        json={"email": student_email, "password": "studpw", "role": "student"},
+    )
+    assert created.status_code == 201
+    client.cookies.clear()
+    student = _login(client, student_email, "studpw")
+    student_auth = {"Authorization": f"Bearer {student['accessToken']}"}
+    cache = peek_session_cache()
+    assert cache is not None
+
+    assert client.get("/v1/me", headers=student_auth).status_code == 200
+    assert cache.get(student["sessionId"]) is not None
+
+    async def _regrade() -> None:
+        async with app.state.db_session() as db:
+            classroom_row = await db.get(Classroom, classroom["id"])
+            assert classroom_row is not None
+            classroom_row.grade = 4
+            await db.commit()
+
+    _call_in_app_loop(client, _regrade)
+    assert cache.get(student["sessionId"]) is None
+    assert client.get("/v1/me", headers=student_auth).status_code == 200
+    cached = cache.get(student["sessionId"])
+    assert cached is not None and cached.user.classroom is not None
+    assert cached.user.classroom.grade == 4
+
+    # A validation racing the uncommitted revoke re-caches the old row...
+    user_id = student["user"]["id"]
+    db = _call_in_app_loop(client, lambda: _start_revoke(app, user_id))
+    assert client.get("/v1/me", headers=student_auth).status_code == 200
+    assert cache.get(student["sessionId"]) is not None
+    # ...and the commit drops it again.
+    _call_in_app_loop(client, lambda: _commit_and_close(db))
+    assert client.get("/v1/me", headers=student_auth).status_code == 401
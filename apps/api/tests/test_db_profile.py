@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import asyncio
+from typing import cast
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import select, text, update
+from sqlalchemy.exc import OperationalError
+
+from app.config import Settings
+from app.db import WriterReentryError, sqlite_pragmas
+from app.models import User
+
+
+async def _pragma(app: FastAPI, factory_name: str, pragma: str) -> object:
+    """Return a PRAGMA value as seen by one of the app's session factories."""
+    async with getattr(app.state, factory_name)() as db:
+        result = await db.execute(text(f"PRAGMA {pragma}"))
+        return result.scalar_one()
+
+
+async def _serialized_writes(app: FastAPI) -> list[str]:
+    """Run two overlapping write transactions and record their ordering."""
+    events: list[str] = []
+    first_wrote = asyncio.Event()
+
+    async def first() -> None:
+        async with app.state.db_session() as db:
+            await db.execute(update(User).values(xp=User.xp))
+            events.append("first-write")
+            first_wrote.set()
+            await asyncio.sleep(0.05)
+            events.append("first-commit")
+            await db.commit()
+
+    async def second() -> None:
+        await first_wrote.wait()
+        async with app.state.db_session() as db:
+            await db.execute(select(User.id))
+            events.append("second-read")
+            await db.execute(update(User).values(xp=User.xp))
+            events.append("second-write")
+            await db.commit()
+
+    await asyncio.gather(first(), second())
+    assert not app.state.db_writer.locked
+    return events
+
+
+async def _nested_write(app: FastAPI) -> None:
+    """Write through a second session while the first holds the writer."""
+    async with app.state.db_session() as outer:
+        await outer.execute(update(User).values(xp=User.xp))
+        async with app.state.db_session() as inner:
+            with pytest.raises(WriterReentryError):
+                await asyncio.wait_for(
+                    inner.execute(update(User).values(xp=User.xp)), timeout=1
+                )
+        await outer.commit()
+    # Once committed, the same task can claim the writer again.
+    async with app.state.db_session() as again:
+        await again.execute(update(User).values(xp=User.xp))
+        await again.commit()
+
+
+async def _write_with_read_session(app: FastAPI) -> None:
+    """Attempt a write through the query-only read pool."""
+    async with app.state.db_read_session() as db:
+        await db.execute(text("UPDATE users SET xp = xp"))
+
+
+def test_engine_applies_sqlite_profile(client: TestClient) -> None:
+    """Both pools run with WAL and the configured PRAGMA profile."""
+    app = cast(FastAPI, client.app)
+    assert asyncio.run(_pragma(app, "db_session", "journal_mode")) == "wal"
+    assert asyncio.run(_pragma(app, "db_read_session", "journal_mode")) == "wal"
+    assert asyncio.run(_pragma(app, "db_session", "synchronous")) == 1
+    assert asyncio.run(_pragma(app, "db_read_session", "query_only")) == 1
+    assert asyncio.run(_pragma(app, "db_session", "query_only")) == 0
+
+
+def test_read_pool_rejects_writes(client: TestClient) -> None:
+    """The read-only pool cannot be used to mutate data."""
+    app = cast(FastAPI, client.app)
+    with pytest.raises(OperationalError):
+        asyncio.run(_write_with_read_session(app))
+
+
+def test_write_transactions_are_serialized(client: TestClient) -> None:
+    """A second writer waits for the first to commit; its reads do not."""
+    app = cast(FastAPI, client.app)
+    assert client.portal is not None
+    # Run on the app's loop: the writer queue belongs to it.
+    assert client.portal.call(_serialized_writes, app) == [
+        "first-write",
+        "second-read",
+        "first-commit",
+        "second-write",
+    ]
+
+
+def test_nested_writer_fails_fast(client: TestClient) -> None:
+    """A task cannot wait on the writer slot it already holds."""
+    app = cast(FastAPI, client.app)
+    assert client.portal is not None
+    client.portal.call(_nested_write, app)
+
+
+def test_memory_database_skips_journal_mode() -> None:
+    """In-memory databases do not get a persistent journal mode."""
+    settings = Settings(sqlite_url="sqlite+aiosqlite:///:memory:")
+    pragmas = sqlite_pragmas(settings)
+    assert not any("journal_mode" in pragma for pragma in pragmas)
+    assert "PRAGMA query_only = ON" in sqlite_pragmas(settings, read_only=True)
@@ -0,0 +1,405 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import timedelta
+from typing import Any, cast
+from uuid import uuid4
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.models import NotificationCounter, utcnow
+from app.services import discussion as crud
+from app.services.notification_broker import (
+    NotificationEvent,
+    Subscription,
+    get_notification_broker,
+)
+from app.services.notification_retention import RetentionRun
+
+
+def unique_email(label: str) -> str:
+    """Return a unique email address for tests."""
+    return f"{label}-{uuid4().hex}@example.com"
+
+
+def register(client: TestClient, **payload: Any) -> dict[str, str]:
+    """Register a user and return bearer auth headers."""
+    response = client.post("/v1/auth/register", json=payload)
+    assert response.status_code == 201
+    # Act through bearer tokens only so several users can share the client.
+    client.cookies.clear()
+    return {"Authorization": f"Bearer {response.json()['accessToken']}"}
+
+
+def teacher_with_student(client: TestClient) -> tuple[dict[str, str], dict[str, str]]:
+    """Create a teacher with one class containing one student."""
+    teacher = register(
+        client, email=unique_email("forum-teacher"), password="teachpw", role="teacher"
+    )
+    created_class = client.post(
+        "/v1/classes", headers=teacher, json={"grade": 3, "suffix": "a"}
+    )
+    assert created_class.status_code == 201
+    student = register(
+        client,
+        email=unique_email("forum-student"),
+        password="studpw",
+        role="student",
+        classId=created_class.json()["id"],
+    )
+    return teacher, student
+
+
+def start_discussion(
+    client: TestClient, headers: dict[str, str], topic: str
+) -> dict[str, Any]:
+    """Create a discussion thread."""
+    response = client.post(
+        "/v1/discussions/",
+        headers=headers,
+        json={
+            "topic": topic,
+            "content": "How do I solve this one?",
+            "category": "math",
+        },
+    )
+    assert response.status_code == 201
+    return response.json()
+
+
+def test_feed_reports_reply_counts_and_subscriptions(client: TestClient) -> None:
+    """The forum list carries per-thread reply counts and the viewer's subscription."""
+    teacher, student = teacher_with_student(client)
+    guest_resp = client.post(
+        "/v1/auth/guest", json={"firstName": "Outsider", "grade": 3}
+    )
+    assert guest_resp.status_code == 201
+    client.cookies.clear()
+    outsider = {"Authorization": f"Bearer {guest_resp.json()['accessToken']}"}
+
+    own = start_discussion(client, student, "Fractions help")
+    other = start_discussion(client, outsider, "Guest question")
+    for text in ("First idea", "Second idea"):
+        reply = client.post(
+            f"/v1/discussions/{own['id']}/replies",
+            headers=outsider,
+            json={"content": text},
+        )
+        assert reply.status_code == 201
+
+    feed = client.get("/v1/discussions/", headers=student)
+    assert feed.status_code == 200
+    assert feed.json()["nextCursor"] is None
+    by_id = {item["id"]: item for item in feed.json()["items"]}
+    assert by_id[own["id"]]["reply_count"] == 2
+    assert by_id[own["id"]]["is_subscribed"] is True
+    assert by_id[other["id"]]["reply_count"] == 0
+    assert by_id[other["id"]]["is_subscribed"] is False
+    assert by_id[own["id"]]["author"]["role"] == "student"
+
+    teacher_feed = client.get("/v1/discussions/", headers=teacher)
+    assert teacher_feed.status_code == 200
+    assert [item["id"] for item in teacher_feed.json()["items"]] == [own["id"]]
+
+
+def test_feed_and_notifications_use_stable_cursors(client: TestClient) -> None:
+    """Cursor pages neither skip nor repeat threads bumped mid-scroll."""
+    _, student = teacher_with_student(client)
+    guest_resp = client.post("/v1/auth/guest", json={"firstName": "Helper", "grade": 3})
+    assert guest_resp.status_code == 201
+    client.cookies.clear()
+    helper = {"Authorization": f"Bearer {guest_resp.json()['accessToken']}"}
+
+    created = [start_discussion(client, student, f"Thread {n}") for n in range(5)]
+
+    first = client.get("/v1/discussions/", headers=student, params={"limit": 2})
+    assert first.status_code == 200
+    first_page = first.json()
+    seen = [item["id"] for item in first_page["items"]]
+    assert seen == [created[4]["id"], created[3]["id"]]
+
+    # A reply bumps an already-seen thread to the top mid-scroll.
+    for text in ("Try a drawing", "Count again", "Use tens"):
+        bumped = client.post(
+            f"/v1/discussions/{created[4]['id']}/replies",
+            headers=helper,
+            json={"content": text},
+        )
+        assert bumped.status_code == 201
+
+    cursor = first_page["nextCursor"]
+    while cursor:
+        page = client.get(
+            "/v1/discussions/", headers=student, params={"limit": 2, "cursor": cursor}
+        )
+        assert page.status_code == 200
+        seen.extend(item["id"] for item in page.json()["items"])
+        cursor = page.json()["nextCursor"]
+    assert seen == [thread["id"] for thread in reversed(created)]
+
+    bad = client.get("/v1/discussions/", headers=student, params={"cursor": "nope"})
+    assert bad.status_code == 400
+
+    notifications = client.get(
+        "/v1/notifications/", headers=student, params={"limit": 2}
+    )
+    assert notifications.status_code == 200
+    body = notifications.json()
+    assert len(body["items"]) == 2
+    rest = client.get(
+        "/v1/notifications/",
+        headers=student,
+        params={"limit": 2, "cursor": body["nextCursor"]},
+    )
+    assert rest.status_code == 200
+    assert len(rest.json()["items"]) == 1
+    assert rest.json()["nextCursor"] is None
+    ids = [item["id"] for item in body["items"] + rest.json()["items"]]
+    assert ids == sorted(ids, reverse=True)
+
+
+def test_reply_notifications_fan_out_to_subscribers(client: TestClient) -> None:
+    """Every subscriber but the replier gets exactly one notification per reply."""
+    teacher, student = teacher_with_student(client)
+    guest_resp = client.post("/v1/auth/guest", json={"firstName": "Mia", "grade": 3})
+    assert guest_resp.status_code == 201
+    client.cookies.clear()
+    helper = {"Authorization": f"Bearer {guest_resp.json()['accessToken']}"}
+
+    thread = start_discussion(client, student, "Division trouble")
+    subscribed = client.post(
+        f"/v1/discussions/{thread['id']}/subscribe", headers=teacher
+    )
+    assert subscribed.status_code == 204
+
+    settings = client.app.state.settings  # type: ignore[attr-defined]
+    for background in (False, True):
+        settings.notification_fanout_background = background
+        try:
+            reply = client.post(
+                f"/v1/discussions/{thread['id']}/replies",
+                headers=helper,
+                json={"content": f"Background fan-out: {background}"},
+            )
+        finally:
+            settings.notification_fanout_background = False
+        assert reply.status_code == 201
+
+    for headers in (student, teacher):
+        inbox = client.get("/v1/notifications/", headers=headers)
+        assert inbox.status_code == 200
+        items = inbox.json()["items"]
+        assert [item["type"] for item in items] == ["new_reply", "new_reply"]
+        assert all(
+            item["message"].endswith("replied to 'Division trouble'") for item in items
+        )
+
+    own_inbox = client.get("/v1/notifications/", headers=helper)
+    assert own_inbox.status_code == 200
+    assert own_inbox.json()["items"] == []
+
+
+async def _next_event(subscription: Subscription) -> NotificationEvent:
+    """Wait briefly for the next event pushed to a subscription."""
+    return await asyncio.wait_for(subscription.queue.get(), timeout=1)
+
+
+async def _mark_all_read(app: FastAPI, user_id: str) -> None:
+    async with app.state.db_session() as db:
+        await crud.mark_all_notifications_read(db, user_id=user_id)
+
+
+def test_committed_notifications_are_pushed_to_streams(client: TestClient) -> None:
+    """Replies push events with the cached unread count to open subscriptions."""
+    app = cast(FastAPI, client.app)
+    portal = client.portal
+    assert portal is not None
+    _, student = teacher_with_student(client)
+    student_id = client.get("/v1/me", headers=student).json()["id"]
+    guest_resp = client.post("/v1/auth/guest", json={"firstName": "Ben", "grade": 3})
+    assert guest_resp.status_code == 201
+    client.cookies.clear()
+    helper = {"Authorization": f"Bearer {guest_resp.json()['accessToken']}"}
+    thread = start_discussion(client, student, "Place value")
+
+    broker = get_notification_broker()
+    subscription = broker.subscribe(student_id)
+    try:
+        # The count is not cached yet, so the first event cannot carry it.
+        client.post(
+            f"/v1/discussions/{thread['id']}/replies",
+            headers=helper,
+            json={"content": "Look at the tens"},
+        )
+        first = portal.call(_next_event, subscription)
+        assert first.event == "notification"
+        assert first.data["unreadCount"] is None
+        assert first.data["notification"]["discussion_id"] == thread["id"]
+
+        unread = client.get("/v1/notifications/unread-count", headers=student)
+        assert unread.json() == {"count": 1}
+
+        client.post(
+            f"/v1/discussions/{thread['id']}/replies",
+            headers=helper,
+            json={"content": "Then the ones"},
+        )
+        second = portal.call(_next_event, subscription)
+        assert second.data["unreadCount"] == 2
+        assert broker.unread_count(student_id) == 2
+
+        portal.call(_mark_all_read, app, student_id)
+        cleared = portal.call(_next_event, subscription)
+        assert (cleared.event, cleared.data) == ("unread", {"count": 0})
+        unread = client.get("/v1/notifications/unread-count", headers=student)
+        assert unread.json() == {"count": 0}
+    finally:
+        subscription.close()
+    assert broker.subscriber_count == 0
+
+
+async def _counter(app: FastAPI, user_id: str) -> int | None:
+    async with app.state.db_session() as db:
+        counter = await db.get(NotificationCounter, user_id)
+        return None if counter is None else counter.unread_count
+
+
+async def _set_counter(app: FastAPI, user_id: str, value: int | None) -> None:
+    async with app.state.db_session() as db:
+        counter = await db.get(NotificationCounter, user_id)
+        assert counter is not None
+        if value is None:
+            await db.delete(counter)
+        else:
+            counter.unread_count = value
+        await db.commit()
+
+
+async def _reconcile(app: FastAPI) -> int:
+    async with app.state.db_session() as db:
+        changed = await crud.reconcile_unread_counters(db)
+        await db.commit()
+        return changed
+
+
+async def _mark_read(app: FastAPI, user_id: str, notification_id: int) -> None:
+    async with app.state.db_session() as db:
+        await crud.mark_notification_read(db, notification_id, user_id)
+
+
+def test_unread_counter_tracks_notifications(client: TestClient) -> None:
+    """The per-user counter follows creation and reads and can be reconciled."""
+    app = cast(FastAPI, client.app)
+    portal = client.portal
+    assert portal is not None
+    _, student = teacher_with_student(client)
+    student_id = client.get("/v1/me", headers=student).json()["id"]
+    guest_resp = client.post("/v1/auth/guest", json={"firstName": "Ada", "grade": 3})
+    assert guest_resp.status_code == 201
+    client.cookies.clear()
+    helper = {"Authorization": f"Bearer {guest_resp.json()['accessToken']}"}
+    thread = start_discussion(client, student, "Rounding")
+
+    def reply(text: str) -> None:
+        response = client.post(
+            f"/v1/discussions/{thread['id']}/replies",
+            headers=helper,
+            json={"content": text},
+        )
+        assert response.status_code == 201
+
+    reply("Round up at five")
+    reply("Look at the next digit")
+    assert portal.call(_counter, app, student_id) == 2
+
+    # A missing counter is seeded from all unread rows, not just the new one.
+    portal.call(_set_counter, app, student_id, None)
+    reply("Draw a number line")
+    assert portal.call(_counter, app, student_id) == 3
+
+    newest = client.get("/v1/notifications/", headers=student).json()["items"][0]
+    portal.call(_mark_read, app, student_id, newest["id"])
+    portal.call(_mark_read, app, student_id, newest["id"])
+    assert portal.call(_counter, app, student_id) == 2
+    assert client.get("/v1/notifications/unread-count", headers=student).json() == {
+        "count": 2
+    }
+
+    portal.call(_set_counter, app, student_id, 42)
+    assert portal.call(_reconcile, app) == 1
+    assert portal.call(_reconcile, app) == 0
+    assert portal.call(_counter, app, student_id) == 2
+    assert get_notification_broker().unread_count(student_id) is None
+
+
+async def _run_retention(app: FastAPI, days_ahead: int) -> Any:
+    retention = app.state.notification_retention
+    return await retention.run_once(now=utcnow() + timedelta(days=days_ahead))
+
+
+def test_retention_collapses_replies_and_prunes_read(client: TestClient) -> None:
+    """Old replies collapse into one digest; expired read rows are deleted."""
+    app = cast(FastAPI, client.app)
+    portal = client.portal
+    assert portal is not None
+    _, student = teacher_with_student(client)
+    student_id = client.get("/v1/me", headers=student).json()["id"]
+    guest_resp = client.post("/v1/auth/guest", json={"firstName": "Kai", "grade": 3})
+    assert guest_resp.status_code == 201
+    client.cookies.clear()
+    helper = {"Authorization": f"Bearer {guest_resp.json()['accessToken']}"}
+    thread = start_discussion(client, student, "Long division")
+    for text in ("Split it up", "Carry the rest", "Check by multiplying"):
+        response = client.post(
+            f"/v1/discussions/{thread['id']}/replies",
+            headers=helper,
+            json={"content": text},
+        )
+        assert response.status_code == 201
+    newest = client.get("/v1/notifications/", headers=student).json()["items"][0]
+    portal.call(_mark_read, app, student_id, newest["id"])
+
+    collapsed = portal.call(_run_retention, app, 2)
+    assert (collapsed.replies_collapsed, collapsed.digests_created) == (3, 1)
+    items = client.get("/v1/notifications/", headers=student).json()["items"]
+    assert len(items) == 1
+    assert items[0]["type"] == "reply_digest"
+    assert items[0]["message"] == "3 new replies to 'Long division'"
+    assert items[0]["is_read"] is False
+    assert portal.call(_counter, app, student_id) == 1
+
+    # Later replies are folded into the existing digest, not a second one.
+    portal.call(_mark_all_read, app, student_id)
+    for text in ("Use a grid", "Estimate first"):
+        response = client.post(
+            f"/v1/discussions/{thread['id']}/replies",
+            headers=helper,
+            json={"content": text},
+        )
+        assert response.status_code == 201
+    folded = portal.call(_run_retention, app, 2)
+    assert (folded.replies_collapsed, folded.digests_created) == (2, 1)
+    items = client.get("/v1/notifications/", headers=student).json()["items"]
+    assert [item["message"] for item in items] == ["5 new replies to 'Long division'"]
+    assert items[0]["is_read"] is False
+    assert portal.call(_counter, app, student_id) == 1
+    assert portal.call(_run_retention, app, 2) == RetentionRun()
+
+    portal.call(_mark_all_read, app, student_id)
+    pruned = portal.call(_run_retention, app, 31)
+    assert (pruned.read_deleted, pruned.unread_deleted) == (1, 0)
+    assert client.get("/v1/notifications/", headers=student).json()["items"] == []
+
+    admin_login = client.post(
+        "/v1/auth/login", json={"email": "admin@example.com", "password": "adminpw"}
+    )
+    assert admin_login.status_code == 200
+    client.cookies.clear()
+    admin = {"Authorization": f"Bearer {admin_login.json()['accessToken']}"}
+    metrics = client.get("/v1/notifications/retention", headers=admin)
+    assert metrics.status_code == 200
+    assert metrics.json()["read_deleted"] == 1
+    assert metrics.json()["replies_collapsed"] == 5
+    forbidden = client.get("/v1/notifications/retention", headers=student)
+    assert forbidden.status_code == 403
@@ -0,0 +1,894 @@
+from __future__ import annotations
+
+import asyncio
+import base64
+import io
+import json
+import struct
+import time
+import zlib
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, cast
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from openai import AsyncOpenAI
+from openai.types.chat import ChatCompletion, ChatCompletionChunk
+from PIL import Image, ImageDraw
+
+from app.api.schemas.math_analysis import Language, MathProblemAnalysis
+from app.dependencies import get_openai_client
+from app.services import openai_math_helper
+from app.services.analysis_cache import get_analysis_cache, reset_analysis_cache
+from app.services.coaching_history import estimate_tokens
+from app.services.pdf_pages import PdfSplitError, split_pdf_pages
+from app.services.problem_assists import (
+    ProblemAssistPrecomputer,
+    install_problem_assist_precomputer,
+)
+from app.services.rate_limit import TokenBucket, parse_reset_duration
+from tests.test_math_word_problems import build_analysis, create_teacher, login
+
+
+def _fake_openai_client(**completions: Any) -> AsyncOpenAI:
+    """Stand-in client; helpers that use it are patched or given ``completions``."""
+    return cast(
+        AsyncOpenAI,
+        SimpleNamespace(
+            chat=SimpleNamespace(completions=SimpleNamespace(**completions))
+        ),
+    )
+
+
+def _student(client: TestClient) -> dict[str, str]:
+    response = client.post("/v1/auth/guest", json={"firstName": "Cache", "grade": 3})
+    assert response.status_code == 201
+    client.cookies.clear()
+    return {"Authorization": f"Bearer {response.json()['accessToken']}"}
+
+
+def test_analyses_are_cached_by_normalized_text(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Repeated problems are served from the cache instead of the API."""
+    calls: list[list[str]] = []
+
+    async def fake_batch(
+        problem_texts: list[str], language: Language = "en", *, client: AsyncOpenAI
+    ) -> list[MathProblemAnalysis]:
+        calls.append(list(problem_texts))
+        return [
+            MathProblemAnalysis.model_validate(build_analysis()) for _ in problem_texts
+        ]
+
+    async def fake_single(
+        problem_text: str, language: Language = "en", *, client: AsyncOpenAI
+    ) -> MathProblemAnalysis:
+        calls.append([problem_text])
+        return MathProblemAnalysis.model_validate(build_analysis("hard"))
+
+    monkeypatch.setattr(openai_math_helper, "analyze_math_problems_batch", fake_batch)
+    monkeypatch.setattr(openai_math_helper, "analyze_math_problem", fake_single)
+    app = cast(FastAPI, client.app)
+    app.dependency_overrides[get_openai_client] = lambda: _fake_openai_client()
+    headers = _student(client)
+
+    first = client.post(
+        "/v1/math-helper/analyze",
+        headers=headers,
+        json={"problemText": "Tom has 2 apples.", "language": "en"},
+    )
+    assert first.status_code == 200
+    assert first.json()["analysis"]["difficultyLevel"] == "hard"
+
+    batch = client.post(
+        "/v1/math-helper/analyze-batch",
+        headers=headers,
+        json={
+            "problemTexts": [
+                "Tom  has 2\napples.",
+                "Mia has 3 pears.",
+                "Mia has 3 pears.",
+            ],
+            "language": "en",
+        },
+    )
+    assert batch.status_code == 200
+    assert [a["difficultyLevel"] for a in batch.json()["analyses"]] == [
+        "hard",
+        "easy",
+        "easy",
+    ]
+    assert calls == [["Tom has 2 apples."], ["Mia has 3 pears."]]
+
+    # A German request for the same text is a different key.
+    german = client.post(
+        "/v1/math-helper/analyze",
+        headers=headers,
+        json={"problemText": "Mia has 3 pears.", "language": "de"},
+    )
+    assert german.status_code == 200
+    assert len(calls) == 3
+
+    # A cold in-memory layer still avoids the API by reading SQLite.
+    reset_analysis_cache()
+    again = client.post(
+        "/v1/math-helper/analyze",
+        headers=headers,
+        json={"problemText": "Mia has 3 pears.", "language": "en"},
+    )
+    assert again.status_code == 200
+    assert len(calls) == 3
+    assert get_analysis_cache().stats() == {
+        "hits": 1,
+        "memoryHits": 0,
+        "misses": 0,
+        "memoryEntries": 1,
+    }
+
+    admin = login(client, "admin@example.com", "adminpw")
+    client.cookies.clear()
+    stats = client.get(
+        "/v1/math-helper/analysis-cache",
+        headers={"Authorization": f"Bearer {admin['accessToken']}"},
+    )
+    assert stats.status_code == 200
+    assert stats.json()["hits"] == 1
+
+
+def test_batching_runs_concurrently_and_retries_only_failed_items(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """A failed batch falls back to per-problem calls; order is preserved."""
+    texts = [f"Problem {n}" for n in range(7)]
+    batch_calls: list[list[str]] = []
+    single_calls: list[str] = []
+    in_flight = peak = 0
+
+    def analysis_for(text: str) -> MathProblemAnalysis:
+        payload = build_analysis()
+        payload["suggestion"] = text
+        return MathProblemAnalysis.model_validate(payload)
+
+    async def fake_batch(
+        problem_texts: list[str], language: Language = "en", *, client: AsyncOpenAI
+    ) -> list[MathProblemAnalysis]:
+        nonlocal in_flight, peak
+        batch_calls.append(list(problem_texts))
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        if "Problem 1" in problem_texts:
+            raise ValueError("Empty response from OpenAI.")
+        return [analysis_for(text) for text in problem_texts]
+
+    async def fake_single(
+        problem_text: str, language: Language = "en", *, client: AsyncOpenAI
+    ) -> MathProblemAnalysis:
+        single_calls.append(problem_text)
+        if single_calls.count(problem_text) == 1 and problem_text == "Problem 1":
+            raise ValueError("Empty response from OpenAI.")
+        return analysis_for(problem_text)
+
+    monkeypatch.setattr(openai_math_helper, "analyze_math_problems_batch", fake_batch)
+    monkeypatch.setattr(openai_math_helper, "analyze_math_problem", fake_single)
+
+    analyses = asyncio.run(
+        openai_math_helper.analyze_math_problems_with_batching(
+            texts,
+            client=_fake_openai_client(),
+            batch_size=2,
+            max_concurrency=4,
+            base_delay=0.001,
+        )
+    )
+
+    assert [analysis.suggestion for analysis in analyses] == texts
+    assert peak == 4
+    assert len(batch_calls) == 4
+    assert single_calls == ["Problem 0", "Problem 1", "Problem 1"]
+
+
+def test_failed_problem_cancels_remaining_batches(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Once a problem fails for good, batches still in flight are cancelled."""
+    cancelled: list[str] = []
+
+    async def fake_batch(
+        problem_texts: list[str], language: Language = "en", *, client: AsyncOpenAI
+    ) -> list[MathProblemAnalysis]:
+        if "Broken" in problem_texts:
+            raise ValueError("Empty response from OpenAI.")
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.extend(problem_texts)
+            raise
+        return []
+
+    async def fake_single(
+        problem_text: str, language: Language = "en", *, client: AsyncOpenAI
+    ) -> MathProblemAnalysis:
+        raise ValueError("Empty response from OpenAI.")
+
+    monkeypatch.setattr(openai_math_helper, "analyze_math_problems_batch", fake_batch)
+    monkeypatch.setattr(openai_math_helper, "analyze_math_problem", fake_single)
+
+    started = time.monotonic()
+    with pytest.raises(ValueError, match="Empty response"):
+        asyncio.run(
+            openai_math_helper.analyze_math_problems_with_batching(
+                ["Broken", "Problem 1", "Problem 2"],
+                client=_fake_openai_client(),
+                batch_size=1,
+                max_concurrency=3,
+                max_attempts=1,
+            )
+        )
+    assert time.monotonic() - started < 5
+    assert sorted(cancelled) == ["Problem 1", "Problem 2"]
+
+
+def test_token_bucket_honors_rate_limit_headers() -> None:
+    """Exhausted quotas and Retry-After hold back the next request."""
+    assert parse_reset_duration("6m0s") == 360
+    assert parse_reset_duration("1.5s") == 1.5
+    assert parse_reset_duration("20ms") == pytest.approx(0.02)
+    assert parse_reset_duration("soon") is None
+
+    async def scenario() -> float:
+        bucket = TokenBucket(rate=1000, capacity=5)
+        await bucket.acquire()
+        bucket.observe_headers(
+            {
+                "x-ratelimit-remaining-requests": "0",
+                "x-ratelimit-reset-requests": "50ms",
+            }
+        )
+        started = time.monotonic()
+        await bucket.acquire()
+        return time.monotonic() - started
+
+    assert asyncio.run(scenario()) >= 0.045
+
+
+class _FakeChunkStream:
+    """Async iterable of completion chunks shaped like ``AsyncStream``."""
+
+    def __init__(self, deltas: list[str], finish_reason: str | None) -> None:
+        self.chunks = [
+            ChatCompletionChunk.model_validate(
+                {
+                    "id": "chunk",
+                    "object": "chat.completion.chunk",
+                    "created": 0,
+                    "model": "gpt-5",
+                    "choices": [
+                        {
+                            "index": 0,
+                            "delta": {"content": delta},
+                            "finish_reason": (
+                                finish_reason if n == len(deltas) - 1 else None
+                            ),
+                        }
+                    ],
+                }
+            )
+            for n, delta in enumerate(deltas)
+        ]
+        self.closed = False
+
+    async def __aiter__(self) -> AsyncIterator[ChatCompletionChunk]:
+        for chunk in self.chunks:
+            yield chunk
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+def _events(body: str) -> list[tuple[str, dict[str, Any]]]:
+    events = []
+    for frame in body.strip().split("\n\n"):
+        name, data = frame.split("\n")
+        events.append((name.removeprefix("event: "), json.loads(data[6:])))
+    return events
+
+
+def test_coaching_response_streams_tokens_up_to_the_cap(client: TestClient) -> None:
+    """Deltas are relayed as SSE events and the stream is cut at the cap."""
+    streams: list[_FakeChunkStream] = []
+    requests: list[dict[str, Any]] = []
+
+    async def create(**kwargs: Any) -> _FakeChunkStream:
+        requests.append(kwargs)
+        stream = _FakeChunkStream(["What ", "do ", "you ", "know?"], "stop")
+        streams.append(stream)
+        return stream
+
+    app = cast(FastAPI, client.app)
+    app.dependency_overrides[get_openai_client] = lambda: _fake_openai_client(
+        create=create
+    )
+    headers = _student(client)
+    before = openai_math_helper.get_coaching_metrics().as_dict()
+    payload = {
+        "problemText": "Tom has 2 apples.",
+        "conversationHistory": [{"role": "tutor", "content": "Hi!"}],
+        "studentMessage": "I am stuck.",
+    }
+
+    response = client.post(
+        "/v1/math-helper/metacognitive/stream", headers=headers, json=payload
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = _events(response.text)
+    assert [name for name, _ in events] == ["token"] * 4 + ["done"]
+    done = events[-1][1]
+    assert done["response"] == "What do you know?"
+    assert done["truncated"] is False
+    assert done["latencyMs"] >= done["timeToFirstTokenMs"] >= 0
+    assert requests[0]["stream"] is True
+    assert requests[0]["max_completion_tokens"] == 1024
+    assert "Student: I am stuck." in requests[0]["messages"][-1]["content"]
+
+    app.state.settings.coaching_max_completion_tokens = 2
+    capped = client.post(
+        "/v1/math-helper/metacognitive/stream", headers=headers, json=payload
+    )
+    events = _events(capped.text)
+    assert [name for name, _ in events] == ["token", "token", "done"]
+    assert events[-1][1]["response"] == "What do "
+    assert events[-1][1]["truncated"] is True
+    assert all(stream.closed for stream in streams)
+
+    after = openai_math_helper.get_coaching_metrics().as_dict()
+    assert after["streams"] == before["streams"] + 2
+    assert after["truncated"] == before["truncated"] + 1
+
+
+def test_long_coaching_history_is_compacted(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Old turns are summarized once per window; prompts stay bounded."""
+    summaries: list[tuple[str | None, int]] = []
+    prompts: list[str] = []
+
+    async def fake_summarize(
+        previous: str | None,
+        turns: list[dict[str, str]],
+        language: Language = "en",
+        *,
+        client: AsyncOpenAI,
+    ) -> str:
+        summaries.append((previous, len(turns)))
+        return f"summary {len(summaries)}"
+
+    async def create(**kwargs: Any) -> ChatCompletion:
+        prompts.append(kwargs["messages"][-1]["content"])
+        return ChatCompletion.model_validate(
+            {
+                "id": "completion",
+                "object": "chat.completion",
+                "created": 0,
+                "model": "gpt-5",
+                "choices": [
+                    {
+                        "index": 0,
+                        "finish_reason": "stop",
+                        "message": {"role": "assistant", "content": "Why?"},
+                    }
+                ],
+            }
+        )
+
+    monkeypatch.setattr(openai_math_helper, "summarize_coaching_turns", fake_summarize)
+    app = cast(FastAPI, client.app)
+    app.dependency_overrides[get_openai_client] = lambda: _fake_openai_client(
+        create=create
+    )
+    headers = _student(client)
+    history = [
+        {"role": "student" if n % 2 else "tutor", "content": f"turn {n}"}
+        for n in range(24)
+    ]
+
+    def ask(turns: int) -> None:
+        response = client.post(
+            "/v1/math-helper/metacognitive",
+            headers=headers,
+            json={
+                "problemText": "Tom has 2 apples.",
+                "conversationHistory": history[:turns],
+                "studentMessage": "Next?",
+            },
+        )
+        assert response.status_code == 200
+
+    ask(20)
+    assert summaries == [(None, 6), ("summary 1", 6)]
+    assert "SUMMARY OF OUR EARLIER CONVERSATION:\nsummary 2" in prompts[-1]
+    assert "turn 11" not in prompts[-1]
+    assert "turn 12" in prompts[-1] and "turn 19" in prompts[-1]
+
+    ask(22)
+    assert len(summaries) == 2
+    ask(24)
+    assert summaries[-1] == ("summary 2", 6)
+    assert "turn 17" not in prompts[-1]
+
+    app.state.settings.coaching_history_token_budget = 20
+    ask(24)
+    assert "turn 23" in prompts[-1]
+    assert "turn 18" not in prompts[-1]
+    assert estimate_tokens("Clippy: what's 12x3?") == 8
+
+
+def _png_chunk(kind: bytes, data: bytes) -> bytes:
+    body = kind + data
+    return struct.pack(">I", len(data)) + body + struct.pack(">I", zlib.crc32(body))
+
+
+def test_uploads_are_stripped_of_metadata_and_size_limited(
+    client: TestClient,
+) -> None:
+    """Images are sniffed and stripped before upload; oversized bodies get 413."""
+    image_urls: list[dict[str, str]] = []
+
+    async def create(**kwargs: Any) -> ChatCompletion:
+        image_urls.append(kwargs["messages"][-1]["content"][1]["image_url"])
+        return ChatCompletion.model_validate(
+            {
+                "id": "completion",
+                "object": "chat.completion",
+                "created": 0,
+                "model": "gpt-4o",
+                "choices": [
+                    {
+                        "index": 0,
+                        "finish_reason": "stop",
+                        "message": {"role": "assistant", "content": "Nice!"},
+                    }
+                ],
+            }
+        )
+
+    app = cast(FastAPI, client.app)
+    app.dependency_overrides[get_openai_client] = lambda: _fake_openai_client(
+        create=create
+    )
+    headers = _student(client)
+    ihdr = _png_chunk(b"IHDR", struct.pack(">IIBBBBB", 1, 1, 8, 0, 0, 0, 0))
+    pixels = _png_chunk(b"IDAT", zlib.compress(b"\x00\x00"))
+    tagged = (
+        b"\x89PNG\r\n\x1a\n"
+        + ihdr
+        + _png_chunk(b"tEXt", b"Author\x00Mia's tablet")
+        + pixels
+        + _png_chunk(b"IEND", b"")
+    )
+
+    response = client.post(
+        "/v1/math-helper/drawing-feedback",
+        headers=headers,
+        json={
+            "imageBase64": "data:image/jpeg;base64,"
+            + base64.b64encode(tagged).decode(),
+            "problemText": "Tom has 2 apples.",
+        },
+    )
+    assert response.status_code == 200
+    ((sent,),) = [image_urls]
+    assert sent["detail"] == "low"
+    assert sent["url"].startswith("data:image/jpeg;base64,")
+    jpeg = base64.b64decode(sent["url"].split(",", 1)[1])
+    assert b"Mia's tablet" not in jpeg
+    assert Image.open(io.BytesIO(jpeg)).size == (1, 1)
+
+    not_an_image = client.post(
+        "/v1/math-helper/drawing-feedback",
+        headers=headers,
+        json={
+            "imageBase64": base64.b64encode(b"%PDF-1.7").decode(),
+            "problemText": "Tom has 2 apples.",
+        },
+    )
+    assert not_an_image.status_code == 400
+
+    app.state.settings.image_upload_max_bytes = 16
+    too_large = client.post(
+        "/v1/math-helper/extract",
+        headers=headers,
+        json={"imageBase64": base64.b64encode(tagged).decode(), "mimeType": "x"},
+    )
+    assert too_large.status_code == 413
+
+    app.state.settings.image_upload_max_bytes = 1
+    body = json.dumps({"imageBase64": "A" * 100_000, "mimeType": "image/png"})
+    streamed = client.post(
+        "/v1/math-helper/extract",
+        headers={**headers, "Content-Type": "application/json"},
+        content=iter([body[:50_000].encode(), body[50_000:].encode()]),
+    )
+    assert streamed.status_code == 413
+    assert len(image_urls) == 1
+
+
+def test_photos_are_turned_upright_and_downscaled(client: TestClient) -> None:
+    """EXIF rotation is applied, then the photo shrinks to what the model sees."""
+    image_urls: list[dict[str, str]] = []
+
+    async def create(**kwargs: Any) -> SimpleNamespace:
+        image_urls.append(kwargs["messages"][-1]["content"][1]["image_url"])
+        completion = ChatCompletion.model_validate(
+            {
+                "id": "completion",
+                "object": "chat.completion",
+                "created": 0,
+                "model": "gpt-5",
+                "choices": [
+                    {
+                        "index": 0,
+                        "finish_reason": "stop",
+                        "message": {"role": "assistant", "content": "Tom has 2."},
+                    }
+                ],
+            }
+        )
+        return SimpleNamespace(headers={}, parse=lambda: completion)
+
+    app = cast(FastAPI, client.app)
+    app.dependency_overrides[get_openai_client] = lambda: _fake_openai_client(
+        with_raw_response=SimpleNamespace(create=create)
+    )
+    # A landscape sensor image that the camera marked "rotate 90° clockwise".
+    photo = Image.new("RGB", (4000, 3000), "white")
+    ImageDraw.Draw(photo).rectangle((0, 0, 399, 299), fill="red")
+    exif = Image.Exif()
+    exif[0x010F] = "PhoneCam"  # Make
+    exif[0x0112] = 6  # Orientation
+    upload = io.BytesIO()
+    photo.save(upload, "JPEG", exif=exif)
+
+    response = client.post(
+        "/v1/math-helper/extract",
+        headers=_student(client),
+        json={
+            "imageBase64": base64.b64encode(upload.getvalue()).decode(),
+            "mimeType": "image/jpeg",
+        },
+    )
+
+    assert response.json() == {"problems": ["Tom has 2."], "failedPages": []}
+    ((sent,),) = [image_urls]
+    assert sent["detail"] == "high"
+    sent_bytes = base64.b64decode(sent["url"].split(",", 1)[1])
+    assert len(sent_bytes) < len(upload.getvalue())
+    sent_image = Image.open(io.BytesIO(sent_bytes))
+    assert sent_image.size == (768, 1024)
+    assert not sent_image.getexif()
+    red, green, _ = cast(tuple[int, int, int], sent_image.getpixel((760, 8)))
+    assert red > 200 and green < 60
+
+
+def _canvas(
+    strokes: list[tuple[int, int, int, int]], *, size: int = 64, fmt: str = "PNG"
+) -> bytes:
+    """Encode a canvas with dark rectangles drawn on a transparent page.
+
+    Formats without alpha get the page filled white instead.
+    """
+    mode = "RGBA" if fmt == "PNG" else "RGB"
+    canvas = Image.new(mode, (size, size), (0, 0, 0, 0) if fmt == "PNG" else "white")
+    draw = ImageDraw.Draw(canvas)
+    for x0, y0, x1, y1 in strokes:
+        draw.rectangle((x0, y0, x1 - 1, y1 - 1), fill=(16, 16, 64, 255))
+    out = io.BytesIO()
+    canvas.save(out, fmt)
+    return out.getvalue()
+
+
+def test_drawing_feedback_skips_blank_and_repeated_canvases(
+    client: TestClient,
+) -> None:
+    """Blank pages are answered locally; near-duplicates hit the cache."""
+    calls: list[str] = []
+
+    async def create(**kwargs: Any) -> ChatCompletion:
+        calls.append(kwargs["messages"][-1]["content"][0]["text"])
+        return ChatCompletion.model_validate(
+            {
+                "id": "completion",
+                "object": "chat.completion",
+                "created": 0,
+                "model": "gpt-4o",
+                "choices": [
+                    {
+                        "index": 0,
+                        "finish_reason": "stop",
+                        "message": {
+                            "role": "assistant",
+                            "content": f"Feedback {len(calls)}",
+                        },
+                    }
+                ],
+            }
+        )
+
+    app = cast(FastAPI, client.app)
+    app.dependency_overrides[get_openai_client] = lambda: _fake_openai_client(
+        create=create
+    )
+    headers = _student(client)
+
+    def feedback(png: bytes, problem: str = "Tom has 2 apples.") -> str:
+        response = client.post(
+            "/v1/math-helper/drawing-feedback",
+            headers=headers,
+            json={
+                "imageBase64": base64.b64encode(png).decode(),
+                "problemText": problem,
+            },
+        )
+        assert response.status_code == 200
+        return cast(str, response.json()["feedback"])
+
+    assert feedback(_canvas([])).startswith("Your page is still empty!")
+    apples = [(8, 8, 20, 20), (36, 8, 48, 20)]
+    assert feedback(_canvas(apples)) == "Feedback 1"
+    assert feedback(_canvas(apples, fmt="JPEG")) == "Feedback 1"
+    # One extra dot is the same drawing; a third apple is not.
+    assert feedback(_canvas([*apples, (60, 60, 61, 61)])) == "Feedback 1"
+    assert feedback(_canvas([*apples, (8, 40, 20, 52)])) == "Feedback 2"
+    assert feedback(_canvas(apples), "Mia has 3 pears.") == "Feedback 3"
+    assert len(calls) == 3
+
+    admin = login(client, "admin@example.com", "adminpw")
+    client.cookies.clear()
+    stats = client.get(
+        "/v1/math-helper/drawing-feedback-cache",
+        headers={"Authorization": f"Bearer {admin['accessToken']}"},
+    )
+    assert stats.json() == {"hits": 2, "misses": 3, "emptyCanvases": 1, "entries": 3}
+
+
+def _worksheet_pdf(texts: list[str]) -> bytes:
+    """A minimal PDF with one page per text, sharing a font and a MediaBox."""
+    count = len(texts)
+    kids = " ".join(f"{4 + 2 * index} 0 R" for index in range(count))
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Kids [{kids}] /Count {count} "
+        "/MediaBox [0 0 595 842] /Resources << /Font << /F1 3 0 R >> >> >>".encode(),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for index, text in enumerate(texts):
+        content = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode()
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /Contents {5 + 2 * index} 0 R >>".encode()
+        )
+        objects.append(
+            b"<< /Length %d >>\nstream\n%s\nendstream" % (len(content), content)
+        )
+    out = bytearray(b"%PDF-1.7\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1,
+        xref,
+    )
+    return bytes(out)
+
+
+def test_pdf_pages_are_extracted_concurrently_and_streamed(
+    client: TestClient,
+) -> None:
+    """Each PDF page is its own request; results stream and keep page order."""
+    replies = {
+        "Page one": "Tom has 2 apples.|||Mia has 3 pears.",
+        "Page two": "",
+        "Page three": "Ben has 4 cars.",
+    }
+    delays = {"Page one": 0.2, "Page two": 0.0, "Page three": 0.1}
+    failing: set[str] = set()
+    in_flight = 0
+    max_in_flight = 0
+
+    async def create(**kwargs: Any) -> ChatCompletion:
+        nonlocal in_flight, max_in_flight
+        part = kwargs["messages"][-1]["content"][1]
+        assert part["type"] == "file"
+        page = base64.b64decode(part["file"]["file_data"].split(",", 1)[1])
+        (text,) = [text for text in replies if text.encode() in page]
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(delays[text])
+        in_flight -= 1
+        if text in failing:
+            raise RuntimeError("upstream error")
+        return ChatCompletion.model_validate(
+            {
+                "id": "completion",
+                "object": "chat.completion",
+                "created": 0,
+                "model": "gpt-5",
+                "choices": [
+                    {
+                        "index": 0,
+                        "finish_reason": "stop",
+                        "message": {"role": "assistant", "content": replies[text]},
+                    }
+                ],
+            }
+        )
+
+    async def raw_create(**kwargs: Any) -> SimpleNamespace:
+        completion = await create(**kwargs)
+        return SimpleNamespace(headers={}, parse=lambda: completion)
+
+    app = cast(FastAPI, client.app)
+    app.dependency_overrides[get_openai_client] = lambda: _fake_openai_client(
+        with_raw_response=SimpleNamespace(create=raw_create)
+    )
+    headers = _student(client)
+    pdf = _worksheet_pdf(list(replies))
+    pages = split_pdf_pages(pdf, max_pages=20)
+    assert len(pages) == 3
+    assert all(page.startswith(b"%PDF-") and b"/Helvetica" in page for page in pages)
+    nested = pdf.replace(b"/Count 3", b"/Count 3 /X " + b"[" * 100_000 + b"]" * 100_000)
+    with pytest.raises(PdfSplitError):
+        split_pdf_pages(nested, max_pages=20)
+    body = {
+        "imageBase64": base64.b64encode(pdf).decode(),
+        "mimeType": "application/pdf",
+    }
+
+    streamed = client.post("/v1/math-helper/extract/stream", headers=headers, json=body)
+    assert streamed.status_code == 200
+    events = _events(streamed.text)
+    assert [(name, data["page"]) for name, data in events[:-1]] == [
+        ("page", 2),
+        ("page", 3),
+        ("page", 1),
+    ]
+    assert events[0][1] == {"page": 2, "pageCount": 3, "problems": []}
+    assert events[-1] == (
+        "done",
+        {"problems": ["Tom has 2 apples.", "Mia has 3 pears.", "Ben has 4 cars."]},
+    )
+    assert max_in_flight == 3
+
+    extracted = client.post("/v1/math-helper/extract", headers=headers, json=body)
+    assert extracted.json() == {**events[-1][1], "failedPages": []}
+
+    failing.add("Page three")
+    partial = client.post("/v1/math-helper/extract", headers=headers, json=body)
+    assert partial.json() == {
+        "problems": ["Tom has 2 apples.", "Mia has 3 pears."],
+        "failedPages": [3],
+    }
+    failing.add("Page one")
+    failed = client.post("/v1/math-helper/extract", headers=headers, json=body)
+    assert failed.status_code == 502
+    assert failed.json() == {"detail": "Problem extraction failed."}
+
+    app.state.settings.pdf_max_pages = 2
+    too_long = client.post("/v1/math-helper/extract", headers=headers, json=body)
+    assert too_long.status_code == 400
+
+
+def test_catalog_problem_assists_are_precomputed(client: TestClient) -> None:
+    """New problems get suggestions and a multiplication target in the background."""
+    calls: list[str] = []
+
+    async def create(**kwargs: Any) -> ChatCompletion:
+        calls.append(kwargs["model"])
+        if kwargs["model"] == openai_math_helper.MULTIPLICATION_CONTEXT_MODEL:
+            content = '{"targetLabel": "marbles", "reasoning": "per box"}'
+        else:
+            content = f"Draw the boxes ({len(calls)})."
+        return ChatCompletion.model_validate(
+            {
+                "id": "completion",
+                "object": "chat.completion",
+                "created": 0,
+                "model": kwargs["model"],
+                "choices": [
+                    {
+                        "index": 0,
+                        "finish_reason": "stop",
+                        "message": {"role": "assistant", "content": content},
+                    }
+                ],
+            }
+        )
+
+    app = cast(FastAPI, client.app)
+    fake = _fake_openai_client(create=create)
+    app.dependency_overrides[get_openai_client] = lambda: fake
+
+    async def start() -> ProblemAssistPrecomputer:
+        precomputer = ProblemAssistPrecomputer(app.state.db_session, fake)
+        precomputer.start()
+        return precomputer
+
+    assert client.portal is not None
+    precomputer = client.portal.call(start)
+    install_problem_assist_precomputer(precomputer)
+
+    admin = login(client, "admin@example.com", "adminpw")
+    teacher_email, _ = create_teacher(client, admin["accessToken"])
+    teacher = login(client, teacher_email, "teachpw")
+    client.cookies.clear()
+    analysis = build_analysis()
+    analysis["words"] = [
+        {"text": "3", "type": "number", "value": 3},
+        {"text": "boxes", "type": "object"},
+        {"text": "6", "type": "number", "value": 6},
+        {"text": "marbles", "type": "object"},
+    ]
+    analysis["operations"] = ["×"]
+    problem_text = "Tom has 3 boxes with 6 marbles each. How many marbles?"
+    created = client.post(
+        "/v1/math-problems",
+        headers={"Authorization": f"Bearer {teacher['accessToken']}"},
+        json={"problemText": problem_text, "analysis": analysis, "grade": 3},
+    )
+    assert created.status_code == 201
+    client.portal.call(precomputer.join)
+    assert len(calls) == 2
+
+    headers = _student(client)
+    suggestions = client.post(
+        "/v1/math-helper/drawing-suggestions",
+        headers=headers,
+        json={"problemText": "  " + problem_text.replace(" ", "  ")},
+    )
+    assert suggestions.json() == {"suggestions": ["Draw the boxes (1)."]}
+    context = client.post(
+        "/v1/math-helper/multiplication-context",
+        headers=headers,
+        json={
+            "problemText": problem_text,
+            "segments": [
+                {"label": "Boxes", "count": 3, "emoji": "📦"},
+                {"label": "marbles", "count": 6, "emoji": "🔵"},
+            ],
+        },
+    )
+    assert context.json() == {
+        "targetLabel": "marbles",
+        "targetCount": 6,
+        "targetEmoji": "🔵",
+        "factor": 3,
+    }
+    assert len(calls) == 2
+
+    ad_hoc = client.post(
+        "/v1/math-helper/drawing-suggestions",
+        headers=headers,
+        json={"problemText": "Mia has 4 bags with 2 pears each."},
+    )
+    assert ad_hoc.json() == {"suggestions": ["Draw the boxes (3)."]}
+
+    client.cookies.clear()
+    stats = client.get(
+        "/v1/math-helper/problem-assists",
+        headers={"Authorization": f"Bearer {admin['accessToken']}"},
+    )
+    assert stats.json() == {
+        "pending": 0,
+        "completed": 1,
+        "failed": 0,
+        "openaiRequests": 2,
+    }
+    client.portal.call(precomputer.stop)
+    install_problem_assist_precomputer(None)
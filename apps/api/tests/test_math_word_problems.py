@@ -1,9 +1,14 @@
 from __future__ import annotations
 
-from typing import Any
+from typing import Any, cast
 from uuid import uuid4
 
+from fastapi import FastAPI
 from fastapi.testclient import TestClient
+from sqlalchemy import select
+
+from app.models import MathWordProblem
+from app.services.math_catalog import get_math_catalog, invalidate_math_catalog
 
 
 def login(client: TestClient, email: str, password: str) -> dict[str, Any]:
@@ -249,6 +254,64 @@ def test_teacher_can_delete_problem_and_admin_is_forbidden(client: TestClient) -
     assert created["id"] not in ids
 
 
+def test_listing_etag_revalidates_until_catalog_changes(client: TestClient) -> None:
+    """Unchanged listings answer 304; creating or deleting a problem changes the ETag."""
+    teacher_email, _ = create_teacher(
+        client, login(client, "admin@example.com", "adminpw")["accessToken"]
+    )
+    token = login(client, teacher_email, "teachpw")["accessToken"]
+
+    first = client.get("/v1/math-problems", params={"grade": 3})
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    assert etag.startswith('"')
+
+    cached = client.get(
+        "/v1/math-problems", params={"grade": 3}, headers={"If-None-Match": etag}
+    )
+    assert cached.status_code == 304
+    assert cached.headers["etag"] == etag
+    assert cached.content == b""
+
+    created = create_problem(client, token, problem_text="Fresh problem")
+    changed = client.get(
+        "/v1/math-problems", params={"grade": 3}, headers={"If-None-Match": etag}
+    )
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    assert created["id"] in {item["id"] for item in changed.json()["problems"]}
+
+    delete_resp = client.delete(
+        f"/v1/math-problems/{created['id']}",
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert delete_resp.status_code == 204
+    after_delete = client.get("/v1/math-problems", params={"grade": 3})
+    assert after_delete.headers["etag"] == etag
+
+
+async def _catalog_bumps(app: FastAPI) -> list[int]:
+    """Return catalog version bumps for a rolled-back and a committed change."""
+    catalog = get_math_catalog()
+    bumps = []
+    async with app.state.db_session() as db:
+        for commit in (False, False, True):
+            start = catalog.version
+            await db.execute(select(MathWordProblem.id).limit(1))
+            invalidate_math_catalog(db)
+            invalidate_math_catalog(db)
+            await (db.commit() if commit else db.rollback())
+            bumps.append(catalog.version - start)
+    return bumps
+
+
+def test_catalog_invalidation_follows_the_transaction(client: TestClient) -> None:
+    """Rollbacks drop the pending bump; repeated calls bump once at commit."""
+    app = cast(FastAPI, client.app)
+    assert client.portal is not None
+    assert client.portal.call(_catalog_bumps, app) == [2, 2, 3]
+
+
 def test_invalid_difficulty_rejected(client: TestClient) -> None:
     """Difficulty outside permitted range is rejected."""
     teacher_email, _ = create_teacher(
@@ -1,9 +1,14 @@
 from __future__ import annotations
 
-from typing import Any
+from typing import Any, cast
 from uuid import uuid4
 
+from fastapi import FastAPI
 from fastapi.testclient import TestClient
+from sqlalchemy import delete
+
+from app.models import UserAchievement
+from app.services.achievements import reconcile_achievements
 
 
 def unique_email(label: str) -> str:
@@ -327,3 +332,180 @@ def test_progress_summary_handles_zero_problems(client: TestClient) -> None:
     student_summary = summary["students"][0]
     assert student_summary["solved"] == 0
     assert student_summary["completionRate"] == 0.0
+
+
+def test_first_solve_awards_xp_and_statistics_once(client: TestClient) -> None:
+    """Repeated successes on a solved problem do not award XP twice."""
+    teacher_resp = client.post(
+        "/v1/auth/register",
+        json={
+            "email": unique_email("progress-teacher-xp"),
+            "password": "teachpw",
+            "role": "teacher",
+        },
+    )
+    assert teacher_resp.status_code == 201
+    teacher_token = teacher_resp.json()["accessToken"]
+    problem = create_problem(client, teacher_token, difficulty_level="medium")
+
+    guest_resp = client.post("/v1/auth/guest", json={"firstName": "Solver", "grade": 3})
+    assert guest_resp.status_code == 201
+    headers = {"Authorization": f"Bearer {guest_resp.json()['accessToken']}"}
+
+    for success in (True, True, False, True):
+        response = client.post(
+            "/v1/progress",
+            headers=headers,
+            json={"mathWordProblemId": problem["id"], "success": success},
+        )
+        assert response.status_code == 200
+    assert response.json()["attemptCount"] == 4
+
+    me = client.get("/v1/me", headers=headers).json()
+    assert me["xp"] == 40
+    assert me["solvedTasks"] == 2
+
+    stats = client.get("/v1/achievements/statistics", headers=headers).json()
+    assert stats["homePracticeSolved"] == 2
+    assert stats["totalSolved"] == 2
+
+
+def test_batch_progress_replays_queued_answers(client: TestClient) -> None:
+    """A batch applies answers in order and awards each first solve once."""
+    teacher_resp = client.post(
+        "/v1/auth/register",
+        json={
+            "email": unique_email("progress-teacher-batch"),
+            "password": "teachpw",
+            "role": "teacher",
+        },
+    )
+    assert teacher_resp.status_code == 201
+    teacher_token = teacher_resp.json()["accessToken"]
+    easy = create_problem(client, teacher_token, description="Easy one")
+    hard = create_problem(
+        client, teacher_token, description="Hard one", difficulty_level="hard"
+    )
+
+    guest_resp = client.post("/v1/auth/guest", json={"firstName": "Replay", "grade": 3})
+    assert guest_resp.status_code == 201
+    headers = {"Authorization": f"Bearer {guest_resp.json()['accessToken']}"}
+
+    first = client.post(
+        "/v1/progress",
+        headers=headers,
+        json={"mathWordProblemId": easy["id"], "success": True},
+    )
+    assert first.status_code == 200
+
+    batch = client.post(
+        "/v1/progress/batch",
+        headers=headers,
+        json={
+            "entries": [
+                {"mathWordProblemId": easy["id"], "success": True},
+                {"mathWordProblemId": hard["id"], "success": False},
+                {"mathWordProblemId": "deleted-problem", "success": True},
+                {
+                    "mathWordProblemId": hard["id"],
+                    "success": True,
+                    "source": "class_exercises",
+                },
+            ]
+        },
+    )
+    assert batch.status_code == 200
+    body = batch.json()
+    assert body["missingProblemIds"] == ["deleted-problem"]
+    records = {record["mathWordProblemId"]: record for record in body["records"]}
+    assert records[easy["id"]]["attemptCount"] == 2
+    assert records[easy["id"]]["id"] == first.json()["id"]
+    assert records[hard["id"]]["attemptCount"] == 2
+    assert records[hard["id"]]["success"] is True
+
+    me = client.get("/v1/me", headers=headers).json()
+    assert me["xp"] == 40
+    assert me["solvedTasks"] == 2
+
+    stats = client.get("/v1/achievements/statistics", headers=headers).json()
+    assert stats["homePracticeSolved"] == 1
+    assert stats["classExercisesSolved"] == 1
+    assert stats["totalSolved"] == 2
+
+
+def test_crossing_a_threshold_unlocks_achievements_once(client: TestClient) -> None:
+    """Reaching five solves unlocks the matching achievements exactly once."""
+    teacher_resp = client.post(
+        "/v1/auth/register",
+        json={
+            "email": unique_email("progress-teacher-achievements"),
+            "password": "teachpw",
+            "role": "teacher",
+        },
+    )
+    assert teacher_resp.status_code == 201
+    teacher_token = teacher_resp.json()["accessToken"]
+    problems = [
+        create_problem(client, teacher_token, description=f"Problem {index}")
+        for index in range(6)
+    ]
+
+    guest_resp = client.post("/v1/auth/guest", json={"firstName": "Star", "grade": 3})
+    assert guest_resp.status_code == 201
+    headers = {"Authorization": f"Bearer {guest_resp.json()['accessToken']}"}
+
+    def unlocked_ids() -> set[str]:
+        response = client.get("/v1/achievements", headers=headers)
+        assert response.status_code == 200
+        return {
+            achievement["id"]
+            for achievement in response.json()["achievements"]
+            if achievement["unlocked"]
+        }
+
+    batch = client.post(
+        "/v1/progress/batch",
+        headers=headers,
+        json={
+            "entries": [
+                {"mathWordProblemId": problem["id"], "success": True}
+                for problem in problems[:4]
+            ]
+        },
+    )
+    assert batch.status_code == 200
+    assert unlocked_ids() == set()
+
+    for problem in problems[4:]:
+        response = client.post(
+            "/v1/progress",
+            headers=headers,
+            json={"mathWordProblemId": problem["id"], "success": True},
+        )
+        assert response.status_code == 200
+    assert unlocked_ids() == {"home_practice_5", "total_5"}
+
+    # Thresholds met without an unlock row are repaired at startup.
+    app = cast(FastAPI, client.app)
+    assert client.portal is not None
+    user_id = guest_resp.json()["user"]["id"]
+    assert client.portal.call(_drop_unlocks_and_reconcile, app, user_id) == 2
+    assert unlocked_ids() == {"home_practice_5", "total_5"}
+    assert client.portal.call(_reconcile, app) == 0
+
+
+async def _drop_unlocks_and_reconcile(app: FastAPI, user_id: str) -> int:
+    """Lose a user's unlock rows, then run the startup reconcile."""
+    async with app.state.db_session() as db:
+        await db.execute(
+            delete(UserAchievement).where(UserAchievement.user_id == user_id)
+        )
+        await db.commit()
+    return await _reconcile(app)
+
+
+async def _reconcile(app: FastAPI) -> int:
+    async with app.state.db_session() as db:
+        written = await reconcile_achievements(db)
+        await db.commit()
+    return written
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from typing import cast
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.models import User, UserStreakSummary
+from app.services import learning
+
+
+def _guest(client: TestClient) -> tuple[str, dict[str, str]]:
+    """Create a guest student and return its id and auth headers."""
+    response = client.post("/v1/auth/guest", json={"firstName": "Streaky", "grade": 3})
+    assert response.status_code == 201
+    headers = {"Authorization": f"Bearer {response.json()['accessToken']}"}
+    me = client.get("/v1/me", headers=headers)
+    assert me.status_code == 200
+    return me.json()["id"], headers
+
+
+async def _start_sessions(app: FastAPI, user_id: str, days_ago: list[int]) -> None:
+    """Start learning sessions for a user on the given past days."""
+    now = datetime.now(timezone.utc)
+    async with app.state.db_session() as db:
+        user = await db.get(User, user_id)
+        assert user is not None
+        for offset in days_ago:
+            await learning.start_learning_session(
+                db, user, started_at=now - timedelta(days=offset)
+            )
+        await db.commit()
+
+
+async def _summary(app: FastAPI, user_id: str) -> UserStreakSummary | None:
+    """Return the materialized streak summary for a user."""
+    async with app.state.db_session() as db:
+        return await db.get(UserStreakSummary, user_id)
+
+
+def test_streak_summary_is_maintained_on_session_start(client: TestClient) -> None:
+    """Login records today; new and backdated days keep the summary correct."""
+    app = cast(FastAPI, client.app)
+    portal = client.portal
+    assert portal is not None
+    user_id, headers = _guest(client)
+
+    summary = portal.call(_summary, app, user_id)
+    assert summary is not None
+    assert (summary.current_streak, summary.longest_streak) == (1, 1)
+
+    # Backdated sessions: yesterday extends the run; a gap starts an older run.
+    portal.call(_start_sessions, app, user_id, [1, 4, 5, 6, 7])
+    response = client.get("/v1/progress/streak", headers=headers)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["currentStreak"] == 2
+    assert body["longestStreak"] == 4
+    assert len(body["activityHistory"]) == 6
+    assert sum(day["hasActivity"] for day in body["weeklyActivity"]) >= 1
+
+    # A new later day advances the cached counters incrementally.
+    portal.call(_start_sessions, app, user_id, [-1])
+    summary = portal.call(_summary, app, user_id)
+    assert summary is not None
+    assert (summary.current_streak, summary.longest_streak) == (3, 4)
+
+
+async def _drop_summary(app: FastAPI, user_id: str) -> None:
+    """Delete the materialized summary so reads fall back to session dates."""
+    async with app.state.db_session() as db:
+        summary = await db.get(UserStreakSummary, user_id)
+        assert summary is not None
+        await db.delete(summary)
+        await db.commit()
+
+
+def test_streak_history_is_bounded_by_date_range(client: TestClient) -> None:
+    """from/to bound the history; unmaterialized users get the same streaks."""
+    app = cast(FastAPI, client.app)
+    portal = client.portal
+    assert portal is not None
+    user_id, headers = _guest(client)
+    portal.call(_start_sessions, app, user_id, [1, 2, 10, 11])
+    today = datetime.now(timezone.utc).date()
+
+    materialized = client.get("/v1/progress/streak", headers=headers).json()
+    portal.call(_drop_summary, app, user_id)
+    derived = client.get("/v1/progress/streak", headers=headers).json()
+    assert derived == materialized
+    assert (derived["currentStreak"], derived["longestStreak"]) == (3, 3)
+
+    start = (today - timedelta(days=5)).isoformat()
+    bounded = client.get(
+        "/v1/progress/streak",
+        headers=headers,
+        params={"from": start, "to": today.isoformat()},
+    )
+    assert bounded.status_code == 200
+    assert bounded.json()["activityHistory"] == [
+        (today - timedelta(days=offset)).isoformat() for offset in (2, 1, 0)
+    ]
+
+    inverted = client.get(
+        "/v1/progress/streak",
+        headers=headers,
+        params={"from": today.isoformat(), "to": start},
+    )
+    assert inverted.status_code == 400
@@ -1,11 +1,26 @@
 import { apiClient } from '../../lib/apiClient';
-import type { Discussion, DiscussionDetail, CreateDiscussionData, CreateReplyData, DiscussionReply } from './types';
+import type {
+  Discussion,
+  DiscussionDetail,
+  DiscussionPage,
+  CreateDiscussionData,
+  CreateReplyData,
+  DiscussionReply,
+} from './types';
 
 export const discussionApi = {
   // List discussions
   getDiscussions: async (category?: string) => {
-    const path = category ? `/discussions/?category=${category}` : '/discussions/';
-    return apiClient.get<Discussion[]>(path);
+    return (await discussionApi.getDiscussionPage(category)).items;
+  },
+
+  // One page of discussions; pass nextCursor back to continue
+  getDiscussionPage: async (category?: string, cursor?: string) => {
+    const params = new URLSearchParams();
+    if (category) params.set('category', category);
+    if (cursor) params.set('cursor', cursor);
+    const query = params.toString();
+    return apiClient.get<DiscussionPage>(query ? `/discussions/?${query}` : '/discussions/');
   },
 
   // Get single discussion
@@ -28,6 +28,11 @@ export interface Discussion {
   reply_count: number;
 }
 
+export interface DiscussionPage {
+  items: Discussion[];
+  nextCursor: string | null;
+}
+
 export interface DiscussionDetail extends Discussion {
   replies: DiscussionReply[];
 }
@@ -79,4 +79,5 @@ export interface ExtractProblemsRequest {
 
 export interface ExtractProblemsResponse {
   problems: string[];
+  failedPages: number[];
 }